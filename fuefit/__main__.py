@@ -54,6 +54,9 @@ Assuming a CSV-file 'engine.csv' like this:
             -I - file_frmt=JSON orient=values -c N P FC \\
             -O engine_map.txt encoding=UTF-8
 
+    ## Run many json model-files on 4 processes (see `%(prog)s batch --help`):
+    $ %(prog)s batch -j 4 -O results/ engine_*.json
+
 
 Now, if input vectors are in 2 separate files, the 1st, 'engine_1.xlsx',
 having 5 columns with different headers than expected, like this:
@@ -96,7 +99,7 @@ import shutil
 import sys
 from textwrap import dedent
 
-from . import datamodel, processor, utils
+from . import datamodel, pdcalc, processor, utils
 from . import __version__ as prog_ver
 from .datamodel import (JsonPointerException, json_dump, json_dumps)
 from pandas.core.generic import NDFrame
@@ -160,6 +163,10 @@ def main(argv=None):
     if argv is None:
         argv = sys.argv[1:]
 
+    if argv and argv[0] == 'batch':
+        from . import batch
+        return batch.main(argv[1:], program_name='%s batch' % program_name)
+
     mod_doc_lines   = globals()['__doc__'].splitlines()
     mod_desc        = mod_doc_lines[0]
     mod_epilog      = dedent('\n'.join(mod_doc_lines[1:]))
@@ -225,7 +232,12 @@ def main(argv=None):
         log.debug("Input Model(strict: %s): %s", opts.strict, utils.Lazy(lambda: json_dumps(mdl, 'to_string')))
         datamodel.validate_model(mdl, additional_props)
 
-        mdl = processor.run(mdl, opts)
+        if opts.profile:
+            with pdcalc.profiling() as profile:
+                mdl = processor.run(mdl, opts)
+            store_profile(profile, opts.profile)
+        else:
+            mdl = processor.run(mdl, opts)
 
         store_model_parts(mdl, outfiles)
 
@@ -630,6 +642,15 @@ def store_model_parts(mdl, outfiles):
         except Exception as ex:
             raise Exception("Failed storing %s due to: %s" %(filespec, ex)) from ex
 
+def store_profile(profile, fname):
+    '''Writes the :class:`pdcalc.PlanProfile` as JSON into `fname`, or prints it as a table on <stderr> if it is '-'.'''
+    if fname == '-':
+        with pd.option_context('display.width', 200, 'display.max_rows', None, 'display.max_colwidth', 60):
+            print(profile.to_frame(), file=sys.stderr)
+    else:
+        with open(fname, 'w') as fd:
+            fd.write(profile.to_json())
+
 class RawTextHelpFormatter(argparse.RawDescriptionHelpFormatter):
     """Help message formatter which retains formatting of all help text.
 
@@ -774,6 +795,28 @@ def build_args_parser(program_name, version, desc, epilog):
             Implies --strict true
             [default: %(default)s] """),
                         default=False)
+    grp_various.add_argument("--cache", action="store_true", help=dedent("""
+            reuse (and store) fitting results from the cache of
+            previous runs with identical input
+            [default: %(default)s]"""),
+                        default=False)
+    grp_various.add_argument("--no-cache", action="store_true", help=dedent("""
+            do not reuse (nor store) cached fitting results,
+            even if --cache or --cache-dir given
+            [default: %(default)s]"""),
+                        default=False)
+    grp_various.add_argument("--cache-dir", help=dedent("""
+            the folder of the fitting-results cache
+            (and of the calculation-plans, in its `plans` sub-folder);
+            implies --cache
+            [default: ~/.fuefit/cache]"""),
+                        default=None, metavar='CACHE_DIR')
+    grp_various.add_argument("--profile", help=dedent("""
+            record the wall & CPU time and the allocated bytes of each calculation
+            (and of harvesting & planning them), and write them as JSON into PROFILE_FILE,
+            or print them as a table on <stderr> if no file given
+            [default: %(default)s]"""),
+                        nargs='?', const='-', default=None, metavar='PROFILE_FILE')
     grp_various.add_argument('-v', "--verbose", action="count", default=0, help="increase verbosity level: DEBUG --> ALL\n[default: %(default)s]")
     grp_various.add_argument("--version", action="version", version=version_string, help="prints version identifier of the program")
     grp_various.add_argument("--help", action="help", help='show this help message and exit')
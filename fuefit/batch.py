@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2014 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+Runs many experiments in parallel, each one from a json model-file, on a pool of processes.
+
+Every model-file is merged on top of :func:`datamodel.base_model()`, validated and
+run through :func:`processor.run()`, and its output-model is written as soon as it completes.
+
+EXAMPLES:
+---------
+    ## Fit all engines in the current folder using 4 processes:
+    $ fuefit batch -j 4 -O results/ *.json
+
+    ## Fit the engines listed in a manifest-file (one model-file per line, '#' for comments):
+    $ fuefit batch -f engines.lst
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import logging
+import os
+from textwrap import dedent
+
+from . import datamodel, processor, utils
+
+
+log = logging.getLogger(__name__)
+
+_default_out_suffix = '.out.json'
+
+
+def read_manifest(fpath):
+    """
+    :param str fpath: a text-file listing one model-file per line; blank lines and those starting with '#'
+            are ignored, and relative-paths are resolved against the manifest's folder
+    :return: a list with the model-file paths
+    """
+    mydir = os.path.dirname(fpath)
+    with open(fpath) as fd:
+        lines = [line.strip() for line in fd]
+
+    return [os.path.join(mydir, line) for line in lines if line and not line.startswith('#')]
+
+
+def load_model_file(fpath):
+    """
+    :return: the json-model read from `fpath` merged on top of :func:`datamodel.base_model()`
+    """
+    with open(fpath) as fd:
+        mdl_part = json.load(fd)
+
+    return datamodel.merge(datamodel.base_model(), mdl_part)
+
+
+def _run_model_file(fpath, opts=None, strict=False):
+    """The worker-function running in the pool's processes; must be top-level for pickling."""
+
+    mdl = load_model_file(fpath)
+    ## Json has no tables, so convert them before validating their columns;
+    #    the engine is converted afterwards, not to bypass its schema.
+    datamodel.ensure_modelpath_DataFrame(mdl, '/measured_eng_points')
+    datamodel.validate_model(mdl, additional_properties=not strict, compiled=True)
+    datamodel.ensure_modelpath_Series(mdl, '/engine')
+
+    return processor.run(mdl, opts)
+
+
+def run_batch(model_files, n_workers=None, opts=None, strict=False):
+    """
+    Runs :func:`processor.run()` for all `model_files` on a :class:`ProcessPoolExecutor`.
+
+    :param model_files: a sequence of json model-file paths
+    :param int n_workers: the number of processes, [default: number of CPUs]
+    :param opts: a picklable `opts` for :func:`processor.run()`
+    :param bool strict: when true, additional-properties are not allowed in the models
+    :return: a generator of 2-tuples ``(fpath, out_model_or_exception)`` in completion order
+    """
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {executor.submit(_run_model_file, fpath, opts, strict): fpath for fpath in model_files}
+        for fut in as_completed(futures):
+            fpath = futures[fut]
+            try:
+                yield (fpath, fut.result())
+            except Exception as ex:
+                yield (fpath, ex)
+
+
+def make_out_fpath(fpath, out_dir=None):
+    base = os.path.splitext(os.path.basename(fpath))[0]
+    if out_dir is None:
+        out_dir = os.path.dirname(fpath)
+
+    return os.path.join(out_dir, base + _default_out_suffix)
+
+
+def build_args_parser(program_name):
+    doc_lines = __doc__.strip().splitlines()
+    parser = argparse.ArgumentParser(prog=program_name, description=doc_lines[0],
+            epilog=dedent('\n'.join(doc_lines[1:])), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model_files', help="json model-files to run", nargs='*', metavar='MODEL_FILE')
+    parser.add_argument('-f', '--manifest', help=dedent("""
+            a text-file listing model-files to run, one per line
+            (may be given multiple times)"""),
+            action='append', default=[], metavar='MANIFEST')
+    parser.add_argument('-j', '--jobs', help="number of worker processes [default: number of CPUs]",
+            type=int, default=None, metavar='N')
+    parser.add_argument('-O', '--out-dir', help=dedent("""
+            folder to write output-models as `<model>%s`
+            [default: the folder of each model-file]""" % _default_out_suffix),
+            default=None, metavar='OUT_DIR')
+    parser.add_argument('--strict', help=dedent("""
+            more strict model validation, ie additional-properties 
+            are not allowed.
+            [default: %(default)s]"""),
+            default=False, type=utils.str2bool, metavar='[TRUE | FALSE]')
+    parser.add_argument('--cache', help="reuse (and store) cached fitting results",
+            action='store_true', default=False)
+    parser.add_argument('--no-cache', help="do not reuse (nor store) cached fitting results, even if --cache or --cache-dir given",
+            action='store_true', default=False)
+    parser.add_argument('--cache-dir', help="the folder of the fitting-results and plans cache; implies --cache [default: ~/.fuefit/cache]",
+            default=None, metavar='CACHE_DIR')
+
+    return parser
+
+
+def main(argv=None, program_name='fuefit batch'):
+    """
+    The `batch` sub-command of the cmd-line tool.
+
+    :return: the exit-status, 1 if any experiment failed, 0 otherwise
+    """
+    parser = build_args_parser(program_name)
+    opts = parser.parse_args(argv)
+
+    model_files = list(opts.model_files)
+    for manifest in opts.manifest:
+        model_files.extend(read_manifest(manifest))
+    if not model_files:
+        parser.error('No model-files given!')
+    if opts.out_dir:
+        os.makedirs(opts.out_dir, exist_ok=True)
+
+    n_failed = 0
+    run_opts = argparse.Namespace(cache=opts.cache, no_cache=opts.no_cache, cache_dir=opts.cache_dir)
+    for (n, (fpath, res)) in enumerate(run_batch(model_files, opts.jobs, run_opts, opts.strict), 1):
+        if isinstance(res, Exception):
+            n_failed += 1
+            log.error('(%i/%i) Experiment(%s) failed due to: %s', n, len(model_files), fpath, res)
+        else:
+            out_fpath = make_out_fpath(fpath, opts.out_dir)
+            with open(out_fpath, 'w') as fd:
+                datamodel.json_dump(res, fd)
+            log.info('(%i/%i) Experiment(%s) --> %s', n, len(model_files), fpath, out_fpath)
+
+    if n_failed:
+        log.error('%i out of %i experiments failed!', n_failed, len(model_files))
+
+    return 1 if n_failed else 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -13,7 +13,11 @@ Function for building and jsonschema-validating input and output model.
 '''
 
 from collections.abc import Mapping, Sequence 
+import copy
+import functools
 import json
+import numbers
+import re
 
 import numpy as np
 from pandas.core.generic import NDFrame
@@ -123,6 +127,13 @@ def model_schema(additional_properties = False):
             'measured_eng_points':{
                 "type": "DataFrame"
             }, #measured_eng_points
+            'fit_info':{
+                "title": "Fitting diagnostics",
+                "type": "object",
+                'description': dedent("""
+                    Output-only: the `solver` used, the `nfev` model-evaluations of lmfit, 
+                    and when robust, the `robust_iterations` and whether it has `robust_converged`.""")
+            }, #fit_info
             "params": {
                 "title": "Experiment parameters and constants",
                 "type": "object", "additionalProperties": additional_properties,
@@ -169,11 +180,88 @@ def model_schema(additional_properties = False):
                                     "title": "Robust fitting?",
                                     "description": dedent("""
                                         When `robust`, outliers are excluded from the fitted-data,
-                                        by using a non-linear iteratively-reweighted least-squares (IRLS) fitting-method.
+                                        by using an iteratively-reweighted least-squares (IRLS) fitting-method.
                                     """),
                                     "type": ["boolean", "null"],
                                     "default": False,
                                 },
+                                'warm_start': {
+                                    "title": "Initial coefficient-values (null | 'cache' | coeffs-map | fleet-table)",
+                                    "description": dedent("""
+                                        Where to start fitting from, instead of the `value` of the `coeffs`:
+                                        - 'cache': the last coefficients fitted for the same engine & params, if any,
+                                        - a map of coefficient-values, ie read from the coefficients-file 
+                                          of a previous run with `-I coeffs.csv file_frmt=SERIES model_path=...`,
+                                        - a fleet-table, with engine-attributes & coefficients as columns,
+                                          to start from the coefficients of the most similar engine.
+                                    """),
+                                    "anyOf": [
+                                        {"enum": [None, "cache"]},
+                                        {"type": "object"},
+                                    ],
+                                    "default": None,
+                                },
+                                'robust_tol': {
+                                    "title": "Robust fitting's relative convergence tolerance",
+                                    "description": "Re-weighting stops when no coefficient changes more than this, relative to its value.",
+                                    "type": ["number", "null"],
+                                    "default": 1e-6,
+                                },
+                                'robust_max_iter': {
+                                    "title": "Robust fitting's maximum re-weighting iterations",
+                                    "$ref": "#/definitions/positiveIntegerOrNull",
+                                    "default": 50,
+                                },
+                                'confidence_intervals': {
+                                    "title": "Confidence-intervals of the fitted coefficients (null to skip)",
+                                    "description": dedent("""
+                                        When given, the engine-points are resampled and re-fitted
+                                        to report the `low`, `high` & `std` of each coefficient
+                                        under `/engine/fc_map_coeffs_ci`.
+                                    """),
+                                    "type": ["object", "null"], "additionalProperties": additional_properties,
+                                    "properties": {
+                                        'method': {
+                                            "enum": ["bootstrap", "jackknife", None],
+                                            "default": "bootstrap",
+                                        },
+                                        'n_replicates': {
+                                            "title": "Number of bootstrap replicates",
+                                            "$ref": "#/definitions/positiveIntegerOrNull",
+                                            "default": 1000,
+                                        },
+                                        'confidence': {
+                                            "type": ["number", "null"],
+                                            "minimum": 0, "maximum": 1,
+                                            "exclusiveMinimum": True, "exclusiveMaximum": True,
+                                            "default": 0.95,
+                                        },
+                                        'seed': {
+                                            "title": "Random-seed for reproducible bootstrap intervals",
+                                            "type": ["integer", "null"],
+                                        },
+                                        'n_workers': {
+                                            "title": "Number of processes re-fitting non-linear replicates",
+                                            "description": dedent("""
+                                                Linear-solvable replicates are always solved together in-process;
+                                                null uses as many processes as CPUs.
+                                            """),
+                                            "$ref": "#/definitions/positiveIntegerOrNull",
+                                            "default": 1,
+                                        },
+                                    },
+                                    "default": None,
+                                },
+                                'solver': {
+                                    "title": "Fitting solver (auto | linear | lmfit)",
+                                    "description": dedent("""
+                                        The `linear` solver fits all coefficients in a single least-squares step,
+                                        but it cannot respect any coefficient `min/max/expr` constraints;
+                                        `auto` selects `linear` unless such constraints exist, and `lmfit` otherwise.
+                                    """),
+                                    "enum": ["auto", "linear", "lmfit", None],
+                                    "default": "auto",
+                                },
                             },
                         }
                 }
@@ -257,16 +345,35 @@ def model_schema(additional_properties = False):
 
 
 
-def model_validator(additional_properties=False):
-    from jsonschema import Draft4Validator
-    schema = model_schema(additional_properties)
-    validator = Draft4Validator(schema)
-    validator._types.update({"object": (dict, pd.Series, pd.DataFrame), "DataFrame" : pd.DataFrame, 'Series':pd.Series})
+## Validators built by :func:`model_validator()`, keyed by its args.
+_model_validators = {}
+
+def model_validator(additional_properties=False, compiled=False):
+    """
+    :param bool compiled: if true, wraps the validator in a :class:`CompiledValidator` 
+    :return: a validator built once per combination of args and shared, so do not modify it
+    """
+    key = (bool(additional_properties), bool(compiled))
+    validator = _model_validators.get(key)
+    if validator is None:
+        from jsonschema import Draft4Validator
+        schema = model_schema(additional_properties)
+        validator = Draft4Validator(schema)
+        validator._types.update({"object": (dict, pd.Series, pd.DataFrame), "DataFrame" : pd.DataFrame, 'Series':pd.Series})
+        if compiled:
+            validator = CompiledValidator(validator)
+        _model_validators[key] = validator
 
     return validator
 
-def validate_model(mdl, additional_properties=False):
-    validator = model_validator(additional_properties=False)
+def validate_model(mdl, additional_properties=False, compiled=False):
+    """
+    Validates the `mdl` against the :func:`model_schema()` and the contents 
+    of its ``/measured_eng_points`` table (if a DataFrame) against the :func:`eng_points_columns_schema()`.
+
+    :raise jsonschema.ValidationError: or the :class:`ColumnsValidationError` subclass
+    """
+    validator = model_validator(additional_properties, compiled)
     try:
         validator.validate(mdl)
     except jsons.ValidationError as ex:
@@ -276,6 +383,272 @@ def validate_model(mdl, additional_properties=False):
             ex.instance = str(ex.instance)
         raise
 
+    eng_points = mdl.get('measured_eng_points')
+    if isinstance(eng_points, pd.DataFrame):
+        validate_columns(eng_points, eng_points_columns_schema(), 'measured_eng_points')
+
+
+## Schema-keywords not affecting validation.
+_schema_annotations = frozenset(['$schema', 'id', 'title', 'description', 'default', 'definitions'])
+
+def _flatten_pytypes(pytypes):
+    if isinstance(pytypes, type):
+        return (pytypes, )
+    return tuple(t for sub in pytypes for t in _flatten_pytypes(sub))
+
+def _make_type_check(pytypes_list):
+    """:return: a predicate for any of the json-types as ``Draft4Validator.is_type()``, rejecting bools as numbers"""
+    pytypes_list = [_flatten_pytypes(pytypes) for pytypes in pytypes_list]
+    all_pytypes = tuple(t for pytypes in pytypes_list for t in pytypes)
+    bool_ok = any(issubclass(bool, pytypes) and
+            (bool in pytypes or not any(issubclass(t, numbers.Number) for t in pytypes))
+            for pytypes in pytypes_list)
+    if bool_ok:
+        return lambda instance: isinstance(instance, all_pytypes)
+    return lambda instance: isinstance(instance, all_pytypes) and not isinstance(instance, bool)
+
+def compile_schema(schema, types):
+    """
+    Compiles a draft-4 json-schema into a predicate-function telling whether an instance is valid.
+
+    Only the keywords used by :func:`model_schema()` are supported (with local ``$ref`` s),
+    and the predicate is a tree of closures with all schema-lookups resolved upfront, 
+    so it costs a fraction of ``Draft4Validator.is_valid()``.
+
+    :param dict types: a map of json-types to python-types, like the ``_types`` of jsonschema-validators
+    :raise ValueError: for unsupported keywords, types or refs
+    """
+    (is_object, is_array, is_string, is_number) = [_make_type_check([types[t]]) for t in ('object', 'array', 'string', 'number')]
+    refs = {}
+
+    def compile_ref(ref):
+        if ref not in refs:
+            if not ref.startswith('#/'):
+                raise ValueError('Cannot compile non-local json-schema $ref(%s)!' % ref)
+            refs[ref] = None        ## Placeholder while compiling recursive refs.
+            node = schema
+            for part in ref[2:].split('/'):
+                node = node[part]
+            refs[ref] = compile_node(node)
+
+        return lambda instance: refs[ref](instance)
+
+    def compile_node(node):
+        if '$ref' in node:          ## Draft4 ignores any sibling keywords.
+            return compile_ref(node['$ref'])
+
+        checks = []
+        for (key, value) in node.items():
+            if key in _schema_annotations or key in ('exclusiveMinimum', 'exclusiveMaximum'):
+                continue
+            elif key == 'type':
+                try:
+                    checks.append(_make_type_check([types[t] for t in ([value] if isinstance(value, str) else value)]))
+                except KeyError as ex:
+                    raise ValueError('Cannot compile unknown json-schema type(%s)!' % ex) from ex
+            elif key == 'enum':
+                checks.append(lambda instance, enums=value: instance in enums)
+            elif key == 'required':
+                checks.append(lambda instance, required=value: not is_object(instance) or
+                        all(prop in instance for prop in required))
+            elif key == 'properties':
+                checks.append(make_properties_check([(prop, compile_node(subschema)) for (prop, subschema) in value.items()]))
+            elif key == 'additionalProperties':
+                if isinstance(value, Mapping) or 'patternProperties' in node:
+                    raise ValueError('Cannot compile json-schema additionalProperties(%s)!' % value)
+                if not value:
+                    known = frozenset(node.get('properties', ()))
+                    checks.append(lambda instance, known=known: not is_object(instance) or
+                            all(prop in known for prop in instance))
+            elif key == 'minimum':
+                cmp = ops.gt if node.get('exclusiveMinimum', False) else ops.ge
+                checks.append(lambda instance, limit=value, cmp=cmp: not is_number(instance) or cmp(instance, limit))
+            elif key == 'maximum':
+                cmp = ops.lt if node.get('exclusiveMaximum', False) else ops.le
+                checks.append(lambda instance, limit=value, cmp=cmp: not is_number(instance) or cmp(instance, limit))
+            elif key == 'pattern':
+                regex = re.compile(value)
+                checks.append(lambda instance, regex=regex: not is_string(instance) or bool(regex.search(instance)))
+            elif key == 'items':
+                if isinstance(value, Mapping):
+                    item_check = compile_node(value)
+                    checks.append(lambda instance, item_check=item_check: not is_array(instance) or
+                            all(item_check(item) for item in instance))
+                else:
+                    item_checks = [compile_node(subschema) for subschema in value]
+                    checks.append(lambda instance, item_checks=item_checks: not is_array(instance) or
+                            all(check(item) for (check, item) in zip(item_checks, instance)))
+            elif key == 'oneOf':
+                subchecks = [compile_node(subschema) for subschema in value]
+                checks.append(lambda instance, subchecks=subchecks: 
+                        sum(1 for check in subchecks if check(instance)) == 1)
+            elif key == 'anyOf':
+                subchecks = [compile_node(subschema) for subschema in value]
+                checks.append(lambda instance, subchecks=subchecks: any(check(instance) for check in subchecks))
+            else:
+                raise ValueError('Cannot compile json-schema keyword(%s)!' % key)
+
+        if len(checks) == 1:
+            return checks[0]
+
+        def check_all(instance):
+            for check in checks:
+                if not check(instance):
+                    return False
+            return True
+
+        return check_all
+
+    def make_properties_check(props):
+        def check_properties(instance):
+            if is_object(instance):
+                for (prop, check) in props:
+                    if prop in instance and not check(instance[prop]):
+                        return False
+            return True
+
+        return check_properties
+
+    return compile_node(schema)
+
+
+class CompiledValidator:
+    """
+    Validates instances with a predicate from :func:`compile_schema()`, and only when that fails,
+    re-validates them with the wrapped jsonschema-`validator` to report the errors.
+
+    Any other attribute is delegated to the wrapped `validator`.
+    """
+
+    def __init__(self, validator):
+        self.validator = validator
+        self._check = compile_schema(validator.schema, validator._types)
+
+    def _passes_check(self, instance):
+        try:
+            return bool(self._check(instance))
+        except Exception:       ## ie unhashable or ambiguous values, left to jsonschema.
+            return False
+
+    def is_valid(self, instance):
+        return self._passes_check(instance) or self.validator.is_valid(instance)
+
+    def validate(self, instance):
+        if not self._passes_check(instance):
+            self.validator.validate(instance)
+
+    def __getattr__(self, name):
+        return getattr(self.validator, name)
+
+
+
+def eng_points_columns_schema():
+    """
+    The column-level schema of the engine-points tables, opaque "DataFrame" types for :func:`model_schema()`.
+
+    Column-names are matched case-insensitively, ignoring any ``[units]`` or ``(units)`` suffix.
+
+    :return: a dict with:
+
+            groups
+                a list of ``(category, column_names)`` pairs, requiring at least one column from each category
+            columns
+                a map of column-names --> constraints, any of: 
+                `dtype` ('number'), `nan` (whether allowed, [default: False]), `min` & `max` (inclusive)
+    """
+    number = {'dtype': 'number', 'nan': False}
+    positive = dict(number, min=0)
+
+    return {
+        'groups': [
+            ('engine-speed', ['n', 'n_norm', 'cm']),
+            ('load-power', ['p', 'p_norm', 't', 'torque', 'bmep']),
+            ('fuel-consumption', ['fc', 'fc_norm', 'pmf']),
+        ],
+        'columns': {
+            'n': positive, 'n_norm': number, 'cm': positive, 
+            'p': number, 'p_norm': number, 't': number, 'torque': number, 'bmep': number,
+            'fc': positive, 'fc_norm': positive, 'pmf': positive,
+        },
+    }
+
+
+_column_units_regex = re.compile(r'\s*(\[[^\]]*\]|\([^)]*\))\s*$')
+
+def _normalize_column_name(col):
+    return _column_units_regex.sub('', str(col)).strip().lower()
+
+def find_column_violations(df, schema):
+    """
+    Checks the columns of a DataFrame against a column-level schema, with a few vectorized reductions per column.
+
+    :param schema: a dict like the :func:`eng_points_columns_schema()`
+    :return: a list of ``(column, problem, row_labels)`` tuples, with all the offending row-labels 
+            of each problem (empty for missing or duplicate columns)
+    """
+    columns = OrderedDict()
+    for col in df.columns:
+        columns.setdefault(_normalize_column_name(col), []).append(col)
+
+    violations = []
+    for (category, names) in schema.get('groups', ()):
+        if not any(name in columns for name in names):
+            violations.append((category, 'missing any of %s columns' % names, df.index[:0]))
+
+    for (name, spec) in schema.get('columns', {}).items():
+        cols = columns.get(name)
+        if not cols:
+            continue
+        if len(cols) > 1:
+            violations.append((name, 'duplicate columns %s' % cols, df.index[:0]))
+            continue
+        col = cols[0]
+        def report(problem, bad):
+            if bad.any():
+                violations.append((col, problem, df.index[np.flatnonzero(bad)]))
+
+        values = df[col].values
+        nonnumeric = False
+        if spec.get('dtype') == 'number' and values.dtype.kind not in 'iuf':
+            coerced = pd.to_numeric(df[col], errors='coerce').values.astype(float)
+            nonnumeric = np.isnan(coerced) & pd.notnull(values)
+            report('non-numeric values', nonnumeric)
+            values = coerced
+        if values.dtype.kind == 'f' and not spec.get('nan', False):
+            report('NaN values', np.isnan(values) & ~nonnumeric)
+        if 'min' in spec:
+            report('values below %s' % spec['min'], values < spec['min'])
+        if 'max' in spec:
+            report('values above %s' % spec['max'], values > spec['max'])
+
+    return violations
+
+
+class ColumnsValidationError(jsons.ValidationError):
+    """Reports all the `violations` of some table, as returned by :func:`find_column_violations()`."""
+
+    def __init__(self, message, violations=()):
+        super().__init__(message)
+        self.violations = list(violations)
+
+    def __reduce__(self):
+        return (type(self), (self.message, self.violations))
+
+def validate_columns(df, schema, table_name='table'):
+    """
+    :param schema: a dict like the :func:`eng_points_columns_schema()`
+    :raise ColumnsValidationError: listing the violating rows of all columns
+    """
+    violations = find_column_violations(df, schema)
+    if violations:
+        def describe(col, problem, rows):
+            msg = '%s: %s' % (col, problem)
+            if len(rows):
+                msg += ' at %i rows: %s%s' % (len(rows), list(rows[:10]), ', ...' if len(rows) > 10 else '')
+            return msg
+        msgs = [describe(*violation) for violation in violations]
+        raise ColumnsValidationError('Invalid %s columns:\n  %s' % (table_name, '\n  '.join(msgs)), violations)
+
 
 
 def base_model():
@@ -305,6 +678,7 @@ def base_model():
             },
             'fitting': {
                 'is_robust':    False,
+                'solver':       'auto',
                 'coeffs': OrderedDict([
                     ('a',     dict(value=0.45)),
                     ('b',     dict(value=0.0154)),
@@ -336,10 +710,81 @@ def make_json_defaulter(pd_method):
 
     return defaulter
 
-def json_dumps(obj, pd_method=None):
-    return json.dumps(obj, indent=2, default=make_json_defaulter(pd_method))
-def json_dump(obj, fp, pd_method=None):
-    json.dump(obj, fp, indent=2, default=make_json_defaulter(pd_method))
+## The rows of NDFrames encoded at once by :func:`json_dump()`.
+_json_chunk_rows = 100000
+
+def _json_key(key):
+    if isinstance(key, str):
+        return json.dumps(key)
+    if key is None or isinstance(key, (bool, int, float)):
+        return '"%s"' % json.dumps(key)
+    raise TypeError('keys must be str, int, float, bool or None, not %s' % type(key).__name__)
+
+def _iterencode_ndframe(frame, chunk_rows, inner_indent, outer_indent):
+    """
+    Yields the json of an NDFrame, column-oriented like ``NDFrame.to_json()``, 
+    encoding the values directly by pandas in chunks of `chunk_rows`.
+    """
+    def iterencode_values(sr):
+        yield '{'
+        for start in range(0, len(sr), chunk_rows):
+            chunk = sr.iloc[start:start + chunk_rows].to_json(orient='index')
+            yield ('%s' if start == 0 else ',%s') % chunk[1:-1]
+        yield '}'
+
+    if isinstance(frame, pd.Series):
+        yield from iterencode_values(frame)
+    elif not len(frame.columns):
+        yield '{}'
+    else:
+        if not frame.columns.is_unique:
+            raise ValueError("DataFrame columns must be unique for orient='columns'.")
+        for (i, col) in enumerate(frame.columns):
+            yield '%s%s%s: ' % ('{' if i == 0 else ',', inner_indent, _json_key(str(col)))
+            yield from iterencode_values(frame.iloc[:, i])
+        yield outer_indent + '}'
+
+def _iterencode_model(obj, defaulter, pd_method, chunk_rows, indent='  ', level=0):
+    """Yields the json of a model-tree in pieces, as ``json.dumps(obj, indent=2, default=defaulter)`` would."""
+    if isinstance(obj, (str, int, float)) or obj is None:
+        yield json.dumps(obj)
+    elif isinstance(obj, NDFrame) and pd_method is None:
+        yield from _iterencode_ndframe(obj, chunk_rows, '\n' + indent * (level + 1), '\n' + indent * level)
+    elif isinstance(obj, (dict, list, tuple)):
+        if not obj:
+            yield '{}' if isinstance(obj, dict) else '[]'
+            return
+        inner_indent = '\n' + indent * (level + 1)
+        if isinstance(obj, dict):
+            (opener, closer) = ('{', '}')
+            items = ((_json_key(key) + ': ', value) for (key, value) in obj.items())
+        else:
+            (opener, closer) = ('[', ']')
+            items = (('', value) for value in obj)
+        for (i, (prefix, value)) in enumerate(items):
+            yield '%s%s%s' % (opener if i == 0 else ',', inner_indent, prefix)
+            yield from _iterencode_model(value, defaulter, pd_method, chunk_rows, indent, level + 1)
+        yield '\n' + indent * level + closer
+    else:
+        yield from _iterencode_model(defaulter(obj), defaulter, pd_method, chunk_rows, indent, level)
+
+def json_dumps(obj, pd_method=None, chunk_rows=None):
+    """:return: the json of the model-tree `obj`, see :func:`json_dump()`"""
+    return ''.join(_iterencode_model(obj, make_json_defaulter(pd_method), pd_method, chunk_rows or _json_chunk_rows))
+
+def json_dump(obj, fp, pd_method=None, chunk_rows=None):
+    """
+    Writes the json of the model-tree `obj` into `fp` in pieces, in a single pass without building the whole string.
+
+    NDFrames are written column-oriented like ``NDFrame.to_json()`` (the `index` --> `value` maps of each column),
+    encoded directly by pandas in chunks of rows.
+
+    :param pd_method: if given, NDFrames are written as strings ``<type>:<pd_method()>``, ie ``'to_string'``
+    :param int chunk_rows: the number of NDFrame-rows to encode at once [default: 100000]
+    """
+    write = fp.write
+    for piece in _iterencode_model(obj, make_json_defaulter(pd_method), pd_method, chunk_rows or _json_chunk_rows):
+        write(piece)
 
 
 try:
@@ -425,103 +870,246 @@ def jsonpointer_parts(jsonpointer):
             yield part
 
 _scream = object()
+
+def _as_index(part):
+    """:return: the int of a json-pointer part, or None"""
+    try:
+        return int(part)
+    except ValueError:
+        return None
+
+class JsonPointer:
+    """
+    A json-pointer parsed once, to :meth:`resolve()` and :meth:`set()` document-nodes without any re-parsing.
+
+    Use :func:`parse_jsonpointer()` to get the cached instance of a string.
+    """
+
+    __slots__ = ('path', 'parts', '_indices')
+
+    def __init__(self, jsonpointer):
+        """:raises: JsonPointerException (if not starting with '/')"""
+        self.path = jsonpointer
+        self.parts = tuple(jsonpointer_parts(jsonpointer))
+        self._indices = tuple(_as_index(part) for part in self.parts)
+
+    def resolve(self, doc, default=_scream):
+        """
+        Resolve this pointer within the referenced ``doc``.
+
+        :param doc: the referrant document
+        :return: the resolved doc-item or the `default`, if given, or raises :class:`JsonPointerException` 
+
+        :author: Julian Berman, ankostis
+        """
+        for (part, index) in zip(self.parts, self._indices):
+            if index is not None and type(doc) is not dict and isinstance(doc, Sequence):
+                # Array indexes should be turned into integers
+                part = index
+            try:
+                doc = doc[part]
+            except (TypeError, LookupError):
+                if default is _scream:
+                    raise JsonPointerException(
+                        "Unresolvable JSON pointer(%r)@(%s)" % (self.path, part)
+                    )
+                else:
+                    return default
+
+        return doc
+
+    def set(self, doc, value, object_factory=dict):
+        """
+        Set the node of this pointer within the referenced ``doc``, building any missing branch.
+
+        :param doc: the referrant document
+        :raises: JsonPointerException (if jsonpointer empty, missing, invalid-contet)
+        """
+        parts = self.parts
+        if not parts:
+            raise JsonPointerException("Cannot set the root of a document with an empty JSON pointer(%r)!" % self.path)
+
+        ## Will scream if used on 1st iteration.
+        #
+        pdoc = None
+        ppart = None
+        for (i, (part, index)) in enumerate(zip(parts, self._indices)):
+            if type(doc) is not dict and isinstance(doc, Sequence) and not isinstance(doc, str):
+                ## Array indexes should be turned into integers
+                #
+                doclen = len(doc)
+                if part == '-':
+                    part = doclen
+                elif index is None:
+                    raise JsonPointerException("Expected numeric index(%s) for sequence at (%r)[%i]" % (part, self.path, i))
+                elif index > doclen:
+                    raise JsonPointerException("Index(%s) out of bounds(%i) of (%r)[%i]" % (index, doclen, self.path, i))
+                else:
+                    part = index
+            try:
+                ndoc = doc[part]
+            except (LookupError):
+                break  ## Branch-extension needed.
+            except (TypeError): # Maybe indexing a string...
+                ndoc = object_factory()
+                pdoc[ppart] = ndoc
+                doc = ndoc
+                break  ## Branch-extension needed.
+
+            doc, pdoc, ppart = ndoc, doc, part 
+        else:
+            doc = pdoc # If loop exhausted, cancel last assignment.
+
+        ## Build branch with value-leaf.
+        #
+        nbranch = value
+        for part2 in reversed(parts[i+1:]):
+            ndoc = object_factory()
+            ndoc[part2] = nbranch
+            nbranch = ndoc
+
+        ## Attach new-branch. 
+        try:
+            doc[part] = nbranch
+        except IndexError: # Inserting last sequence-element raises IndexError("list assignment index out of range")
+            doc.append(nbranch)
+
+    def __eq__(self, other):
+        return isinstance(other, JsonPointer) and self.path == other.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __str__(self):
+        return self.path
+
+    def __repr__(self):
+        return 'JsonPointer(%r)' % self.path
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_jsonpointer(jsonpointer):
+    return JsonPointer(jsonpointer)
+
+def parse_jsonpointer(jsonpointer):
+    """
+    :param jsonpointer: a string or an already parsed :class:`JsonPointer`
+    :return: the :class:`JsonPointer` of a string, parsed once and kept in an LRU-cache
+    """
+    if isinstance(jsonpointer, JsonPointer):
+        return jsonpointer
+    return _parse_jsonpointer(jsonpointer)
+
+
 def resolve_jsonpointer(doc, jsonpointer, default=_scream):
     """
     Resolve a ``jsonpointer`` within the referenced ``doc``.
     
     :param doc: the referrant document
-    :param str jsonpointer: a jsonpointer to resolve within document
+    :param jsonpointer: a jsonpointer string or :class:`JsonPointer` to resolve within document
     :return: the resolved doc-item or raises :class:`JsonPointerException` 
 
     :author: Julian Berman, ankostis
     """
-    for part in jsonpointer_parts(jsonpointer):
-        if isinstance(doc, Sequence):
-            # Array indexes should be turned into integers
-            try:
-                part = int(part)
-            except ValueError:
-                pass
-        try:
-            doc = doc[part]
-        except (TypeError, LookupError):
-            if default is _scream:
-                raise JsonPointerException(
-                    "Unresolvable JSON pointer(%r)@(%s)" % (jsonpointer, part)
-                )
-            else:
-                return default
-        
-    return doc
+    return parse_jsonpointer(jsonpointer).resolve(doc, default)
+
 
-        
 def set_jsonpointer(doc, jsonpointer, value, object_factory=dict):
     """
     Resolve a ``jsonpointer`` within the referenced ``doc``.
     
     :param doc: the referrant document
-    :param str jsonpointer: a jsonpointer to the node to modify 
+    :param jsonpointer: a jsonpointer string or :class:`JsonPointer` to the node to modify 
     :raises: JsonPointerException (if jsonpointer empty, missing, invalid-contet)
     """
-    
-    
-    parts = list(jsonpointer_parts(jsonpointer))
-        
-    ## Will scream if used on 1st iteration.
-    #
-    pdoc = None
-    ppart = None
-    for i, part in enumerate(parts):
-        if isinstance(doc, Sequence) and not isinstance(doc, str):
-            ## Array indexes should be turned into integers
-            #
-            doclen = len(doc)
-            if part == '-':
-                part = doclen
-            else:
-                try:
-                    part = int(part)
-                except ValueError:
-                    raise JsonPointerException("Expected numeric index(%s) for sequence at (%r)[%i]" % (part, jsonpointer, i))
-                else:
-                    if part > doclen:
-                        raise JsonPointerException("Index(%s) out of bounds(%i) of (%r)[%i]" % (part, doclen, jsonpointer, i))
-        try:
-            ndoc = doc[part]
-        except (LookupError):
-            break  ## Branch-extension needed.
-        except (TypeError): # Maybe indexing a string...
-            ndoc = object_factory()
-            pdoc[ppart] = ndoc
-            doc = ndoc
-            break  ## Branch-extension needed.
-    
-        doc, pdoc, ppart = ndoc, doc, part 
-    else:
-        doc = pdoc # If loop exhausted, cancel last assignment.
-
-    ## Build branch with value-leaf.
-    #
-    nbranch = value
-    for part2 in reversed(parts[i+1:]):
-        ndoc = object_factory()
-        ndoc[part2] = nbranch
-        nbranch = ndoc
-        
-    ## Attach new-branch. 
-    try:
-        doc[part] = nbranch
-    except IndexError: # Inserting last sequence-element raises IndexError("list assignment index out of range")
-        doc.append(nbranch)
-    
-#    except (IndexError, TypeError) as ex:
-#        #if isinstance(ex, IndexError) or 'list indices must be integers' in str(ex):
-#        raise JsonPointerException("Incompatible content of JSON pointer(%r)@(%s)" % (jsonpointer, part))
-#        else:
-#            doc = {}
-#            parent_doc[parent_part] = doc 
-#            doc[part] = value 
+    parse_jsonpointer(jsonpointer).set(doc, value, object_factory)
+
+
+
+def _copy_node(node):
+    """:return: a shallow copy of model-containers, a full one for NDFrames (their columns are modified in-place)"""
+    if isinstance(node, NDFrame):
+        return node.copy()
+    return copy.copy(node)
+
+class ModelVariant:
+    """
+    A copy-on-write variant of a `base` model-tree, for cheap per-experiment variants (ie of parameter-sweeps).
+
+    The variant's :attr:`model` is a plain model-tree sharing all branches and NDFrames with the `base`, 
+    apart from those written through :meth:`set()` or taken with :meth:`writable()`: 
+    the containers along their paths are copied on their 1st write, so memory grows with the overrides, 
+    not with the size of the model.
+
+    .. Important:: Nodes reached through the :attr:`model` may be shared, so modify them only 
+            after having taken them with :meth:`writable()`.
+
+    Example::
+
+        base = datamodel.base_model()
+        ...
+        variants = []
+        for is_robust in (False, True):
+            variant = ModelVariant(base)
+            variant.set('/params/fitting/is_robust', is_robust)
+            variants.append(variant)
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.model = _copy_node(base)
+        ## Keep also the nodes alive, for their ids not to be recycled.
+        self._owned = {id(self.model): self.model}
+
+    def _own_path(self, ptr, n_parts):
+        """Copies any shared containers along the 1st `n_parts` of the pointer, and attaches them to the model."""
+        node = self.model
+        for (part, index) in zip(ptr.parts[:n_parts], ptr._indices):
+            if index is not None and type(node) is not dict and isinstance(node, Sequence):
+                part = index
+            try:
+                child = node[part]
+            except (TypeError, LookupError):
+                return      ## Missing branches are built anew.
+            if id(child) not in self._owned:
+                if isinstance(child, str) or not isinstance(child, (Mapping, list, NDFrame)):
+                    return  ## Leaf values are replaced, never modified.
+                child = _copy_node(child)
+                node[part] = child
+                self._owned[id(child)] = child
+            node = child
+
+    def resolve(self, jsonpointer, default=_scream):
+        """See :func:`resolve_jsonpointer()`; do not modify the node returned."""
+        return resolve_jsonpointer(self.model, jsonpointer, default)
+
+    def set(self, jsonpointer, value, object_factory=dict):
+        """See :func:`set_jsonpointer()`; copies first any shared containers along the path."""
+        ptr = parse_jsonpointer(jsonpointer)
+        self._own_path(ptr, len(ptr.parts) - 1)
+        ptr.set(self.model, value, object_factory)
+
+    def writable(self, jsonpointer, default=_scream):
+        """
+        :return: the node, copied first along with any shared containers along its path,
+                to be modified in-place, or `default` if missing
+        """
+        ptr = parse_jsonpointer(jsonpointer)
+        self._own_path(ptr, len(ptr.parts))
+
+        return ptr.resolve(self.model, default)
+
+    def variant(self):
+        """
+        :return: a new variant sharing the current model of this one; 
+                this variant gets a fresh :attr:`model` root, to copy again on its next writes 
+                the nodes now shared with the new one
+        """
+        child = ModelVariant(self.model)
+        self.model = _copy_node(self.model)
+        self._owned = {id(self.model): self.model}
 
+        return child
 
 
 def ensure_modelpath_Series(mdl, json_path):
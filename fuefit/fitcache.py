@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2014 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+"""
+A content-addressed on-disk cache of fitting results, so that re-running unchanged experiments returns immediately.
+
+Entries are keyed by a hash of the model-parts affecting the fit
+(see :data:`fit_key_paths`) and are evicted in least-recently-used order
+when the cache grows above its size-limit.
+"""
+
+from collections.abc import Mapping
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from . import __version__
+from . import datamodel
+
+
+log = logging.getLogger(__name__)
+
+## The model-parts hashed into the cache-key.
+fit_key_paths = ('/measured_eng_points', '/engine', '/params/fuel', '/params/fitting')
+## The model-parts hashed into the key of the last coefficients fitted for an engine,
+#    regardless of its engine-points (see `warm_start`).
+engine_key_paths = ('/engine', '/params/fuel', '/params/fitting')
+## Fitting-params not affecting the fitted results.
+_unhashed_fitting_params = ('warm_start', )
+
+default_cache_dir = os.path.join(os.path.expanduser('~'), '.fuefit', 'cache')
+default_max_size = 256 * 1024 * 1024
+
+_entry_ext = '.pkl'
+
+
+def _update_hash(hasher, part):
+    if isinstance(part, pd.DataFrame):
+        hasher.update(b'DataFrame')
+        for col in part.columns:
+            _update_hash(hasher, col)
+            _update_hash(hasher, part[col])
+    elif isinstance(part, pd.Series) and part.dtype != np.object_:
+        hasher.update(('Series:%s' % part.dtype).encode())
+        hasher.update(np.ascontiguousarray(part.values).tobytes())
+    else:
+        if isinstance(part, pd.Series):
+            part = part.to_dict()
+        hasher.update(json.dumps(part, sort_keys=True, default=repr).encode())
+
+def _hash_model_parts(mdl, paths, salt):
+    hasher = hashlib.sha1(('%s:%s' % (salt, __version__)).encode())
+    for path in paths:
+        part = datamodel.resolve_jsonpointer(mdl, path, None)
+        if path == '/params/fitting' and isinstance(part, Mapping):
+            part = {k: v for (k, v) in part.items() if k not in _unhashed_fitting_params}
+        _update_hash(hasher, path)
+        _update_hash(hasher, part)
+
+    return hasher.hexdigest()
+
+def make_fit_key(mdl):
+    """
+    :return: a hex-digest of the :data:`fit_key_paths` model-parts, along with the program-version
+    """
+    return _hash_model_parts(mdl, fit_key_paths, 'fit')
+
+def make_engine_key(mdl):
+    """
+    :return: a hex-digest of the :data:`engine_key_paths` model-parts, along with the program-version
+    """
+    return _hash_model_parts(mdl, engine_key_paths, 'engine')
+
+
+class FitCache:
+    """
+    A folder of pickled fitting-results, each one stored in a file named after its key.
+
+    The file modification-times serve as the LRU-order, so it is safe to share the folder
+    among processes (ie the workers of :mod:`fuefit.batch`).
+    """
+
+    def __init__(self, cache_dir=None, max_size=None):
+        """
+        :param str cache_dir: [default: :data:`default_cache_dir`]
+        :param int max_size: the size-limit of all entries in bytes [default: :data:`default_max_size`]
+        """
+        self.cache_dir = cache_dir or default_cache_dir
+        self.max_size = default_max_size if max_size is None else max_size
+
+    def _entry_fpath(self, key):
+        return os.path.join(self.cache_dir, key + _entry_ext)
+
+    def get(self, key):
+        """
+        :return: the stored entry, or None if missing or unreadable
+        """
+        fpath = self._entry_fpath(key)
+        try:
+            with open(fpath, 'rb') as fd:
+                entry = pickle.load(fd)
+            os.utime(fpath, None)   ## Mark it as recently-used.
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            log.warning('Ignoring bad fit-cache entry(%s) due to: %s', fpath, ex)
+            return None
+
+        log.debug('Fit-cache hit: %s', key)
+        return entry
+
+    def put(self, key, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        (fd, tmp_fpath) = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fd:
+                pickle.dump(entry, fd, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_fpath, self._entry_fpath(key))
+        except Exception:
+            os.unlink(tmp_fpath)
+            raise
+        self.evict()
+
+    def _list_entries(self):
+        """:return: a list of ``(mtime, size, fpath)`` tuples, oldest first"""
+        entries = []
+        for fname in os.listdir(self.cache_dir):
+            if fname.endswith(_entry_ext):
+                fpath = os.path.join(self.cache_dir, fname)
+                try:
+                    st = os.stat(fpath)
+                except FileNotFoundError:  ## Evicted by some other process.
+                    continue
+                entries.append((st.st_mtime, st.st_size, fpath))
+
+        return sorted(entries)
+
+    def evict(self):
+        """Removes least-recently-used entries until their total size fits in `max_size`."""
+        entries = self._list_entries()
+        total_size = sum(size for (_, size, _) in entries)
+        for (_, size, fpath) in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.unlink(fpath)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            log.debug('Evicted fit-cache entry: %s', fpath)
+
+    def clear(self):
+        for (_, _, fpath) in self._list_entries():
+            try:
+                os.unlink(fpath)
+            except FileNotFoundError:
+                pass
+
+
+def cache_from_opts(opts):
+    """
+    :param opts: the `opts` of :func:`processor.run()`, with optional attributes `cache`, `cache_dir` & `no_cache`;
+            caching is opt-in, enabled by a true `cache` or a `cache_dir`, unless `no_cache`
+    :return: a :class:`FitCache` or None, if `opts` is None or caching not enabled
+    """
+    if opts is None or getattr(opts, 'no_cache', False):
+        return None
+    cache_dir = getattr(opts, 'cache_dir', None)
+    if not (cache_dir or getattr(opts, 'cache', False)):
+        return None
+
+    return FitCache(cache_dir)
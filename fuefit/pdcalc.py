@@ -16,18 +16,28 @@ inspired by XForms: http://lib.tkk.fi/Diss/2007/isbn9789512285662/article3.pdf
 '''
 from collections import OrderedDict, defaultdict
 from collections.abc import Mapping, Iterable
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as futures_wait
+import ast
+import bisect
+import contextlib
+import copy
+import functools
+import hashlib
 import inspect
+import linecache
 import logging
-import re
-
-from networkx.exception import NetworkXError
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
 
 import itertools as it
-import networkx as nx
 import pandas as pd
 
-
-from .mymock import MagicMock
+from . import __version__
 
 DEBUG= False
 
@@ -40,31 +50,32 @@ class DependenciesError(Exception):
         super(Exception, self).__init__(msg)
         self.item = item
 
-def _make_mock(*args, **kwargs):
-    return MagicMock(*args, **kwargs)
+def _make_root_tracer():
+    return _Tracer(_root_name)
 
 
 def harvest_funcs_factory(funcs_factory, root=None, func_rels=None):
     new_func_rels = []
 
-    ## Wrap and invoke funcs_factory with "rooted" mockups as args
-    #    to collect mock_calls.
+    ## Wrap and invoke funcs_factory with "rooted" tracers as args
+    #    to collect traced-calls.
     #
     funcs_factory = _wrap_funcs_factory(funcs_factory)
-    (root, mocks) = funcs_factory.mockup_func_args(root=root)
+    (root, tracers) = funcs_factory.trace_func_args(root=root)
 
-    cfuncs = funcs_factory(*mocks) ## The cfuncs are now wrapped children.
+    cfuncs = funcs_factory(*tracers) ## The cfuncs are now wrapped children.
 
     ## Harvest cfunc deps as a list of 3-tuple (item, deps, funx)
     #    by inspecting root after each cfunc-call.
     #
+    traced_calls = root._tracer_calls
     for cfunc in cfuncs:
-        root.reset_mock()
+        traced_calls.clear()
         tmp = cfunc()
         try: tmp += 2   ## Force dependencies from return values despite compiler-optimizations.
         except:
             pass
-        _harvest_mock_calls(root.mock_calls, cfunc, new_func_rels)
+        _harvest_traced_calls(traced_calls, cfunc, new_func_rels)
     funcs_factory.reset()
 
     _validate_func_relations(new_func_rels)
@@ -78,14 +89,14 @@ def harvest_func(func, root=None, func_rels=None):
     new_func_rels = []
 
     func = _wrap_standalone_func(func)
-    (root, mocks) = func.mockup_func_args(root=root)
+    (root, tracers) = func.trace_func_args(root=root)
 
-    tmp = func(*mocks)
+    tmp = func(*tracers)
     try: tmp += 2   ## Force dependencies from return values despite compiler-optimizations.
     except:
         pass
     func.reset()
-    _harvest_mock_calls(root.mock_calls, func, new_func_rels)
+    _harvest_traced_calls(root._tracer_calls, func, new_func_rels)
 
     _validate_func_relations(new_func_rels)
 
@@ -95,54 +106,47 @@ def harvest_func(func, root=None, func_rels=None):
     return new_func_rels
 
 
-def _harvest_mock_calls(mock_calls, func, func_rels):
+def _harvest_traced_calls(traced_calls, func, func_rels):
     ## A map from 'pure.dot.paths --> call.__paths__
-    #  filled-in and consumed )mostly) by _harvest_mock_call().
+    #  filled-in and consumed )mostly) by _harvest_traced_call().
     deps_set = OrderedDict()
 
+    ## NOTE: Indexing with tracers appends more calls while iterating (see _harvest_indexing()).
     #last_path = None Not needed!
-    for call in mock_calls:
-        last_path = _harvest_mock_call(call, func, deps_set, func_rels)
+    for call in traced_calls:
+        last_path = _harvest_traced_call(call, func, deps_set, func_rels)
 
     ## Any remaining deps came from a last not-assignment (a statement) in func.
     #  Add them as non-dependent items.
     #
     if deps_set:
         deps_set[last_path] = None  ## We don't care about call dep-subprefixes(the value) anymore.
-#         if ret is None:
-#             item = last_path
-#         else:
-#             item = _parse_mock_arg(ret)
         for dep in _filter_common_prefixes(deps_set.keys()):
             _append_func_relation(dep, [], func, func_rels)
 
-def _parse_mock_arg(mock):
-    mpath = _parse_mock_str(mock)[0]
-    return (_strip_magic_tail(mpath), mpath)
+def _parse_traced_arg(tracer):
+    tpath = tracer._tracer_path
+    return (_strip_magic_tail(tpath), tpath)
 
-def _harvest_mock_call(mock_call, func, deps_set, func_rels):
+def _harvest_traced_call(traced_call, func, deps_set, func_rels):
     '''Adds a 2-tuple (indep, [deps]) into indeps with all deps collected so far when it visits a __setartr__. '''
 
-    def parse_mock_path(mock):
-        mpath = _parse_mock_str(mock)[0]
-        try:
-            ## Hack to consolidate 'dot.__getitem__.com' --> fot.Xt.com attributes.
-            #  Just search if previous call is subprefix of this one.
-            prev_path = next(reversed(deps_set))
-            prev_call = deps_set[prev_path]
-            if (prev_call+'()' == call[:len(prev_call)+2]):
-                mpath = prev_path + mpath[len(prev_call)+_root_len+2:] # 4 = R.()
-        except (KeyError, StopIteration):
-            pass
-        return _strip_magic_tail(mpath)
-
-    (call, args, kw) = mock_call
+    (tpath, args, kw) = traced_call
+    call = tpath[_root_len:]
 
-    deps_set.update((_parse_mock_arg(arg) for arg in args        if isinstance(arg, MagicMock)))
-    deps_set.update((_parse_mock_arg(arg) for arg in kw.values() if isinstance(arg, MagicMock)))
+    deps_set.update((_parse_traced_arg(arg) for arg in args        if isinstance(arg, _Tracer)))
+    deps_set.update((_parse_traced_arg(arg) for arg in kw.values() if isinstance(arg, _Tracer)))
 
-
-    path = parse_mock_path(mock_call.parent)
+    try:
+        ## Hack to consolidate 'dot.__getitem__.com' --> fot.Xt.com attributes.
+        #  Just search if previous call is subprefix of this one.
+        prev_path = next(reversed(deps_set))
+        prev_call = deps_set[prev_path]
+        if (prev_call+'()' == call[:len(prev_call)+2]):
+            tpath = prev_path + tpath[len(prev_call)+_root_len+2:] # 4 = R.()
+    except (KeyError, StopIteration):
+        pass
+    path = _strip_magic_tail(tpath)
 
     tail = call.split('.')[-1]
     if (tail == '__getitem__'):
@@ -187,9 +191,86 @@ def _strip_magic_tail(path):
     return path[:-2] if path.endswith('()') else path
 
 
-_mock_id_regex = re.compile(r"name='([^']+)' id='(\d+)'")
-def _parse_mock_str(m):
-    return _mock_id_regex.search(m.__repr__()).groups()
+class _Tracer:
+    '''
+    A lightweight stand-in for the args of harvested functions, recording their calls by dotted-path.
+
+    Accessing an attribute derives a new tracer with the name appended to its `path`, while calling it,
+    or any of its magic-methods (arithmetics, indexing, etc), appends a 3-tuple ``(path, args, kwargs)``
+    into the `calls` list shared by all tracers derived from the same root, where `path` is that
+    of the callable (ie ``R.dfin.hh.__getitem__``).  Results are tracers again, named like the return-values
+    of `MagicMock` (ie ``R.dfin.hh.__getitem__()``), or fixed values, ie for ``__bool__``, ``__len__``, etc.
+    '''
+    __slots__ = ('_tracer_path', '_tracer_calls')
+
+    def __init__(self, path, calls=None):
+        object.__setattr__(self, '_tracer_path', path)
+        object.__setattr__(self, '_tracer_calls', [] if calls is None else calls)
+
+    def __getattr__(self, name):
+        if name.startswith(('__', '_tracer_')):
+            raise AttributeError(name)
+        return _Tracer('%s.%s' % (self._tracer_path, name), self._tracer_calls)
+
+    def __setattr__(self, name, value):
+        pass    ## Assignments to attributes are not dependencies.
+
+    def __delattr__(self, name):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        path = self._tracer_path
+        self._tracer_calls.append((path, args, kwargs))
+        return _Tracer(path + '()', self._tracer_calls)
+
+    def __repr__(self):
+        return '_Tracer(%s)' % self._tracer_path
+
+
+## Magic-methods like those of `MagicMock`, and their non-tracer results.
+_traced_magics = (
+    'lt le gt ge eq ne getitem setitem delitem len contains iter hash str sizeof enter exit '
+    'divmod neg pos abs invert complex int float index trunc floor ceil bool next').split()
+_traced_numerics = 'add sub mul floordiv mod lshift rshift and xor or pow truediv'.split()
+_traced_results = {
+    '__lt__': lambda self, other: NotImplemented,
+    '__gt__': lambda self, other: NotImplemented,
+    '__le__': lambda self, other: NotImplemented,
+    '__ge__': lambda self, other: NotImplemented,
+    '__eq__': lambda self, other: self is other,
+    '__ne__': lambda self, other: self is not other,
+    '__int__': lambda self: 1,
+    '__contains__': lambda self, item: False,
+    '__len__': lambda self: 0,
+    '__iter__': lambda self: iter([]),
+    '__exit__': lambda self, *args: False,
+    '__complex__': lambda self: 1j,
+    '__float__': lambda self: 1.0,
+    '__bool__': lambda self: True,
+    '__index__': lambda self: 1,
+    '__hash__': object.__hash__,
+    '__str__': object.__str__,
+    '__sizeof__': object.__sizeof__,
+}
+
+def _make_traced_magic(name):
+    result = _traced_results.get(name)
+    def traced_magic(self, *args, **kwargs):
+        path = '%s.%s' % (self._tracer_path, name)
+        self._tracer_calls.append((path, args, kwargs))
+        if result is None:
+            return _Tracer(path + '()', self._tracer_calls)
+        return result(self, *args, **kwargs)
+    traced_magic.__name__ = name
+
+    return traced_magic
+
+for _name in it.chain(_traced_magics, _traced_numerics,
+        ('i' + n for n in _traced_numerics), ('r' + n for n in _traced_numerics)):
+    _name = '__%s__' % _name
+    setattr(_Tracer, _name, _make_traced_magic(_name))
+del _name
+
 
 def _validate_func_relations(func_rels):
     try:
@@ -211,9 +292,191 @@ def _validate_func_relations(func_rels):
         raise DependenciesError("Bad explicit func_relations(%s) (item not a string, or deps not a tuple, etc) due to: %s"%(func_rels, ex), func_rels) from ex
 
 
+class DepsGraph:
+    '''
+    A compact directed-graph of ``item --> dep`` edges, with its nodes indexed by integers.
+
+    The adjacencies are kept as lists of dicts ``{node_index --> edge_data}`` (successors) and sets
+    of node-indices (predecessors), indexed by the node-indices.
+    The topological-order is computed once and cached, until the graph gets modified.
+    Use :meth:`to_networkx()` to export it (ie for plotting).
+    '''
+
+    def __init__(self, edges=()):
+        ''':param edges: 2-tuples ``(item, dep)`` or 3-tuples ``(item, dep, data_dict)``'''
+        self._nodes = []    ## index --> node
+        self._index = {}    ## node --> index
+        self._succs = []    ## index --> {dep_index --> data}
+        self._preds = []    ## index --> {item_index, ...}
+        self._order = None  ## Cached deps-first indices, or False if cyclic.
+        self.add_edges_from(edges)
+
+    @classmethod
+    def from_networkx(cls, graph):
+        return cls(graph.edges(data=True))
+
+    def to_networkx(self):
+        ''':return: a :class:`networkx.DiGraph` with the same nodes, edges and edge-data'''
+        import networkx as nx
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self._nodes)
+        graph.add_edges_from(self.edges(data=True))
+
+        return graph
+
+    def _add_node(self, node):
+        i = self._index.get(node)
+        if i is None:
+            i = self._index[node] = len(self._nodes)
+            self._nodes.append(node)
+            self._succs.append({})
+            self._preds.append(set())
+        return i
+
+    def add_edges_from(self, edges):
+        for edge in edges:
+            (item, dep) = edge[:2]
+            (i, j) = (self._add_node(item), self._add_node(dep))
+            data = self._succs[i].setdefault(j, {})
+            if len(edge) > 2:
+                data.update(edge[2])
+            self._preds[j].add(i)
+        self._order = None
+
+    def remove_edges_from(self, edges):
+        index = self._index
+        for edge in edges:
+            (i, j) = (index.get(edge[0]), index.get(edge[1]))
+            if i is not None and self._succs[i].pop(j, None) is not None:
+                self._preds[j].discard(i)
+        self._order = None
+
+    def copy(self):
+        graph = DepsGraph()
+        graph._nodes = list(self._nodes)
+        graph._index = dict(self._index)
+        graph._succs = [{j: dict(data) for (j, data) in succs.items()} for succs in self._succs]
+        graph._preds = [set(preds) for preds in self._preds]
+        graph._order = self._order
+
+        return graph
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __contains__(self, node):
+        return node in self._index
+
+    def existing_nodes(self, nodes):
+        ''':return: a list of those `nodes` contained in the graph'''
+        return [node for node in nodes if node in self._index]
+
+    def size(self):
+        ''':return: the number of edges'''
+        return sum(len(succs) for succs in self._succs)
+
+    def out_degree(self, node):
+        return len(self._succs[self._index[node]])
+
+    def in_degree(self, node):
+        return len(self._preds[self._index[node]])
+
+    def edges(self, nodes=None, data=False):
+        '''
+        :param nodes: if given, only the out-edges of those (existing) nodes, in that order
+        :return: a list of 2-tuples ``(item, dep)``, or 3-tuples ``(item, dep, data_dict)``
+        '''
+        all_nodes = self._nodes
+        indices = range(len(all_nodes)) if nodes is None else [self._index[n] for n in nodes if n in self._index]
+        if data:
+            return [(all_nodes[i], all_nodes[j], d) for i in indices for (j, d) in self._succs[i].items()]
+        return [(all_nodes[i], all_nodes[j]) for i in indices for j in self._succs[i]]
+
+    def reachable(self, nodes, blocked=()):
+        '''
+        :param nodes: the (existing) nodes to start from, included in the results
+        :param blocked: nodes not to visit nor traverse
+        :return: the set of all nodes reachable from `nodes` following their edges (their deps, transitively)
+        '''
+        (index, succs) = (self._index, self._succs)
+        seen = bytearray(len(self._nodes))
+        for node in blocked:
+            i = index.get(node)
+            if i is not None:
+                seen[i] = 1
+        stack = [index[node] for node in nodes]
+        reached = []
+        while stack:
+            i = stack.pop()
+            if not seen[i]:
+                seen[i] = 1
+                reached.append(i)
+                stack.extend(j for j in succs[i] if not seen[j])
+
+        return {self._nodes[i] for i in reached}
+
+    def _sort_topologically(self, indices):
+        ''':return: the `indices` ordered deps-first, and any of them left unordered due to cycles'''
+        members = bytearray(len(self._nodes))
+        for i in indices:
+            members[i] = 1
+        n_deps = {i: sum(members[j] for j in self._succs[i]) for i in indices}
+        ready = [i for i in indices if not n_deps[i]]
+        ordered = []
+        for i in ready:     ## Extended while iterated.
+            ordered.append(i)
+            for k in self._preds[i]:
+                if members[k]:
+                    n_deps[k] -= 1
+                    if not n_deps[k]:
+                        ready.append(k)
+        cyclic = [i for i in indices if n_deps[i]]
+
+        return (ordered, cyclic)
+
+    def find_cyclic_nodes(self):
+        ''':return: the nodes on, or depending on, cycles'''
+        (ordered, cyclic) = self._sort_topologically(range(len(self._nodes)))
+        self._order = False if cyclic else ordered
+
+        return [self._nodes[i] for i in cyclic]
+
+    def topological_order(self, nodes=None):
+        '''
+        :param nodes: if given, order only those (existing) nodes
+        :return: a list of the nodes ordered with deps before the items depending on them
+        :raise DependenciesError: if the nodes to order contain cycles
+        '''
+        if self._order is None:
+            self.find_cyclic_nodes()
+        all_nodes = self._nodes
+        if nodes is None:
+            indices = range(len(all_nodes))
+        else:
+            indices = sorted(self._index[n] for n in set(nodes))
+        if self._order is not False:
+            if nodes is None:
+                return [all_nodes[i] for i in self._order]
+            members = bytearray(len(all_nodes))
+            for i in indices:
+                members[i] = 1
+            return [all_nodes[i] for i in self._order if members[i]]
+
+        (ordered, cyclic) = self._sort_topologically(indices)
+        if cyclic:
+            cyclic = [all_nodes[i] for i in cyclic]
+            raise DependenciesError('Cyclic dependencies among %s!' % cyclic, cyclic)
+
+        return [all_nodes[i] for i in ordered]
+
+
 def _build_func_dependencies_graph(func_rels, graph = None):
     if graph is None:
-        graph = nx.DiGraph()
+        graph = DepsGraph()
 
     func_rels = _consolidate_relations(func_rels)
 
@@ -222,7 +485,7 @@ def _build_func_dependencies_graph(func_rels, graph = None):
             deps = _filter_common_prefixes(deps)
             graph.add_edges_from([(path, dep, {'funcs': funcs}) for dep in deps])
 
-    cycles = list(nx.simple_cycles(graph))
+    cycles = graph.find_cyclic_nodes()
     if cycles:
         log.warning('Cyclic dependencies! %s', cycles)
 
@@ -275,7 +538,7 @@ def _research_calculation_routes(graph, sources, dests):
 
         sources: a list of nodes (existent or not) to search for all paths originating from them
         dests:   a list of nodes to search for all paths leading to them them
-        return: a 2-tuple with the graph and its nodes topologically-ordered
+        return: a 4-tuple with the input, output & calculation nodes, and the `deps_graph`
     '''
 
     ## Remove unrelated dests already present in sources.
@@ -283,56 +546,42 @@ def _research_calculation_routes(graph, sources, dests):
     calc_out_nodes = set(dests)
     calc_out_nodes -= set(sources)
 
-    calc_inp_nodes = set(graph.nbunch_iter(sources))
+    calc_inp_nodes = set(graph.existing_nodes(sources))
 
     ## Deps graph: all INPUT's deps broken
     #    To be used for planing functions_to_run.
     #
     deps_graph = graph.copy()
-    deps_graph.remove_edges_from(deps_graph.out_edges(calc_inp_nodes))
+    deps_graph.remove_edges_from(graph.edges(calc_inp_nodes))
+
+    unknown = [node for node in calc_out_nodes if node not in graph]
+    if unknown:
+        raise DependenciesError('Unknown OUT-args(%s)!' % unknown, (graph, unknown))
 
-    ## Data_to_be_calced: all INPUTs erased
-    #    To be used for topological-sorting.
+    ## Data_to_be_calced: all deps of OUTPUTs, up to INPUTs.
     #
-    data_graph = graph.copy()
-    data_graph.remove_nodes_from(calc_inp_nodes)
-    
-    ## FIXME: IS it NEEDED?
-    isolates = nx.isolates(data_graph)
-    log.debug('Isolates: %s', isolates)
-    data_graph.remove_nodes_from(isolates)
-    try:
-        calc_nodes = set(list(calc_out_nodes) + _all_predecessors(data_graph, calc_out_nodes))
-    except (KeyError, NetworkXError) as ex:
-        unknown = [node for node in calc_out_nodes if node not in graph]
-        raise DependenciesError('Unknown OUT-args(%s)!' % unknown, (graph, unknown)) from ex
-    else:
-        return (calc_inp_nodes, calc_out_nodes, calc_nodes, deps_graph)
+    calc_nodes = graph.reachable(calc_out_nodes, blocked=calc_inp_nodes)
 
-def _all_predecessors(graph, nodes):
-    return [k for node in nodes for k in nx.bfs_predecessors(graph, node).keys()]
+    return (calc_inp_nodes, calc_out_nodes, calc_nodes, deps_graph)
 
 
 def _find_calculation_order(graph, calc_nodes):
-    subgraph = graph.subgraph(calc_nodes)
-    ordered_calc_nodes = list(reversed(nx.topological_sort(subgraph)))
-
-    return ordered_calc_nodes
+    return graph.topological_order(calc_nodes)
 
 
 def _find_missing_input(calc_inp_nodes, graph):
     '''Search for *tentatively* missing data.'''
     calc_inp_nodes = set(calc_inp_nodes) # for efficiency below
     missing_input_nodes = []
-    for node in nx.dfs_predecessors(graph):
-        if ( node not in calc_inp_nodes and graph.out_degree(node) == 0):
+    for node in graph:
+        if ( node not in calc_inp_nodes and graph.out_degree(node) == 0 and graph.in_degree(node) > 0):
             missing_input_nodes.append(node)
     return missing_input_nodes
 
 
 def _extract_funcs_from_edges(graph, ordered_nodes):
     # f=list(fs[0]['funcs'])[0]
-    funcs = [f for (_, _, d) in graph.edges_iter(ordered_nodes, True) if d
+    funcs = [f for (_, _, d) in graph.edges(ordered_nodes, data=True) if d
             for f in d['funcs']] # a list of sets
 
 
@@ -408,22 +657,20 @@ class _DepFunc:
 
         return self.child_funcs is not None
 
-    def mockup_func_args(self, root=None):
+    def trace_func_args(self, root=None):
         assert not self.is_child_func(), self
 
-        if not root:
-            root = _make_mock(name=_root_name)
+        if root is None:
+            root = _make_root_tracer()
 
         sig = inspect.signature(self.func)
-        mocks = []
+        tracers = []
         for (name, param) in sig.parameters.items():
             if param.kind == inspect.Parameter.VAR_KEYWORD:
                 log.warning('Any dependencies from **%s will be ignored for %s!', name, self)
                 break
-            mock = _make_mock()
-            mocks.append(mock)
-            root.attach_mock(mock, name)
-        return (root, mocks)
+            tracers.append(_Tracer('%s.%s' % (root._tracer_path, name), root._tracer_calls))
+        return (root, tracers)
 
 
     def __call__(self, *args, **kwargs):
@@ -461,6 +708,402 @@ class _DepFunc:
             return '_DepFunc<BAD_STR>(%s)'%self.func
 
 
+##############################
+## AST harvesting
+##############################
+##
+
+class _AstArg:
+    '''A placeholder passed to funcs-factories, to tell which closure-vars of their children are factory-args.'''
+    __slots__ = ('name', )
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return '_AstArg(%s)' % self.name
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_source(fname, source):
+    return ast.parse(source, fname)
+
+
+def _find_func_node(func):
+    '''
+    :return: the `FunctionDef` or `Lambda` AST-node of a function, located from its code-object
+    :raise DependenciesError: if its source is not available, or many lambdas on the same position
+    '''
+    code = func.__code__
+    fname = code.co_filename
+    linecache.checkcache(fname)
+    lines = linecache.getlines(fname)
+    if not lines:
+        raise DependenciesError('Cannot harvest %s without its source-code!' % func, func)
+    tree = _parse_source(fname, ''.join(lines))
+
+    is_lambda = (code.co_name == '<lambda>')
+    nodes = []
+    for node in ast.walk(tree):
+        if is_lambda:
+            if isinstance(node, ast.Lambda) and node.lineno == code.co_firstlineno:
+                nodes.append(node)
+        elif isinstance(node, _ast_funcdef_types) and node.name == code.co_name:
+            first_line = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            if code.co_firstlineno in (first_line, node.lineno):
+                nodes.append(node)
+
+    if len(nodes) > 1 and hasattr(code, 'co_positions'):
+        ## Many lambdas on a line, pick the one enclosing the 1st instruction of its body.
+        pos = next((p for p in code.co_positions() if p[0] is not None and p[3]), None)
+        if pos:
+            nodes = [n for n in nodes if n.body.lineno == pos[0] 
+                    and n.body.col_offset <= pos[2] and pos[3] <= n.body.end_col_offset]
+            nodes = nodes[-1:]    ## The innermost, if nested.
+    elif len(nodes) > 1 and is_lambda:
+        ## Python < 3.11 has no column-positions, pick the lambdas using the names & strings of the code.
+        nodes = [n for n in nodes if _ast_matches_code(n, code)]
+    if len(nodes) != 1:
+        raise DependenciesError('Cannot locate the source of %s (found %i candidates)!' % (func, len(nodes)), func)
+
+    return nodes[0]
+
+
+if sys.version_info >= (3, 8):
+    def _ast_constant(node):
+        ''':return: a 1-tuple with the value of a constant `node`, or None'''
+        return (node.value, ) if isinstance(node, ast.Constant) else None
+else:
+    ## Python < 3.8 parses constants into distinct node-types.
+    _ast_constant_fields = [(ast.Str, 's'), (ast.Bytes, 's'), (ast.Num, 'n'), (ast.Ellipsis, None)]
+    if hasattr(ast, 'NameConstant'):
+        _ast_constant_fields.append((ast.NameConstant, 'value'))
+
+    def _ast_constant(node):
+        ''':return: a 1-tuple with the value of a constant `node`, or None'''
+        for (node_type, field) in _ast_constant_fields:
+            if isinstance(node, node_type):
+                return (getattr(node, field) if field else Ellipsis, )
+
+
+if sys.version_info >= (3, 9):
+    def _ast_subscript_index(node):
+        return node.slice
+else:
+    def _ast_subscript_index(node):
+        '''Unwraps the `Index` & `ExtSlice` nodes of subscripts in Python < 3.9.'''
+        index = node.slice
+        if isinstance(index, ast.Index):
+            return index.value
+        if isinstance(index, ast.ExtSlice):
+            return ast.Tuple([d.value if isinstance(d, ast.Index) else d for d in index.dims], ast.Load())
+        return index
+
+def _code_names_and_strings(code):
+    ''':return: the sets of names & string-constants of a `code` and of its nested code-objects'''
+    (names, strings) = (set(code.co_names), set())
+    for const in code.co_consts:
+        if isinstance(const, str):
+            strings.add(const)
+        elif inspect.iscode(const):
+            (nested_names, nested_strings) = _code_names_and_strings(const)
+            names.update(nested_names)
+            strings.update(nested_strings)
+
+    return (names, strings)
+
+def _ast_matches_code(node, code):
+    ''':return: whether the attribute-names & string-constants of a lambda `node` match those of its `code`'''
+    (names, strings) = _code_names_and_strings(code)
+    body_nodes = list(ast.walk(node.body))
+    attrs = {n.attr for n in body_nodes if isinstance(n, ast.Attribute)}
+    node_strings = {c[0] for c in map(_ast_constant, body_nodes) if c and isinstance(c[0], str)}
+
+    return attrs <= names and node_strings == strings
+
+_ast_funcdef_types = tuple(getattr(ast, name) for name in ('FunctionDef', 'AsyncFunctionDef') if hasattr(ast, name))
+
+
+def _index_keys(index):
+    '''
+    :return: the string-keys of a subscript (like :func:`_harvest_indexing()`), 
+            or None if not a constant index
+    '''
+    constant = _ast_constant(index)
+    if constant is not None:
+        return list(constant) if isinstance(constant[0], str) else []
+    if isinstance(index, ast.Slice):
+        keys = []
+        for part in (index.lower, index.upper, index.step):
+            if part is not None:
+                part_keys = _index_keys(part)
+                if part_keys is None:
+                    return None
+                keys.extend(part_keys)
+        return keys
+    if isinstance(index, (ast.Tuple, ast.List)):
+        keys = [k for elt in index.elts for k in (_index_keys(elt) or ())]
+        return keys if keys or not index.elts else None
+
+    return None
+
+
+def _extend_paths(paths, keys):
+    '''Appends each key to all `paths` (tuples), unless ended by a dynamic index (a trailing None).'''
+    return [p if p[-1] is None else p + (k, ) for p in paths for k in keys]
+
+
+def _join_path(path):
+    return '.'.join((_root_name, ) + (path[:-1] if path[-1] is None else path))
+
+
+class _AstFuncHarvester:
+    '''
+    Walks the statements of a function collecting the paths read & written on its args, in source-order.
+
+    Like the mock-harvester, all paths read are accumulated as the deps of the next item written,
+    and any paths read after the last write become items without deps.
+    But all branches of conditionals are visited, and nothing is executed.
+    '''
+
+    def __init__(self, roots, helpers, seen=None):
+        '''
+        :param roots: a map of ``{var_name --> arg_name}`` for the func's vars referring to args
+        :param helpers: a map of ``{var_name --> function}`` for closured functions, to inline their reads
+        '''
+        self.roots = roots
+        self.helpers = helpers
+        self.aliases = {}
+        self.pending = OrderedDict()
+        self.rels = []
+        self.seen = set() if seen is None else seen
+
+    def paths_of(self, node):
+        '''
+        :return: the list of paths (tuples) denoted by a `node`, or None if not a path-expression
+        '''
+        if isinstance(node, ast.Name):
+            if node.id in self.roots:
+                return [(self.roots[node.id], )]
+            return self.aliases.get(node.id)
+        if isinstance(node, ast.Attribute):
+            base = self.paths_of(node.value)
+            return base and _extend_paths(base, [node.attr])
+        if isinstance(node, ast.Subscript):
+            base = self.paths_of(node.value)
+            if not base:
+                return None
+            keys = _index_keys(_ast_subscript_index(node))
+            if keys is None:    ## A dynamic index ends the path.
+                return [p if p[-1] is None else p + (None, ) for p in base]
+            return _extend_paths(base, keys) if keys else base
+        if isinstance(node, ast.Call):
+            return self.paths_of(node.func) if isinstance(node.func, ast.Attribute) else None
+
+        return None
+
+    def collect_reads(self, node, reads):
+        paths = self.paths_of(node)
+        if paths:
+            reads.update((p, None) for p in paths)
+            ## Visit only the dynamic-indices & call-args along the path.
+            while isinstance(node, (ast.Attribute, ast.Subscript, ast.Call)):
+                if isinstance(node, ast.Subscript):
+                    self.collect_reads(_ast_subscript_index(node), reads)
+                elif isinstance(node, ast.Call):
+                    for arg in node.args + [kw.value for kw in node.keywords]:
+                        self.collect_reads(arg, reads)
+                    node = node.func
+                    continue
+                node = node.value
+            return
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            helper = self.helpers.get(node.func.id)
+            if helper is not None and helper not in self.seen:
+                reads.update(_harvest_ast_reads(helper, self.seen))
+        for child in ast.iter_child_nodes(node):
+            self.collect_reads(child, reads)
+
+    def add_writes(self, items, reads):
+        deps = OrderedDict(self.pending)
+        deps.update(reads)
+        self.pending.clear()
+        deps = list(OrderedDict.fromkeys(_join_path(p) for p in deps))
+        for item in items:
+            self.rels.append((_join_path(item), deps))
+
+    def visit_target(self, target, reads):
+        if isinstance(target, (ast.Tuple, ast.List)):
+            for elt in target.elts:
+                self.visit_target(elt, reads)
+        elif isinstance(target, ast.Name):
+            self.aliases[target.id] = list(reads) or None
+            self.pending.update(reads)
+        elif isinstance(target, ast.Subscript) and self.paths_of(target.value):
+            reads = OrderedDict(reads)
+            self.collect_reads(_ast_subscript_index(target), reads)
+            self.add_writes(self.paths_of(target), reads)
+        else:
+            self.pending.update(reads)
+
+    def visit_setitem_call(self, call):
+        '''Handles ``setitem(obj, 'key', value)`` and ``obj.__setitem__('key', value)``, returns True if matched.'''
+        func = call.func
+        fname = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+        if fname == 'setitem' and len(call.args) == 3:
+            (obj, key, value) = call.args
+        elif fname == '__setitem__' and len(call.args) == 2:
+            ((key, value), obj) = (call.args, func.value)
+        else:
+            return False
+        base = self.paths_of(obj)
+        keys = _index_keys(key)
+        if not base or not keys:
+            return False
+        reads = OrderedDict()
+        self.collect_reads(value, reads)
+        self.add_writes(_extend_paths(base, keys), reads)
+
+        return True
+
+    def visit_stmts(self, stmts):
+        for stmt in stmts:
+            self.visit_stmt(stmt)
+
+    def visit_stmt(self, stmt):
+        reads = OrderedDict()
+        if isinstance(stmt, ast.Assign):
+            self.collect_reads(stmt.value, reads)
+            for target in stmt.targets:
+                self.visit_target(target, reads)
+        elif isinstance(stmt, ast.AugAssign):
+            self.collect_reads(stmt.value, reads)
+            paths = self.paths_of(stmt.target)
+            if isinstance(stmt.target, ast.Subscript) and paths:
+                reads.update((p, None) for p in paths)
+            self.visit_target(stmt.target, reads)
+        elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call) and self.visit_setitem_call(stmt.value):
+            pass
+        elif isinstance(stmt, _ast_funcdef_types + (ast.ClassDef, ast.Import, ast.ImportFrom)):
+            pass
+        else:
+            ## Reads from the "header" of compound-statements (test, iter, items), then all their branches.
+            body_fields = ('body', 'orelse', 'finalbody', 'handlers')
+            for (field, value) in ast.iter_fields(stmt):
+                if field in body_fields:
+                    continue
+                for child in (value if isinstance(value, list) else [value]):
+                    if isinstance(child, ast.AST):
+                        self.collect_reads(child, reads)
+            self.pending.update(reads)
+            ## Every branch starts with the reads so far, and leaves its own unconsumed ones.
+            start = self.pending
+            leftovers = OrderedDict()
+            branches = [getattr(stmt, field, None) or [] for field in ('body', 'orelse', 'finalbody')]
+            branches += [handler.body for handler in getattr(stmt, 'handlers', None) or ()]
+            branches = [branch for branch in branches if branch]
+            for branch in branches:
+                self.pending = OrderedDict(start)
+                self.visit_stmts(branch)
+                leftovers.update(self.pending)
+            if branches:
+                self.pending = leftovers
+
+    def harvest(self, node):
+        if isinstance(node, ast.Lambda):
+            self.visit_stmt(ast.Expr(node.body))
+        else:
+            self.visit_stmts(node.body)
+
+        return self.rels
+
+
+def _closure_roots(func):
+    '''
+    :return: a 2-tuple of maps ``({var --> arg_name}, {var --> helper_function})`` from the closure of `func`
+    '''
+    (roots, helpers) = ({}, {})
+    for (var, cell) in zip(func.__code__.co_freevars, func.__closure__ or ()):
+        try:
+            value = cell.cell_contents
+        except ValueError:  ## Empty cell.
+            continue
+        if isinstance(value, _AstArg):
+            roots[var] = value.name
+        elif inspect.isfunction(value):
+            helpers[var] = value
+
+    return (roots, helpers)
+
+
+def _harvest_ast_reads(helper, seen):
+    '''Inlines the paths read by a closured helper-function (ie ``f0()`` in ``def f1(): a['x'] = f0()``).'''
+    seen.add(helper)
+    (roots, helpers) = _closure_roots(helper)
+    harvester = _AstFuncHarvester(roots, helpers, seen)
+    harvester.harvest(_find_func_node(helper))
+    reads = OrderedDict(harvester.pending)
+    for (_, deps) in harvester.rels:
+        reads.update((tuple(d.split('.')[1:]), None) for d in deps)
+
+    return reads
+
+
+def _harvest_ast(func, roots, helpers, dep_func, func_rels):
+    harvester = _AstFuncHarvester(roots, helpers)
+    rels = harvester.harvest(_find_func_node(func))
+    for (item, deps) in rels:
+        _append_func_relation(item, deps, dep_func, func_rels)
+    if harvester.pending:
+        for dep in _filter_common_prefixes(set(_join_path(p) for p in harvester.pending)):
+            _append_func_relation(dep, [], dep_func, func_rels)
+
+
+def harvest_funcs_factory_ast(funcs_factory, func_rels=None):
+    '''
+    Like :func:`harvest_funcs_factory()` but parses the source of the child-funcs instead of running them.
+
+    The factory is invoked only to collect its child-funcs, with placeholders as args
+    that tell which closure-vars of the children refer to which factory-args.
+    '''
+    new_func_rels = []
+
+    dep_factory = _wrap_funcs_factory(funcs_factory)
+    arg_names = [name for (name, param) in inspect.signature(funcs_factory).parameters.items()
+            if param.kind != inspect.Parameter.VAR_KEYWORD]
+    cfuncs = funcs_factory(*[_AstArg(name) for name in arg_names])
+    if not cfuncs:
+        raise DependenciesError('%s returned %s as child-functions!'%(funcs_factory, cfuncs), funcs_factory)
+
+    for (i, cfunc) in enumerate(cfuncs):
+        (roots, helpers) = _closure_roots(cfunc)
+        _harvest_ast(cfunc, roots, helpers, _DepFunc(func=dep_factory, _child_index=i), new_func_rels)
+
+    _validate_func_relations(new_func_rels)
+
+    if func_rels is not None:
+        func_rels.extend(new_func_rels)
+
+    return new_func_rels
+
+def harvest_func_ast(func, func_rels=None):
+    '''Like :func:`harvest_func()` but parses the source of `func` instead of running it.'''
+    new_func_rels = []
+
+    roots = {name: name for (name, param) in inspect.signature(func).parameters.items()
+            if param.kind != inspect.Parameter.VAR_KEYWORD}
+    (_, helpers) = _closure_roots(func)
+    _harvest_ast(func, roots, helpers, _wrap_standalone_func(func), new_func_rels)
+
+    _validate_func_relations(new_func_rels)
+
+    if func_rels is not None:
+        func_rels.extend(new_func_rels)
+
+    return new_func_rels
+
+
 ##############################
 ## User Utilities
 ##############################
@@ -515,12 +1158,103 @@ def name_all_func_args(func, *args, **kwargs):
     return bound_args.arguments
 
 
+class GroupBroadcast:
+    '''
+    A view of a table with per-group scalars broadcast to the rows of a long-format table, to run plans over many groups at once.
+
+    Reading a column (as an item or an attribute) returns a series aligned to the rows of the long-table,
+    each row taking the value of its group, so the funcs of a plan written for a single group (ie an `engine`)
+    compute with vectorized arithmetic all groups (ie a fleet) in one pass.
+    Writing a per-row series stores the 1st value of each group.
+
+    Example::
+
+        engines = pd.DataFrame({'p_max': [80, 100]}, index=['e1', 'e2'])
+        points  = pd.DataFrame({'engine_id': ['e1', 'e1', 'e2'], 'p_norm': [0.1, 0.5, 0.3]})
+        engine  = GroupBroadcast(engines, points['engine_id'])
+        points['p'] = points.p_norm * engine.p_max    ## [8, 40, 30]
+    '''
+
+    def __init__(self, groups, keys):
+        '''
+        :param groups: a DataFrame indexed by group-id, with the per-group scalars as columns
+        :param keys: a Series with the group-id of each row of the long-table, and indexed like it
+        :raise KeyError: if some keys are not in the index of `groups`
+        '''
+        positions = groups.index.get_indexer(keys)
+        if (positions < 0).any():
+            unknown = sorted(set(keys[positions < 0]))
+            raise KeyError('Unknown group-ids: %s' % unknown)
+        self._groups = groups
+        self._keys = keys
+        self._positions = positions
+        self._broadcasts = {}
+
+    def keys(self):
+        return self._groups.columns
+
+    def __contains__(self, col):
+        return col in self._groups
+
+    def __getitem__(self, col):
+        values = self._broadcasts.get(col)
+        if values is None:
+            values = pd.Series(self._groups[col].values.take(self._positions), index=self._keys.index, name=col)
+            self._broadcasts[col] = values
+
+        return values
+
+    def __setitem__(self, col, value):
+        if isinstance(value, pd.Series) and value.index.equals(self._keys.index):
+            value = value.groupby(self._keys.values).first().reindex(self._groups.index)
+        self._groups[col] = value
+        self._broadcasts.pop(col, None)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        return 'GroupBroadcast(%s x %i rows)' % (list(self._groups.columns), len(self._keys))
+
+
 
 ##############################
 ## Classes
 ##############################
 ##
 
+_harvesters = ('mock', 'ast')
+## The harvester of :class:`Dependencies` instances created without one (ie by :func:`execute_funcs_map()`).
+default_harvester = 'mock'
+
+
+class ExecutionPlan(pd.Series):
+    '''The `plan` produced by :meth:`Dependencies.build_plan()`, holding the `funcs` to run in order.'''
+
+    ## Plan-attributes not stored as series-items, preserved when pickling.
+    _plan_attrs = ('dests', 'deps', 'funcs', 'missing_inp_nodes')
+
+    def compile(self, *args, **kwargs):
+        '''See :func:`compile_plan()`.'''
+        return compile_plan(self, *args, **kwargs)
+
+    def __reduce__(self):
+        attrs = {name: getattr(self, name) for name in self._plan_attrs if hasattr(self, name)}
+        return (_unpickle_plan, (dict(self.items()), attrs))
+
+def _unpickle_plan(items, attrs):
+    plan = ExecutionPlan(items)
+    for (name, value) in attrs.items():
+        setattr(plan, name, value)
+
+    return plan
+
+
 class Dependencies:
     '''
     Discovers and stores the rough functions-relationships needed to produce ExecutionPlanner
@@ -592,17 +1326,40 @@ class Dependencies:
         return deps
 
 
-    def __init__(self):
+    def __init__(self, harvester=None):
+        '''
+        :param str harvester: how to harvest functions, one of:
+
+                mock
+                    run them against tracer-args recording their accesses (see :func:`harvest_func()`),
+                ast
+                    parse their source-code (see :func:`harvest_func_ast()`),
+                None
+                    use the :data:`default_harvester`
+        '''
+        if harvester is None:
+            harvester = default_harvester
+        if harvester not in _harvesters:
+            raise ValueError("Unknown harvester(%s)! Choose one of %s." % (harvester, _harvesters))
+        self.harvester = harvester
         self._relation_tuples = []
 
     def harvest_funcs_factory(self, funcs_factory):
-        root = _make_mock(name=_root_name)
-        harvest_funcs_factory(funcs_factory, root=root, func_rels=self._relation_tuples)
+        if self.harvester == 'ast':
+            harvest = lambda: harvest_funcs_factory_ast(funcs_factory, func_rels=self._relation_tuples)
+        else:
+            root = _make_root_tracer()
+            harvest = lambda: harvest_funcs_factory(funcs_factory, root=root, func_rels=self._relation_tuples)
+        _profiled('harvest', _func_name(funcs_factory), funcs_factory, harvest)
         log.debug('DEPS collected(%i): %s', len(self._relation_tuples), self._relation_tuples)
 
     def harvest_func(self, func):
-        root = _make_mock(name=_root_name)
-        harvest_func(func, root=root, func_rels=self._relation_tuples)
+        if self.harvester == 'ast':
+            harvest = lambda: harvest_func_ast(func, func_rels=self._relation_tuples)
+        else:
+            root = _make_root_tracer()
+            harvest = lambda: harvest_func(func, root=root, func_rels=self._relation_tuples)
+        _profiled('harvest', _func_name(func), func, harvest)
         log.debug('DEPS collected(%i): %s', len(self._relation_tuples), self._relation_tuples)
 
     def add_func_rel(self, item, deps=None, func=None):
@@ -646,7 +1403,7 @@ class Dependencies:
         return graph
 
     def _make_empty_plan(self):
-        return pd.Series(dict(calc_inp_nodes=[], calc_out_nodes=[], calc_nodes=[],
+        return ExecutionPlan(dict(calc_inp_nodes=[], calc_out_nodes=[], calc_nodes=[],
             missing_data=[] if DEBUG else None, deps_graph=[]))
 
     def build_plan(self, sources, dests):
@@ -660,9 +1417,13 @@ class Dependencies:
         :param sources: a list of ''dotted.varname''s (existent or not) that are assumed to exist
                 when the execution wil start
         :return: the new `plan` that can be fed to :func:`execute_plan()`
-        :rtype: pd.Series
+        :rtype: ExecutionPlan
         '''
 
+        return _profiled('build_plan', ', '.join(dests), self._build_plan,
+                lambda: self._build_plan(sources, dests))
+
+    def _build_plan(self, sources, dests):
         log.debug('EXISTING data(%i): %s', len(sources), sources)
         log.debug('REQUESTED data(%i): %s', len(dests), dests)
 
@@ -670,7 +1431,8 @@ class Dependencies:
         plan.dests  = dests
 
         graph       = self._build_deps_graph()
-        log.debug('GRAPH constructed(%i): %s', graph.size(), graph.edges(data=True))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('GRAPH constructed(%i): %s', graph.size(), graph.edges(data=True))
 
         (calc_inp_nodes, calc_out_nodes, unordered_calc_nodes, deps_graph) = \
                                 _research_calculation_routes(graph, sources, dests)
@@ -733,15 +1495,625 @@ def calculation(deps = None):
     return decorator
 
 
-def execute_plan(plan, *args, **kwargs):
-    results = []
-    for func in plan.funcs:
+def _overlapping_paths(paths1, paths2):
+    '''True if any path equals or is a dotted-prefix of some path of the other set.'''
+    for p1 in paths1:
+        for p2 in paths2:
+            if p1 == p2 or p2.startswith(p1 + '.') or p1.startswith(p2 + '.'):
+                return True
+    return False
+
+
+def _collect_steps_paths(plan, funcs):
+    ''':return: a 2-tuple ``(ins, outs)``, lists indexed like `funcs` with the sets of paths each func reads & writes'''
+    index = {func: i for (i, func) in enumerate(funcs)}
+    ins = [set() for _ in funcs]
+    outs = [set() for _ in funcs]
+    for (item, dep, data) in plan.deps:
+        for func in (data or {}).get('funcs', ()):
+            i = index.get(func)
+            if i is not None:
+                outs[i].add(item)
+                ins[i].add(dep)
+
+    return (ins, outs)
+
+
+def _make_steps_schedule(plan, funcs):
+    '''
+    :return: a 3-tuple ``(preds, reads, writes)``, lists indexed like `funcs`, where `preds` are the sets of
+            earlier funcs that must precede each func (due to any read/write conflict on its items),
+            and `reads` & `writes` are the sets of paths each func accesses
+    '''
+    (ins, outs) = _collect_steps_paths(plan, funcs)
+
+    preds = [set() for _ in funcs]
+    for j in range(len(funcs)):
+        for i in range(j):
+            if (_overlapping_paths(outs[i], ins[j]) or _overlapping_paths(outs[i], outs[j])
+                    or _overlapping_paths(ins[i], outs[j])):
+                preds[j].add(i)
+
+    return (preds, ins, outs)
+
+
+def _path_roots(paths):
+    return {path.split('.', 1)[0] for path in paths}
+
+
+def _find_dirty_steps(ins, outs, changed):
+    ''':return: the indices of the steps reading any `changed` path, directly or through the outputs of earlier dirty steps'''
+    dirty_paths = set(changed)
+    dirty = []
+    for (i, (step_ins, step_outs)) in enumerate(zip(ins, outs)):
+        if _overlapping_paths(step_ins, dirty_paths):
+            dirty.append(i)
+            dirty_paths.update(step_outs)
+
+    return dirty
+
+
+_missing = object()
+
+def _resolve_path(named_args, path):
+    ''':return: the value of a ''dotted.var'' indexing into the `named_args`, or `_missing`'''
+    (name, *keys) = path.split('.')
+    try:
+        value = named_args[name]
+        for key in keys:
+            value = value[key]
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return _missing
+
+    return value
+
+
+def _snapshot_value(value):
+    try:
+        return copy.deepcopy(value)
+    except Exception:
+        return _missing     ## Always considered changed.
+
+
+def _same_values(value1, value2):
+    if value1 is _missing or value2 is _missing:
+        return value1 is value2 is _missing
+    try:
+        if hasattr(value1, 'equals'):   ## pandas
+            return type(value1) is type(value2) and bool(value1.equals(value2))
+        return bool(value1 == value2)
+    except Exception:   ## ie ambiguous truth of arrays.
+        return False
+
+
+##############################
+## Profiling
+##############################
+##
+
+## The CPU-clock of the running thread, to measure steps running concurrently.
+_cpu_clock = getattr(time, 'thread_time', time.process_time)
+
+## Per-func peaks of allocated-bytes need :func:`tracemalloc.reset_peak()` (Python >= 3.9).
+_can_trace_memory = hasattr(tracemalloc, 'reset_peak')
+
+
+class PlanProfile:
+    '''
+    Collects the wall-time, CPU-time and allocated-bytes of each func executed, and of harvesting and planning.
+
+    Activate it with :func:`profiling()`; records are keyed by the ''dotted.var'' items each func produces
+    (or the harvested func, or the `dests` planned).
+    '''
+
+    columns = ['stage', 'func', 'calls', 'wall', 'cpu', 'mem']
+
+    def __init__(self, trace_memory=True):
+        '''
+        :param bool trace_memory: whether to measure the peak of bytes allocated by each func (with :mod:`tracemalloc`),
+                except when run concurrently or on Python < 3.9, when `mem` is None
+        '''
+        self.trace_memory = trace_memory
+        self.records = []
+        self._lock = threading.Lock()
+
+    def measure(self, stage, item, func_name, call, trace_memory=True):
+        ''':return: the result of invoking `call`, after having recorded its measurements'''
+        trace_memory = trace_memory and self.trace_memory and _can_trace_memory and tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.reset_peak()
+            mem0 = tracemalloc.get_traced_memory()[0]
+        (wall0, cpu0) = (time.perf_counter(), _cpu_clock())
+        try:
+            return call()
+        finally:
+            (wall, cpu) = (time.perf_counter() - wall0, _cpu_clock() - cpu0)
+            mem = (tracemalloc.get_traced_memory()[1] - mem0) if trace_memory else None
+            with self._lock:
+                self.records.append((item, stage, func_name, 1, wall, cpu, mem))
+
+    def to_frame(self):
+        '''
+        :return: a DataFrame indexed by `item`, with the measurements of each item & stage summed
+                (the maximum for `mem`), in order of appearance
+        '''
+        if not self.records:    ## ie all plans cached; old pandas cannot group empty frames.
+            return pd.DataFrame(columns=self.columns, index=pd.Index([], name='item'))
+        df = pd.DataFrame(self.records, columns=['item'] + self.columns)
+        df = df.groupby(['item', 'stage'], sort=False).agg({'func': lambda names: ', '.join(OrderedDict.fromkeys(names)),
+                'calls': 'sum', 'wall': 'sum', 'cpu': 'sum', 'mem': 'max'})
+
+        return df.reset_index('stage')[self.columns]
+
+    def to_json(self):
+        ''':return: the :meth:`to_frame()` as a json-object of `stage` --> `item` --> measurements'''
+        df = self.to_frame()
+        stages = ['"%s": %s' % (stage, df[df.stage == stage].drop('stage', axis=1).to_json(orient='index'))
+                for stage in OrderedDict.fromkeys(df.stage)]
+
+        return '{%s}' % ', '.join(stages)
+
+
+## The profile activated by :func:`profiling()`, if any.
+_active_profile = None
+
+@contextlib.contextmanager
+def profiling(profile=None, trace_memory=True):
+    '''
+    A context-manager recording into a :class:`PlanProfile` the execution of all plans, harvesting and planning.
+
+    Example::
+
+        with profiling() as profile:
+            execute_funcs_map(funcs_map, dests, *args)
+        print(profile.to_frame())
+
+    :param PlanProfile profile: if None, a new one is created with the `trace_memory` flag
+    :param bool trace_memory: when true, starts :mod:`tracemalloc` (if not already tracing), which slows execution
+    '''
+    global _active_profile
+
+    if profile is None:
+        profile = PlanProfile(trace_memory)
+    started_tracing = profile.trace_memory and _can_trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    (prev_profile, _active_profile) = (_active_profile, profile)
+    try:
+        yield profile
+    finally:
+        _active_profile = prev_profile
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _profiled(stage, item, func, call):
+    ''':return: the result of invoking `call`, measured if profiling'''
+    profile = _active_profile
+    if profile is None:
+        return call()
+    return profile.measure(stage, item, _func_name(func), call)
+
+
+def _func_name(func):
+    func = _undecorated_func(getattr(func, 'func', func))   ## Unwrap any `functools.partial`.
+    return getattr(func, '__qualname__', None) or str(func)
+
+
+
+class CompiledPlan(tuple):
+    '''
+    The steps of an execution-plan as a flat tuple of zero-arg callables already bound to their args.
+
+    Call it to run all steps in order and collect their results;
+    the originating funcs are consulted only to report a failed step.
+    '''
+
+    def __new__(cls, steps, funcs, plan=None, args=(), kwargs=None):
+        self = tuple.__new__(cls, steps)
+        self.funcs = funcs
+        self.plan = plan
+        self.args = args
+        self.kwargs = kwargs or {}
+        self._schedule = None
+        self._sources_snapshot = None
+        self._results = None
+
+        return self
+
+    def __call__(self, n_workers=None):
+        '''
+        :param int n_workers: if more than 1, run independent steps concurrently 
+                on a thread-pool of that size (see :meth:`_run_concurrently()`)
+        :return: the list of the results of all steps, in plan-order
+        '''
+        concurrently = n_workers and n_workers > 1 and len(self) > 1 and self.plan is not None
+        steps = self._profiled_steps(not concurrently)
+        if concurrently:
+            return self._run_concurrently(n_workers, steps)
+
+        results = []
+        append = results.append
         try:
-            results.append(func(*args, **kwargs))
+            for step in steps:
+                append(step())
         except Exception as ex:
+            func = self.funcs[len(results)]
+            raise DependenciesError("Failed executing %s due to: %s"%(func, ex), func) from ex
+
+        return results
+
+    def rerun(self, changed=None):
+        '''
+        Runs only the steps downstream (in the `deps_graph`) of the source-paths changed since the last rerun.
+
+        The 1st rerun executes all steps; every rerun snapshots the values of the source-paths
+        of the plan (its `calc_inp_nodes`), and the next one compares them to detect which have changed,
+        so bind the plan with :func:`compile_plan()` once, modify the args in-place, and rerun it,
+        ie when sweeping an engine-attribute.
+
+        :param changed: the source-paths (ie ``['engine.stroke']``) known to have changed, to skip
+                detecting changes (ie for values not comparable or indexed by non-string keys)
+        :return: the list of the results of all steps, in plan-order, kept from previous runs
+                for the steps not re-run
+        '''
+        named_args = name_all_func_args(_undecorated_func(self.funcs[0]), *self.args, **self.kwargs) if self else {}
+        sources = sorted(self.plan.calc_inp_nodes) if self.plan is not None else []
+        prev_snapshot = self._sources_snapshot
+        snapshot = {path: _snapshot_value(_resolve_path(named_args, path)) for path in sources}
+
+        if self._results is None or self.plan is None:
+            dirty = range(len(self))
+            results = [None] * len(self)
+        else:
+            if changed is None:
+                changed = [path for path in sources if not _same_values(snapshot[path], prev_snapshot[path])]
+            (ins, outs) = _collect_steps_paths(self.plan, self.funcs)
+            dirty = _find_dirty_steps(ins, outs, changed)
+            results = list(self._results)
+        log.debug('Re-running %i of %i steps.', len(dirty), len(self))
+
+        steps = self._profiled_steps()
+        for i in dirty:
+            try:
+                results[i] = steps[i]()
+            except Exception as ex:
+                func = self.funcs[i]
+                raise DependenciesError("Failed executing %s due to: %s"%(func, ex), func) from ex
+        self._sources_snapshot = snapshot
+        self._results = results
+
+        return results
+
+    def _profiled_steps(self, trace_memory=True):
+        ''':return: the steps wrapped to be measured by the active :class:`PlanProfile`, or this plan if not profiling'''
+        profile = _active_profile
+        if profile is None:
+            return self
+
+        if self.plan is not None:
+            (_, outs) = _collect_steps_paths(self.plan, self.funcs)
+            items = [', '.join(sorted(step_outs)) for step_outs in outs]
+        else:
+            items = [str(func) for func in self.funcs]
+        def profiled_step(item, step):
+            func_name = _func_name(step)
+            return lambda: profile.measure('execute', item, func_name, step, trace_memory)
+
+        return [profiled_step(item, step) for (item, step) in zip(items, self)]
+
+    def _run_concurrently(self, n_workers, steps=None):
+        '''
+        Schedules steps on a thread-pool as soon as all steps they depend on (in the `deps_graph`) have finished.
+
+        Results are identical to the sequential run because, apart from respecting data-dependencies,
+        no step writing some path runs concurrently with any other step accessing an overlapping path.
+        Steps writing different keys of a plain-dict arg overlap, but no step writing into any other arg
+        (ie a pandas object) runs concurrently with any other step accessing that arg:
+        inserting or replacing columns restructures the blocks of pandas objects, 
+        which is not thread-safe, so column-level overlap within a single DataFrame is deliberately not attempted.
+        On failure, the running steps are let to finish, and the earliest failed step (in plan-order) is reported.
+
+        :param steps: the (possibly profiled) callables to run in place of this plan's steps
+        '''
+        if steps is None:
+            steps = self
+        if self._schedule is None:
+            self._schedule = _make_steps_schedule(self.plan, self.funcs)
+        (preds, reads, writes) = self._schedule
+
+        ## Args (other than dicts) that must be accessed by a single step while written.
+        named_args = name_all_func_args(_undecorated_func(self.funcs[0]), *self.args, **self.kwargs) if self.funcs else {}
+        exclusive = {root for root in _path_roots(set().union(*writes)) if not isinstance(named_args.get(root), dict)}
+        xreads = [_path_roots(paths) & exclusive for paths in reads]
+        xwrites = [_path_roots(paths) & exclusive for paths in writes]
+
+        n_steps = len(self)
+        pending = [set(p) for p in preds]
+        succs = [[] for _ in range(n_steps)]
+        for (j, p) in enumerate(preds):
+            for i in p:
+                succs[i].append(j)
+        ready = [j for j in range(n_steps) if not pending[j]]
+        results = [None] * n_steps
+        failures = {}
+
+        def is_compatible(i, running):
+            for j in running:
+                if (xwrites[i] & (xreads[j] | xwrites[j])) or (xwrites[j] & xreads[i]):
+                    return False
+                if (_overlapping_paths(writes[i], reads[j] | writes[j]) or _overlapping_paths(writes[j], reads[i])):
+                    return False
+            return True
+
+        running = {}
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            while running or (ready and not failures):
+                if not failures:
+                    for i in list(ready):
+                        if len(running) >= n_workers:
+                            break
+                        if is_compatible(i, running.values()):
+                            ready.remove(i)
+                            running[executor.submit(steps[i])] = i
+                (finished, _) = futures_wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    i = running.pop(fut)
+                    try:
+                        results[i] = fut.result()
+                    except Exception as ex:
+                        failures[i] = ex
+                        continue
+                    for j in succs[i]:
+                        pending[j].discard(i)
+                        if not pending[j]:
+                            bisect.insort(ready, j)
+
+        if failures:
+            i = min(failures)
+            (func, ex) = (self.funcs[i], failures[i])
             raise DependenciesError("Failed executing %s due to: %s"%(func, ex), func) from ex
 
-    return results
+        return results
+
+
+def _undecorated_func(func):
+    ''':return: the user-function wrapped by a :class:`_DepFunc` (the funcs-factory of a child-func)'''
+    while isinstance(func, _DepFunc):
+        func = func.func
+    return func
+
+
+def compile_plan(plan, *args, **kwargs):
+    '''
+    Binds the funcs of a `plan` to the `args`, invoking every funcs-factory just once.
+
+    .. Note:: Funcs-factories are invoked upfront, before any func has run,
+            so they must only create their child-funcs (as required also when harvesting them).
+
+    :return: a :class:`CompiledPlan`, to be called (optionally with `n_workers`) any number of times
+    '''
+    funcs = list(plan.funcs)
+    children_by_factory = {}
+    steps = []
+    for func in funcs:
+        try:
+            if func.is_child_func():
+                factory = func.func.func
+                cfuncs = children_by_factory.get(factory)
+                if cfuncs is None:
+                    cfuncs = factory(*args, **kwargs)
+                    if not cfuncs:
+                        raise DependenciesError('%s returned %s as child-functions!'%(factory, cfuncs), factory)
+                    children_by_factory[factory] = cfuncs
+                steps.append(cfuncs[func.child_index])
+            else:
+                steps.append(functools.partial(func.func, *args, **kwargs))
+        except DependenciesError:
+            raise
+        except Exception as ex:
+            raise DependenciesError("Failed compiling %s due to: %s"%(func, ex), func) from ex
+
+    return CompiledPlan(steps, funcs, plan, args, kwargs)
+
+
+def execute_plan(plan, *args, **kwargs):
+    return compile_plan(plan, *args, **kwargs)()
+
+
+def _update_code_hash(hasher, code):
+    hasher.update(code.co_code)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            _update_code_hash(hasher, const)
+        else:
+            hasher.update(repr(const).encode())
+    hasher.update(repr((code.co_name, code.co_names, code.co_varnames, code.co_freevars)).encode())
+
+
+## Salts the keys of persisted plans, to be bumped when their pickled contents change.
+_persisted_format = 2
+_persisted_ext = '.pkl'
+
+class PlanCache:
+    '''
+    A bounded LRU-map of execution-plans built by :func:`execute_funcs_map()`, to skip harvesting on repeated runs.
+
+    Plans are keyed by the identity of the funcs in the `funcs_map`, the set of `sources`,
+    the `dests` and the :data:`default_harvester`, so any change in the data-paths of the args builds a new plan.
+    Invalidate entries explicitly with :meth:`clear()` when functions change behind the same objects
+    (ie when reloading modules).
+
+    When a `cache_dir` is set, the harvested :class:`Dependencies` and the plans built are also pickled
+    in that folder, keyed by the hash of the ``__code__`` of the funcs (see :meth:`make_disk_key()`),
+    for other processes to skip harvesting and planning on their 1st run.
+    Funcs must be picklable (ie module-level funcs-factories), or nothing is persisted.
+
+    .. Note:: Only the code of the funcs themselves is hashed (salted with the package's version),
+            so changes in the helpers or globals they call do not invalidate persisted entries;
+            delete the `cache_dir` after such changes.
+    '''
+
+    def __init__(self, max_size=64, cache_dir=None):
+        '''
+        :param int max_size: the maximum number of plans to keep in memory; 0 disables caching
+        :param str cache_dir: the folder to persist dependencies and plans into; None disables persistence
+        '''
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.hits = self.misses = self.disk_hits = 0
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def persisting(self, cache_dir):
+        '''A context-manager setting the `cache_dir` only for its body, restoring the previous one on exit.'''
+        orig_cache_dir = self.cache_dir
+        self.cache_dir = cache_dir
+        try:
+            yield self
+        finally:
+            self.cache_dir = orig_cache_dir
+
+    @staticmethod
+    def make_key(funcs_map, sources, dests):
+        ''':return: a hashable key independent of the order of the `funcs_map`, or None if some item is not hashable'''
+        pairs = funcs_map.items() if isinstance(funcs_map, Mapping) else funcs_map
+        try:
+            key = (frozenset(pairs), frozenset(sources), tuple(dests), default_harvester)
+            hash(key)
+        except TypeError:
+            return None
+
+        return key
+
+    @staticmethod
+    def make_disk_key(funcs_map, sources=None, dests=None):
+        '''
+        :param sources: if None, the key is for the harvested dependencies, for a plan otherwise
+        :return: a hex-digest of the code of the funcs in the `funcs_map` (in any order, and of the `sources` & `dests`)
+                salted with the package's version, or None if some func has no code
+        '''
+        hasher = hashlib.sha1(('%s:%s:%s' % (_persisted_format, __version__, default_harvester)).encode())
+        pairs = funcs_map.items() if isinstance(funcs_map, Mapping) else funcs_map
+        pair_digests = []
+        try:
+            for (func, is_factory) in pairs:
+                pair_hasher = hashlib.sha1()
+                if is_factory is None:          ## relation-tuple
+                    (item, deps, func) = func
+                    pair_hasher.update(repr((item, deps)).encode())
+                    if isinstance(func, tuple):
+                        (func, child_index) = func
+                        pair_hasher.update(repr(child_index).encode())
+                if func is not None:
+                    pair_hasher.update(('%s.%s:%s' % (func.__module__, func.__qualname__, is_factory)).encode())
+                    _update_code_hash(pair_hasher, func.__code__)
+                pair_digests.append(pair_hasher.digest())
+        except (AttributeError, TypeError, ValueError):
+            return None
+        for digest in sorted(pair_digests):
+            hasher.update(digest)
+        if sources is not None:
+            hasher.update(repr((sorted(sources), list(dests))).encode())
+
+        return hasher.hexdigest()
+
+    def _persisted_fpath(self, kind, disk_key):
+        return os.path.join(self.cache_dir, '%s-%s%s' % (kind, disk_key, _persisted_ext))
+
+    def load(self, kind, disk_key):
+        '''
+        :param str kind: ``'deps'`` or ``'plan'``
+        :return: the persisted object, or None if persistence disabled, missing or unreadable
+        '''
+        if self.cache_dir is None or disk_key is None:
+            return None
+        fpath = self._persisted_fpath(kind, disk_key)
+        try:
+            with open(fpath, 'rb') as fd:
+                obj = pickle.load(fd)
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            log.warning('Ignoring bad persisted %s(%s) due to: %s', kind, fpath, ex)
+            return None
+        with self._lock:
+            self.disk_hits += 1
+
+        return obj
+
+    def store(self, kind, disk_key, obj):
+        '''Pickles the `obj` (of some `kind`) into the `cache_dir`, unless persistence disabled or not picklable.'''
+        if self.cache_dir is None or disk_key is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        (fd, tmp_fpath) = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fd:
+                pickle.dump(obj, fd, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_fpath, self._persisted_fpath(kind, disk_key))
+        except Exception as ex:
+            os.unlink(tmp_fpath)
+            log.debug('Cannot persist %s(%s) due to: %s', kind, disk_key, ex)
+
+    def get(self, key):
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._plans.move_to_end(key)
+
+        return plan
+
+    def put(self, key, plan):
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+
+    def clear(self, func=None):
+        '''
+        :param func: if given, drop only plans built from this function or funcs-factory, all otherwise
+        '''
+        with self._lock:
+            if func is None:
+                self._plans.clear()
+            else:
+                for key in [k for k in self._plans if any(f is func for (f, _) in k[0])]:
+                    del self._plans[key]
+
+    def __len__(self):
+        return len(self._plans)
+
+    def info(self):
+        ''':return: a dict with the `hits`, `misses`, `disk_hits`, `size` & `max_size` of the cache'''
+        return dict(hits=self.hits, misses=self.misses, disk_hits=self.disk_hits,
+                size=len(self), max_size=self.max_size)
+
+
+## The process-wide cache of :func:`execute_funcs_map()`.
+plan_cache = PlanCache()
+
+
+def _build_persisted_plan(funcs_map, sources, dests):
+    '''Builds a plan, reusing any dependencies or plan persisted in the :data:`plan_cache`.'''
+    deps_key = plan_cache.make_disk_key(funcs_map) if plan_cache.cache_dir else None
+    plan_key = deps_key and plan_cache.make_disk_key(funcs_map, sources, dests)
+
+    plan = plan_cache.load('plan', plan_key)
+    if plan is None:
+        deps = plan_cache.load('deps', deps_key)
+        if deps is None:
+            deps = Dependencies.from_funcs_map(funcs_map)
+            plan_cache.store('deps', deps_key, deps)
+        plan = deps.build_plan(sources, dests)
+        plan_cache.store('plan', plan_key, plan)
+
+    return plan
 
 
 def execute_funcs_factory(funcs_fact, dests, *args, **kwargs):
@@ -775,8 +2147,10 @@ def execute_funcs_map(funcs_map, dests, *args, **kwargs):
             to be invoked (which ever that might be!).
 
 
-    .. Note:: Do not use it to run the calculations repeatedly.  Preffer to cache the function-relations
-            into an intermediate :class:`Dependencies` instance, instead.
+    .. Note:: The plans are memoized in the :data:`plan_cache` keyed by the funcs of the map,
+            the paths of the args and the `dests`, so repeated runs skip harvesting and planning;
+            use ``plan_cache.clear()`` if the functions change without changing identity.
+            Set ``plan_cache.cache_dir`` (or use ``plan_cache.persisting(dir)``) to persist them across processes.
     '''
 
     ## Find the first func in the map and
@@ -792,8 +2166,12 @@ def execute_funcs_map(funcs_map, dests, *args, **kwargs):
     named_args  = name_all_func_args(a_func, *args, **kwargs)
     sources     = tell_paths_from_named_args(named_args)
 
-    deps        = Dependencies.from_funcs_map(funcs_map)
-    plan        = deps.build_plan(sources, dests)
+    key         = PlanCache.make_key(funcs_map, sources, dests) if plan_cache.max_size else None
+    plan        = None if key is None else plan_cache.get(key)
+    if plan is None:
+        plan    = _build_persisted_plan(funcs_map, sources, dests)
+        if key is not None:
+            plan_cache.put(key, plan)
 
     return execute_plan(plan, *args, **kwargs)
 
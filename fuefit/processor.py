@@ -10,15 +10,21 @@ The core calculations required for transforming the Input-datamodel to the Outpu
 
 Uses *pandalon*'s automatic dependency extraction from calculation functions.
 """
+from concurrent.futures import ProcessPoolExecutor
+import copy
 import logging
+import os
 
 import numpy as np
 import pandas as pd
 import lmfit 
+from scipy import stats
 
 from . import pdcalc
 from . import datamodel
+from . import fitcache
 from collections import OrderedDict
+from collections.abc import Mapping
 from operator import setitem
 
 
@@ -28,13 +34,79 @@ log = logging.getLogger(__name__)
 def run(mdl, opts=None):
     """
     :param mdl: the datamodel to process, all params and data
-    :param map opts: flags controlling non-functional aspects of the process (ie error-handling and logging, gui, etc)
+    :param map opts: flags controlling non-functional aspects of the process (ie error-handling and logging, gui, etc),
+            ie `cache`, `cache_dir` & `no_cache` for the (opt-in) :mod:`fuefit.fitcache`
     """
 
     datamodel.ensure_modelpath_Series(mdl, '/engine')
     #datamodel.ensure_modelpath_Series(mdl, '/params')
     datamodel.ensure_modelpath_DataFrame(mdl, '/measured_eng_points')
 
+    cache = fitcache.cache_from_opts(opts)
+    if cache:
+        cache_key = fitcache.make_fit_key(mdl)
+        engine_key = fitcache.make_engine_key(mdl)
+        cached = cache.get(cache_key)
+    else:
+        cached = engine_key = None
+
+    if cached:
+        log.info('Reusing cached fitting results(%s).', cache_key)
+        mdl.update(cached)
+        engine              = mdl['engine']
+        measured_eng_points = mdl['measured_eng_points']
+        fitted_coeffs       = engine['fc_map_coeffs']
+        fitted_eng_points   = mdl['fitted_eng_points']
+    else:
+        ## Let fresh processes (ie batch-workers) reuse the calculation-plans of previous runs.
+        plans_dir = os.path.join(cache.cache_dir, 'plans') if cache else pdcalc.plan_cache.cache_dir
+        with pdcalc.plan_cache.persisting(plans_dir):
+            (engine, measured_eng_points, fitted_coeffs, fitted_eng_points) = _calc_and_fit(mdl, cache, engine_key)
+        if cache:
+            cache.put(cache_key, {part: mdl[part] 
+                    for part in ('engine', 'measured_eng_points', 'fitted_eng_points', 'fit_info')})
+            cache.put(engine_key, fitted_coeffs)
+
+    if datamodel.resolve_jsonpointer(mdl, '/params/plot_maps'):
+        mesh_eng_points     = generate_mesh_eng_points_fitted(measured_eng_points, fitted_coeffs, measured_eng_points)
+        columns = ['pmf', 'cm', 'bmep']
+        plot_map(measured_eng_points, mesh_eng_points, columns)
+        
+        ## Flatten 2D-vectors to make a DataFrame
+        #
+        mesh_eng_points = {col: vec.flatten() for (col, vec) in mesh_eng_points.items()}
+        mesh_eng_points = pd.DataFrame(mesh_eng_points)
+        ## Fill calced columns.
+        #
+        std_to_norm_map(engine, mesh_eng_points)
+        
+        mdl['mesh_eng_points'] = pd.DataFrame(mesh_eng_points)
+        
+
+    #datamodel.validate_model(mdl, additional_properties=False) TODO: Make OUT-MODEL pass validation. 
+    
+    return mdl
+
+
+## The model-parts :func:`run()` modifies in-place.
+_run_modified_paths = ('/engine', '/measured_eng_points')
+
+def run_variant(variant, opts=None):
+    """
+    Runs a :class:`datamodel.ModelVariant` without modifying the model-parts it shares with other variants.
+
+    :return: the model of the `variant`, with the results
+    """
+    for path in _run_modified_paths:
+        variant.writable(path, None)
+
+    return run(variant.model, opts)
+
+
+## The `/params/fitting/confidence_intervals` passed to :func:`fit_engine_map_ci()`.
+_ci_param_names = ('method', 'n_replicates', 'confidence', 'seed', 'n_workers')
+
+def _calc_and_fit(mdl, cache=None, engine_key=None):
     params              = mdl['params']
     engine              = mdl['engine']
     measured_eng_points = mdl['measured_eng_points']
@@ -49,35 +121,36 @@ def run(mdl, opts=None):
     coeffs = datamodel.resolve_jsonpointer(mdl, '/params/fitting/coeffs')
     coeffs = [lmfit.parameter.Parameter(name, **kws) for (name, kws) in coeffs.items()]
     is_robust = datamodel.resolve_jsonpointer(mdl, '/params/fitting/is_robust', False)
-    fitted_coeffs = fit_engine_map(measured_eng_points, is_robust, coeffs)
+    solver = datamodel.resolve_jsonpointer(mdl, '/params/fitting/solver', None)
+    robust_tol = datamodel.resolve_jsonpointer(mdl, '/params/fitting/robust_tol', None)
+    robust_max_iter = datamodel.resolve_jsonpointer(mdl, '/params/fitting/robust_max_iter', None)
+    warm_start = datamodel.resolve_jsonpointer(mdl, '/params/fitting/warm_start', None)
+    init_values = _resolve_warm_start(warm_start, engine, cache, engine_key)
+    fit_info = {}
+    fitted_coeffs = fit_engine_map(measured_eng_points, is_robust, coeffs, solver=solver,
+            robust_tol=robust_tol, robust_max_iter=robust_max_iter, fit_info=fit_info,
+            init_values=init_values)
+    mdl['fit_info'] = fit_info
     
     engine['fc_map_coeffs'] = fitted_coeffs
 
+    ci_params = datamodel.resolve_jsonpointer(mdl, '/params/fitting/confidence_intervals', None)
+    if ci_params:
+        unknown = set(ci_params) - set(_ci_param_names)
+        if unknown:
+            log.warning('Ignoring unknown confidence-intervals params%s.', sorted(unknown))
+        ci_params = {k: v for (k, v) in ci_params.items() if k in _ci_param_names}
+        ci_params.setdefault('n_workers', 1)
+        engine['fc_map_coeffs_ci'] = fit_engine_map_ci(measured_eng_points, is_robust, coeffs, solver=solver,
+                fitted_coeffs=fitted_coeffs, **ci_params)
+
     fitted_eng_points   = reconstruct_eng_points_fitted(engine, fitted_coeffs, measured_eng_points)
     std_to_norm_map(engine, fitted_eng_points)
 
-    if datamodel.resolve_jsonpointer(mdl, '/params/plot_maps'):
-        mesh_eng_points     = generate_mesh_eng_points_fitted(measured_eng_points, fitted_coeffs, measured_eng_points)
-        columns = ['pmf', 'cm', 'bmep']
-        plot_map(measured_eng_points, mesh_eng_points, columns)
-        
-        ## Flatten 2D-vectors to make a DataFrame
-        #
-        mesh_eng_points = {col: vec.flatten() for (col, vec) in mesh_eng_points.items()}
-        mesh_eng_points = pd.DataFrame(mesh_eng_points)
-        ## Fill calced columns.
-        #
-        std_to_norm_map(engine, mesh_eng_points)
-        
-        mdl['mesh_eng_points'] = pd.DataFrame(mesh_eng_points)
-        
-
     mdl['measured_eng_points'] = measured_eng_points
     mdl['fitted_eng_points'] = pd.DataFrame(fitted_eng_points)
 
-    #datamodel.validate_model(mdl, additional_properties=False) TODO: Make OUT-MODEL pass validation. 
-    
-    return mdl
+    return (engine, measured_eng_points, fitted_coeffs, fitted_eng_points)
 
 
 def eng_points_2_std_map(params, engine, eng_points):
@@ -104,6 +177,29 @@ def eng_points_2_std_map(params, engine, eng_points):
 
     return funcs
 
+def fleet_eng_points_2_std_map(params, engines, eng_points, key='engine_id'):
+    """
+    Runs :func:`eng_points_2_std_map()` once for the engine-points of a whole fleet.
+
+    The engine-attributes are broadcast to the points by their `key` (see :class:`pdcalc.GroupBroadcast`),
+    so a single pass of vectorized arithmetic calculates the points of all engines.
+
+    :param params: the model's params, with the `fuel` lhv of the engines
+    :param engines: a DataFrame indexed by engine-id, with the engine-attributes as columns
+            (the `fuel_lhv` is filled from `params` if missing)
+    :param eng_points: a long-format DataFrame with the normalized points of all engines,
+            and their engine-id in the `key` column; it is updated with the calculated columns
+    :return: the updated `eng_points`
+    """
+    if 'fuel_lhv' not in engines:
+        engines['fuel_lhv'] = [params['fuel'][fuel]['lhv'] for fuel in engines['fuel']]
+    engine = pdcalc.GroupBroadcast(engines, eng_points[key])
+
+    outcomes = ('eng_points.cm', 'eng_points.bmep', 'eng_points.pmf')
+    pdcalc.execute_funcs_factory(eng_points_2_std_map, outcomes, params, engine, eng_points)
+
+    return eng_points
+
 def std_to_norm_map(engine, eng_points):
     from math import pi
 
@@ -121,28 +217,298 @@ def std_to_norm_map(engine, eng_points):
 
 
 
+fc_map_coeff_names = ('a', 'b', 'c', 'a2', 'b2', 'loss0', 'loss2')
+
 def engine_map_modelfunc(coeff_values, X):
     """
     The function that models the engine-map.
+
+    A thin wrapper over :func:`engine_map_kernel()` preserving the shape (or the index) of `X`.
+
+    :param coeff_values: a map (ie dict, Series) with all :data:`fc_map_coeff_names`
+    :param X: a map (ie DataFrame) with the `pmf` and `cm` vectors (or equally-shaped arrays)
+    :return: the `bmep`, as a Series if `X` is a DataFrame, as a ndarray otherwise
     """
-    
-    a       = coeff_values['a']
-    b       = coeff_values['b']
-    c       = coeff_values['c']
-    a2      = coeff_values['a2']
-    b2      = coeff_values['b2']
-    loss0   = coeff_values['loss0']
-    loss2   = coeff_values['loss2']
-
-    pmf     = X['pmf']
-    cm      = X['cm']
-    
-    bmep = (a + b*cm + c*cm**2)*pmf + (a2 + b2*cm)*pmf**2 + loss0 + loss2*cm**2
-    
-    return bmep
+    A       = engine_map_design_matrix(X)
+    bmep    = engine_map_kernel(A, coeff_vector(coeff_values))
+
+    if isinstance(X, pd.DataFrame):
+        return pd.Series(bmep, index=X.index)
+
+    return bmep.reshape(np.shape(X['pmf']))
+
+
+def coeff_vector(coeff_values, out=None):
+    """
+    :param coeff_values: a map (ie dict, Series, :class:`lmfit.Parameters`) with all :data:`fc_map_coeff_names`
+    :param nparray out: an optional float-buffer of length 7 to fill-in
+    :return: a float ndarray with the coeff-values ordered as in :data:`fc_map_coeff_names`
+    """
+    if out is None:
+        out = np.empty(len(fc_map_coeff_names))
+    for (i, name) in enumerate(fc_map_coeff_names):
+        v = coeff_values[name]
+        out[i] = getattr(v, 'value', v)
+
+    return out
+
+
+def engine_map_design_matrix(X):
+    """
+    The columns of :func:`engine_map_modelfunc()`, which is linear on all :data:`fc_map_coeff_names`.
+
+    :param X: a map (ie DataFrame) with the `pmf` and `cm` vectors
+    :return: a C-contiguous float ndarray with shape ``(n_points, 7)``, 
+            so that ``bmep = A.dot(coeff_values)``, with columns ordered as in :data:`fc_map_coeff_names`
+    """
+    pmf     = np.asarray(X['pmf'], dtype=float).ravel()
+    cm      = np.asarray(X['cm'], dtype=float).ravel()
+    A       = np.empty((len(pmf), len(fc_map_coeff_names)))
+    np.multiply(cm, cm, out=A[:, 6])
+    A[:, 0] = pmf
+    np.multiply(cm, pmf, out=A[:, 1])
+    np.multiply(A[:, 6], pmf, out=A[:, 2])
+    np.multiply(pmf, pmf, out=A[:, 3])
+    np.multiply(A[:, 1], pmf, out=A[:, 4])
+    A[:, 5] = 1
+
+    return A
+
+
+def engine_map_kernel(A, values, out=None):
+    """
+    The engine-map on plain arrays, with no pandas index-alignment.
+
+    :param nparray A: the design-matrix from :func:`engine_map_design_matrix()`
+    :param nparray values: the coeff-values ordered as in :data:`fc_map_coeff_names`, see :func:`coeff_vector()`
+    :param nparray out: an optional float-buffer of length ``n_points`` to store the `bmep` into
+    :return: the `bmep` vector
+    """
+    return np.dot(A, values, out=out)
+
+
+def engine_map_residual_kernel(A, values, YData, sqrt_weights=None, out=None):
+    """
+    The (weighted) residuals ``sqrt(w) * (A.dot(values) - YData)`` on plain arrays, computed in-place.
+
+    :param nparray YData: the measured `bmep` as a float ndarray
+    :param nparray sqrt_weights: optional, the square-roots of the weights of each data-point
+    :param nparray out: an optional float-buffer of length ``n_points`` to store the residuals into
+    :return: the residuals vector
+    """
+    out = np.dot(A, values, out=out)
+    np.subtract(out, YData, out=out)
+    if sqrt_weights is not None:
+        np.multiply(out, sqrt_weights, out=out)
+
+    return out
+
+
+def _make_residualfunc(A, YData, weights=None):
+    """
+    :return: a function for :func:`lmfit.minimize()` evaluating :func:`engine_map_residual_kernel()`
+            into preallocated buffers
+    """
+    YData   = np.ascontiguousarray(YData, dtype=float)
+    sqrt_w  = None if weights is None else np.sqrt(np.asarray(weights, dtype=float))
+    values  = np.empty(len(fc_map_coeff_names))
+    out     = np.empty_like(YData)
+
+    def residualfunc(params, *args, **kws):
+        coeff_vector(params, out=values)
+        return engine_map_residual_kernel(A, values, YData, sqrt_w, out=out)
+
+    return residualfunc
+
+
+def _iter_coeffs(coeffs):
+    return coeffs.values() if isinstance(coeffs, Mapping) else coeffs
+
+def _is_bounded_coeff(coeff):
+    return any(lim is not None and np.isfinite(lim) for lim in (coeff.min, coeff.max))
+
+def is_linear_solvable(coeffs):
+    """
+    :param coeffs: a sequence or a map of :class:`lmfit.parameter.Parameter`
+    :return: true if no varying coefficient has bounds or an `expr`, so a closed-form solution exists
+    """
+    return not any(c.expr or (c.vary and _is_bounded_coeff(c)) for c in _iter_coeffs(coeffs))
+
+
+def seed_coeffs(coeffs, init_values):
+    """
+    :param coeffs: a sequence or a map of :class:`lmfit.parameter.Parameter`
+    :param init_values: a map (ie Series) of coefficient-values to start fitting from;
+            missing or NaN values, and fixed coefficients (without `vary` or with `expr`) are left intact
+    :return: a list with copies of the `coeffs`
+    """
+    seeded = []
+    for c in _iter_coeffs(coeffs):
+        c = copy.copy(c)
+        value = init_values.get(c.name)
+        if c.vary and not c.expr and value is not None and not np.isnan(value):
+            c.value = float(value)
+        seeded.append(c)
+
+    return seeded
+
+
+_engine_similarity_attrs = ('capacity', 'stroke', 'bore', 'cylinders', 'p_max', 'n_rated', 'n_idle')
 
+def nearest_engine_coeffs(engine, fleet, attrs=None):
+    """
+    Selects the fitted coefficients of the most similar engine in a fleet-table.
+
+    :param engine: a map (ie Series) with the engine attributes
+    :param fleet: a DataFrame with one row per engine, with attributes and fitted coefficients as columns
+            (ie the result of :func:`fit_engine_maps()` joined with the engine attributes)
+    :param attrs: the attributes to compare, [default: those numeric in `engine` among
+            :data:`_engine_similarity_attrs` and existing in `fleet`]
+    :return: a Series with the coefficients of the engine whose attributes have
+            the minimum distance (normalized by the fleet's std-dev) from `engine`
+    """
+    def as_float(v):
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            return np.nan
+
+    if attrs is None:
+        attrs = [a for a in _engine_similarity_attrs if a in fleet.columns and not np.isnan(as_float(engine.get(a)))]
+    if not attrs:
+        raise ValueError("No common numeric attributes to match engine with fleet!")
+
+    F       = fleet[list(attrs)].apply(pd.to_numeric, errors='coerce').values
+    x       = np.array([as_float(engine.get(a)) for a in attrs])
+    scale   = np.nanstd(F, axis=0)
+    scale[~(scale > 0)] = 1
+    dist    = np.nansum(((F - x) / scale)**2, axis=1)
+    nearest = fleet.iloc[int(np.argmin(dist))]
+    log.info('Nearest engine in fleet: %s', nearest.name)
+
+    return nearest[[name for name in fc_map_coeff_names if name in fleet.columns]]
+
+
+def _resolve_warm_start(warm_start, engine, cache=None, engine_key=None):
+    """
+    :param warm_start: the ``/params/fitting/warm_start`` model-value, one of:
+
+            None
+                no warm-start,
+            'cache'
+                the coefficients of the last fit for the same engine, if any,
+            a DataFrame
+                a fleet-table, see :func:`nearest_engine_coeffs()`,
+            a map (ie Series)
+                the coefficient-values as they are (ie read from a coefficients file)
+
+    :return: a map of the initial coefficient-values, or None
+    """
+    if warm_start is None or warm_start is False:
+        return None
+    if isinstance(warm_start, str):
+        if warm_start != 'cache':
+            raise ValueError("Invalid warm-start(%s)!" % warm_start)
+        if cache is None:
+            log.warning('Cannot warm-start fitting from disabled fit-cache!')
+            return None
+        return cache.get(engine_key)
+    if isinstance(warm_start, pd.DataFrame):
+        return nearest_engine_coeffs(engine, warm_start)
+    if isinstance(warm_start, (Mapping, pd.Series)):
+        return pd.Series(warm_start)
+
+    raise ValueError("Invalid warm-start(%s)!" % warm_start)
+
+
+def _fit_engine_map_linear(A, YData, coeffs, weights=None):
+    """
+    Solves the engine-map in a single least-squares step (QR/SVD through :func:`numpy.linalg.lstsq()`).
+
+    Non-varying coefficients are moved into the measured-data.
+
+    :param A: the design-matrix from :func:`engine_map_design_matrix()`
+    :param weights: optional, non-negative weights for each data-point
+    :return: a ndarray with the coeff-values ordered as in :data:`fc_map_coeff_names`
+    """
+    coeffs  = {c.name: c for c in _iter_coeffs(coeffs)}
+    values  = np.array([coeffs[name].value for name in fc_map_coeff_names], dtype=float)
+    vary    = np.array([coeffs[name].vary for name in fc_map_coeff_names], dtype=bool)
+
+    A_vary  = A[:, vary]
+    Y       = np.asarray(YData, dtype=float) - A[:, ~vary].dot(values[~vary])
+    if weights is not None:
+        sqrt_w  = np.sqrt(weights)
+        A_vary  = A_vary * sqrt_w[:, np.newaxis]
+        Y       = Y * sqrt_w
+    (sol, _, _, _) = np.linalg.lstsq(A_vary, Y, rcond=None)
+    values[vary] = sol
+
+    return values
+
+
+def _make_jacobianfunc(A, coeffs, weights=None):
+    """
+    The analytic jacobian of :func:`engine_map_residual_kernel()`: the (weighted) design-matrix columns of the free coefficients.
+
+    :param A: the design-matrix from :func:`engine_map_design_matrix()`
+    :return: a function for the `Dfun` keyword of :func:`lmfit.minimize()`,
+            or None if some coefficient is constrained by an `expr`
+    """
+    coeffs = list(_iter_coeffs(coeffs))
+    if any(c.expr for c in coeffs):
+        return None
+
+    ## Columns ordered as the `var_names` of lmfit.
+    jac = A[:, [fc_map_coeff_names.index(c.name) for c in coeffs if c.vary]]
+    if weights is not None:
+        jac = jac * np.sqrt(weights)[:, np.newaxis]
+
+    def jacobianfunc(params, *args, **kws):
+        return jac.copy()   ## lmfit rescales it in-place for bounded coeffs.
+
+    return jacobianfunc
+
+
+def _fit_engine_map_lmfit(A, df, coeffs, weights=None):
+    """
+    :return: a 2-tuple with the coeff-values ordered as in :data:`fc_map_coeff_names`,
+            and the minimizer-result, whose `params` may be used to continue fitting
+    """
+    minimizer = lmfit.minimize(_make_residualfunc(A, df['bmep'], weights), coeffs, 
+                Dfun=_make_jacobianfunc(A, coeffs, weights))
+    values = coeff_vector(minimizer.params)
 
-def fit_engine_map(df, is_robust, coeffs):
+    return (values, minimizer)
+
+
+_fit_solvers = ('auto', 'linear', 'lmfit')
+
+def fit_engine_map(df, is_robust, coeffs, solver=None, robust_tol=None, robust_max_iter=None, fit_info=None,
+        init_values=None):
+    """
+    Fits the engine-map coefficients on the `pmf`, `cm` & `bmep` columns of `df`.
+
+    :param bool is_robust: whether to downscale outliers with :func:`_fit_irls()`
+    :param coeffs: a sequence or a map of :class:`lmfit.parameter.Parameter`
+    :param str solver: one of:
+
+            auto (or None)
+                use `linear` when possible, `lmfit` otherwise,
+            linear
+                closed-form least-squares; screams when coefficients have bounds or expressions,
+            lmfit
+                iterative non-linear fitting with :func:`lmfit.minimize()`
+
+    :param float robust_tol: see :func:`_fit_irls()`
+    :param int robust_max_iter: see :func:`_fit_irls()`
+    :param dict fit_info: if given, it is updated with the `solver` used, the `nfev` model-evaluations of lmfit,
+            and when robust, with the `robust_iterations` and whether `robust_converged`
+    :param init_values: a map (ie Series) of coefficient-values to warm-start fitting from
+            (ie from a previous fit), see :func:`seed_coeffs()`; 
+            the robust-fitting starts also re-weighting from their residuals
+    :return: a Series with the fitted coefficient-values
+    """
     assert len({'cm', 'bmep', 'pmf'} - set(df.columns)) == 0, \
             "Missing fit-columns: %s" % {'cm', 'bmep', 'pmf'} - set(df.columns)
     assert not np.any(np.isnan(df['pmf'])), \
@@ -150,16 +516,414 @@ def fit_engine_map(df, is_robust, coeffs):
     assert not np.any(np.isnan(df['cm'])), \
             "Cannot fit with NaNs in `cm` data! \n%s" % np.any(np.isnan(df['cm']), axis=1)
 
-    residualfunc_args   = (engine_map_modelfunc, df, df['bmep'])
-    residualfunc_kws    = dict(is_robust=is_robust)
-    minimizer = lmfit.minimize(_robust_residualfunc, coeffs, 
-                args=residualfunc_args, 
-                kws=residualfunc_kws)
-    res_df = pd.Series(minimizer.params.valuesdict())
+    if not solver:
+        solver = 'auto'
+    if solver not in _fit_solvers:
+        raise ValueError("Unknown fitting solver(%s)! Choose one of %s." % (solver, _fit_solvers))
+    is_linear = is_linear_solvable(coeffs)
+    if solver == 'linear' and not is_linear:
+        raise ValueError("Cannot fit coefficients with bounds or expressions using the `linear` solver!")
+    if solver == 'auto':
+        solver = 'linear' if is_linear else 'lmfit'
+    if fit_info is None:
+        fit_info = {}
+    fit_info['solver'] = solver
+    if init_values is not None:
+        coeffs = seed_coeffs(coeffs, init_values)
+
+    A = engine_map_design_matrix(df)
+    if solver == 'linear':
+        solve_func = lambda weights: _fit_engine_map_linear(A, df['bmep'], coeffs, weights)
+    else:
+        last_params = [coeffs]  ## Each IRLS iteration continues from the previous one.
+        fit_info['nfev'] = 0
+        def solve_func(weights):
+            (values, minimizer) = _fit_engine_map_lmfit(A, df, last_params[0], weights)
+            last_params[0] = minimizer.params
+            fit_info['nfev'] += minimizer.nfev
+            return values
+
+    if is_robust:
+        coeffs_map = {c.name: c for c in _iter_coeffs(coeffs)}
+        vary = np.array([coeffs_map[name].vary and not coeffs_map[name].expr 
+                for name in fc_map_coeff_names], dtype=bool)
+        if init_values is not None:
+            coeffs_map = {c.name: c for c in coeffs}
+            init_values = np.array([coeffs_map[name].value for name in fc_map_coeff_names], dtype=float)
+        (values, n_iter, is_converged) = _fit_irls(A, df['bmep'], vary, solve_func, 
+                tol=robust_tol, max_iter=robust_max_iter, init_values=init_values)
+        fit_info['robust_iterations'] = n_iter
+        fit_info['robust_converged'] = is_converged
+        if is_converged:
+            log.info('Robust fitting converged after %i iterations.', n_iter)
+        else:
+            log.warning('Robust fitting did not converge after %i iterations!', n_iter)
+    else:
+        values = solve_func(None)
+    res_df = pd.Series(values, index=fc_map_coeff_names)
+
+    return res_df
+
+
+def _fit_engine_maps_linear(A, YData, offsets, coeffs):
+    """
+    Solves the normal-equations of many engines at once, with batched numpy linear-algebra.
+
+    :param A: the stacked design-matrices of all engines
+    :param offsets: the starting row of each engine in `A`
+    :return: a ndarray ``(n_engines, 7)`` with the coeff-values ordered as in :data:`fc_map_coeff_names`
+    """
+    (values, vary, A_vary, Y, scale) = _scaled_linear_system(A, YData, coeffs)
+
+    n_vary  = A_vary.shape[1]
+    gram    = np.empty((len(offsets), n_vary, n_vary))
+    for i in range(n_vary):
+        for j in range(i, n_vary):
+            gram[:, i, j] = gram[:, j, i] = np.add.reduceat(A_vary[:, i] * A_vary[:, j], offsets)
+    rhs     = np.add.reduceat(A_vary * Y[:, np.newaxis], offsets, axis=0)
+
+    all_values = np.tile(values, (len(offsets), 1))
+    all_values[:, vary] = _solve_normal_eqs(gram, rhs) / scale
+
+    return all_values
+
+
+def _scaled_linear_system(A, YData, coeffs):
+    """
+    Moves non-varying coefficients into the measured-data and scales the remaining columns
+    for better conditioning of the normal-equations.
+
+    :return: a 5-tuple ``(values, vary, A_vary, Y, scale)``, where the solutions of the
+            scaled `A_vary` must be divided by `scale` to produce the `vary` part of `values`
+    """
+    coeffs  = {c.name: c for c in _iter_coeffs(coeffs)}
+    values  = np.array([coeffs[name].value for name in fc_map_coeff_names], dtype=float)
+    vary    = np.array([coeffs[name].vary for name in fc_map_coeff_names], dtype=bool)
+
+    Y       = np.asarray(YData, dtype=float) - A[:, ~vary].dot(values[~vary])
+    scale   = np.sqrt((A[:, vary]**2).sum(axis=0))
+    scale[scale == 0] = 1
+    A_vary  = A[:, vary] / scale
+
+    return (values, vary, A_vary, Y, scale)
+
+
+def _solve_normal_eqs(gram, rhs):
+    """
+    :param gram: a stack of ``A'WA`` matrices with shape ``(n_systems, n_vary, n_vary)``
+    :param rhs: a stack of ``A'Wy`` vectors with shape ``(n_systems, n_vary)``
+    :return: the solutions with shape ``(n_systems, n_vary)``
+    """
+    try:
+        return np.linalg.solve(gram, rhs[..., np.newaxis])[..., 0]
+    except np.linalg.LinAlgError:
+        log.warning('Singular normal-equations in batch, solving them one by one.')
+        return np.array([np.linalg.lstsq(g, r, rcond=None)[0] for (g, r) in zip(gram, rhs)])
+
+
+def fit_engine_maps(eng_points_list, coeffs, is_robust=False, solver=None):
+    """
+    Fits the engine-map coefficients of many engines in one call.
+
+    When the coefficients are linear-solvable (see :func:`is_linear_solvable()`) and not robust,
+    the design-matrices of all engines are stacked and solved together,
+    otherwise each engine is fitted separately with :func:`fit_engine_map()`.
+
+    :param eng_points_list: a map of ``{engine_id --> eng_points}`` or a sequence of `eng_points`
+            (ids are then their positions), where each `eng_points` DataFrame
+            contains already the `pmf`, `cm` & `bmep` columns (see :func:`eng_points_2_std_map()`)
+    :param coeffs: a sequence or a map of :class:`lmfit.parameter.Parameter` common for all engines
+    :param bool is_robust: see :func:`fit_engine_map()`
+    :param str solver: see :func:`fit_engine_map()`
+    :return: a DataFrame indexed by engine-id, with the fitted coefficient-values as columns
+    """
+    if isinstance(eng_points_list, Mapping):
+        (eng_ids, dfs) = (list(eng_points_list.keys()), list(eng_points_list.values()))
+    else:
+        dfs = list(eng_points_list)
+        eng_ids = list(range(len(dfs)))
+
+    is_batched = not is_robust and solver != 'lmfit' and is_linear_solvable(coeffs)
+    if is_batched and dfs:
+        n_vary = sum(bool(c.vary) for c in _iter_coeffs(coeffs))
+        too_few = [eid for (eid, df) in zip(eng_ids, dfs) if len(df) < n_vary]
+        if too_few:
+            raise ValueError("Engines%s have less than %i points to fit!" % (too_few, n_vary))
+        for (eid, df) in zip(eng_ids, dfs):
+            for col in ('pmf', 'cm', 'bmep'):
+                if col not in df or np.any(np.isnan(df[col])):
+                    raise ValueError("Engine(%s) has missing or NaN `%s` data!" % (eid, col))
+
+        lengths = [len(df) for df in dfs]
+        offsets = np.cumsum([0] + lengths[:-1])
+        X       = {col: np.concatenate([np.asarray(df[col], dtype=float) for df in dfs]) 
+                for col in ('pmf', 'cm', 'bmep')}
+        values  = _fit_engine_maps_linear(engine_map_design_matrix(X), X['bmep'], offsets, coeffs)
+    else:
+        values = [fit_engine_map(df, is_robust, coeffs, solver=solver) for df in dfs]
+        values = np.reshape(values, (len(dfs), len(fc_map_coeff_names)))
+
+    res_df = pd.DataFrame(values, index=pd.Index(eng_ids, name='engine_id'), columns=fc_map_coeff_names)
 
     return res_df
 
 
+_ci_methods = ('bootstrap', 'jackknife')
+
+def _bootstrap_multiplicities(n_points, n_replicates, seed=None):
+    """
+    :return: a float ndarray ``(n_replicates, n_points)`` with how many times each point participates
+            in each bootstrap replicate
+    """
+    rnd = np.random.RandomState(seed)
+    return rnd.multinomial(n_points, np.full(n_points, 1.0 / n_points), size=n_replicates).astype(float)
+
+
+def _fit_replicates_linear(A, YData, coeffs, multiplicities, chunk_size=256):
+    """
+    Solves the weighted normal-equations of all replicates with batched numpy linear-algebra.
+
+    :return: a ndarray ``(n_replicates, 7)`` with the coeff-values ordered as in :data:`fc_map_coeff_names`
+    """
+    (values, vary, A_vary, Y, scale) = _scaled_linear_system(A, YData, coeffs)
+    n_vary  = A_vary.shape[1]
+    ## Each row contains the flattened ``a a'`` outer-product of a data-point.
+    outers  = (A_vary[:, :, np.newaxis] * A_vary[:, np.newaxis, :]).reshape(len(Y), -1)
+    moments = A_vary * Y[:, np.newaxis]
+
+    all_values = np.tile(values, (len(multiplicities), 1))
+    for i in range(0, len(multiplicities), chunk_size):
+        W       = multiplicities[i:i + chunk_size]
+        gram    = W.dot(outers).reshape(-1, n_vary, n_vary)
+        all_values[i:i + chunk_size, vary] = _solve_normal_eqs(gram, W.dot(moments)) / scale
+
+    return all_values
+
+
+def _fit_jackknife_linear(A, YData, coeffs, chunk_size=4096):
+    """
+    Solves all leave-one-out replicates by subtracting the outer-product of each left-out point
+    from the normal-equations of all points, without any ``(n_points, n_points)`` weights.
+
+    :return: a ndarray ``(n_points, 7)`` with the coeff-values ordered as in :data:`fc_map_coeff_names`
+    """
+    (values, vary, A_vary, Y, scale) = _scaled_linear_system(A, YData, coeffs)
+    gram    = A_vary.T.dot(A_vary)
+    rhs     = A_vary.T.dot(Y)
+
+    all_values = np.tile(values, (len(Y), 1))
+    for i in range(0, len(Y), chunk_size):
+        a       = A_vary[i:i + chunk_size]
+        grams   = gram - a[:, :, np.newaxis] * a[:, np.newaxis, :]
+        rhss    = rhs - a * Y[i:i + chunk_size, np.newaxis]
+        all_values[i:i + chunk_size, vary] = _solve_normal_eqs(grams, rhss) / scale
+
+    return all_values
+
+
+def _fit_jackknife_replicates(df, left_out, is_robust, coeffs, solver, init_values):
+    """The worker-function fitting the leave-one-out replicates of the `left_out` positions; must be top-level for pickling."""
+    positions = np.arange(len(df))
+    values = [fit_engine_map(df.iloc[np.delete(positions, i)].reset_index(drop=True), 
+                    is_robust, coeffs, solver=solver, init_values=init_values) 
+            for i in left_out]
+
+    return np.reshape(values, (len(left_out), len(fc_map_coeff_names)))
+
+
+def _fit_replicates(df, multiplicities, is_robust, coeffs, solver, init_values):
+    """The worker-function fitting replicates one by one; must be top-level for pickling."""
+    positions = np.arange(len(df))
+    values = [fit_engine_map(df.iloc[np.repeat(positions, w.astype(int))].reset_index(drop=True), 
+                    is_robust, coeffs, solver=solver, init_values=init_values) 
+            for w in multiplicities]
+
+    return np.reshape(values, (len(multiplicities), len(fc_map_coeff_names)))
+
+
+def fit_engine_map_ci(df, is_robust, coeffs, method=None, n_replicates=None, confidence=None, seed=None,
+        solver=None, n_workers=None, fitted_coeffs=None):
+    """
+    Estimates confidence-intervals for the engine-map coefficients by resampling the engine-points.
+
+    When the coefficients are linear-solvable (see :func:`is_linear_solvable()`), not robust,
+    and the `solver` is not `lmfit`, all replicates are solved together from their weighted normal-equations,
+    otherwise they are fitted with :func:`fit_engine_map()` on a pool of processes.
+
+    :param df: the engine-points with the `pmf`, `cm` & `bmep` columns
+    :param bool is_robust: see :func:`fit_engine_map()`
+    :param coeffs: a sequence or a map of :class:`lmfit.parameter.Parameter`
+    :param str method: one of:
+
+            bootstrap (or None)
+                percentile-intervals of `n_replicates` resamplings with replacement,
+            jackknife
+                normal-intervals from the standard-error of the leave-one-out replicates
+
+    :param int n_replicates: the number of bootstrap replicates [default: 1000]
+    :param float confidence: the coverage of the intervals [default: 0.95]
+    :param int seed: the random-seed of the bootstrap resamplings, for reproducible intervals
+    :param str solver: see :func:`fit_engine_map()`
+    :param int n_workers: the number of processes for non-linear fitting; 1 fits in-process [default: number of CPUs]
+    :param fitted_coeffs: the coeff-values already fitted on all `df` (to center jackknife intervals
+            and to warm-start non-linear replicates) [default: fitted here]
+    :return: a DataFrame indexed by :data:`fc_map_coeff_names` with columns ``low``, ``high`` & ``std``
+    """
+    if not method:
+        method = 'bootstrap'
+    if method not in _ci_methods:
+        raise ValueError("Unknown confidence-intervals method(%s)! Choose one of %s." % (method, _ci_methods))
+    if not n_replicates:
+        n_replicates = 1000
+    if not confidence:
+        confidence = 0.95
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence(%s) must be within (0, 1)!" % confidence)
+    if fitted_coeffs is None:
+        fitted_coeffs = fit_engine_map(df, is_robust, coeffs, solver=solver)
+
+    is_linear = not is_robust and solver != 'lmfit' and is_linear_solvable(coeffs)
+    if method == 'jackknife':
+        ## Leave-one-out replicates are identified by the position of their left-out point.
+        (replicates_func, resamples) = (_fit_jackknife_replicates, np.arange(len(df)))
+        if is_linear:
+            replicates = _fit_jackknife_linear(engine_map_design_matrix(df), df['bmep'], coeffs)
+    else:
+        (replicates_func, resamples) = (_fit_replicates, _bootstrap_multiplicities(len(df), n_replicates, seed))
+        if is_linear:
+            replicates = _fit_replicates_linear(engine_map_design_matrix(df), df['bmep'], coeffs, resamples)
+    if not is_linear:
+        coeffs = list(_iter_coeffs(coeffs))
+        fit_args = (is_robust, coeffs, solver, fitted_coeffs)
+        if n_workers == 1:
+            replicates = replicates_func(df, resamples, *fit_args)
+        else:
+            n_chunks = min(len(resamples), 4 * (n_workers or os.cpu_count() or 1))
+            chunks = np.array_split(resamples, n_chunks)
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [executor.submit(replicates_func, df, chunk, *fit_args) for chunk in chunks]
+                replicates = np.concatenate([fut.result() for fut in futures])
+
+    alpha = 1 - confidence
+    if method == 'jackknife':
+        n = len(replicates)
+        std = np.sqrt((n - 1) / n * ((replicates - replicates.mean(axis=0))**2).sum(axis=0))
+        center = coeff_vector(fitted_coeffs)
+        z = stats.norm.ppf(1 - alpha / 2)
+        (low, high) = (center - z * std, center + z * std)
+    else:
+        std = replicates.std(axis=0, ddof=1)
+        (low, high) = np.percentile(replicates, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+
+    res_df = pd.DataFrame({'low': low, 'high': high, 'std': std}, index=fc_map_coeff_names, 
+            columns=['low', 'high', 'std'])
+
+    return res_df
+
+
+class EngineMapAccumulator:
+    """
+    The sufficient statistics (``A'WA``, ``A'Wy``) for fitting the engine-map incrementally, ie on streams of engine-points.
+
+    Engine-points are added in chunks with :meth:`update()`, accumulators from different sources
+    are combined with :meth:`merge()` (or ``+``), and the coefficients can be solved
+    with :meth:`solve()` at any time, at a cost independent of the number of points seen.
+
+    Example::
+
+        acc = EngineMapAccumulator()
+        for chunk in chunks:            ## DataFrames with `pmf`, `cm` & `bmep` columns
+            acc.update(chunk)
+            print(acc.solve(coeffs))
+    """
+
+    def __init__(self):
+        n_coeffs        = len(fc_map_coeff_names)
+        self.gram       = np.zeros((n_coeffs, n_coeffs))
+        self.moment     = np.zeros(n_coeffs)
+        self.sum_wyy    = 0.0
+        self.n_points   = 0
+
+    def update(self, eng_points, weights=None, decay=None):
+        """
+        :param eng_points: a DataFrame (or a map of vectors) with the `pmf`, `cm` & `bmep` columns
+        :param weights: optional, non-negative weights for each point
+        :param float decay: if given, a "forgetting" factor in ``(0, 1]`` multiplying
+                the statistics accumulated so far, to track slowly-changing engines
+        :return: self
+        """
+        if decay is not None and not 0 < decay <= 1:
+            raise ValueError("Decay(%s) must be within (0, 1]!" % decay)
+        A = engine_map_design_matrix(eng_points)
+        Y = np.asarray(eng_points['bmep'], dtype=float).ravel()
+        if np.any(np.isnan(A)) or np.any(np.isnan(Y)):
+            raise ValueError("Cannot fit with NaNs in `pmf`, `cm` or `bmep` data!")
+
+        if decay is not None:
+            self.gram       *= decay
+            self.moment     *= decay
+            self.sum_wyy    *= decay
+        Aw = A if weights is None else A * np.asarray(weights, dtype=float)[:, np.newaxis]
+        Yw = Y if weights is None else Y * weights
+        self.gram       += Aw.T.dot(A)
+        self.moment     += Aw.T.dot(Y)
+        self.sum_wyy    += Yw.dot(Y)
+        self.n_points   += len(Y)
+
+        return self
+
+    def merge(self, other):
+        """
+        Adds the statistics of `other` accumulator into this one.
+
+        :return: self
+        """
+        self.gram       += other.gram
+        self.moment     += other.moment
+        self.sum_wyy    += other.sum_wyy
+        self.n_points   += other.n_points
+
+        return self
+
+    __iadd__ = merge
+
+    def __add__(self, other):
+        return copy.deepcopy(self).merge(other)
+
+    def solve(self, coeffs=None):
+        """
+        :param coeffs: a sequence or a map of :class:`lmfit.parameter.Parameter`, 
+                to respect their `vary` & `value` (but no bounds nor expressions) 
+                [default: all coefficients vary]
+        :return: a Series with the fitted coefficient-values
+        """
+        if coeffs is None:
+            values  = np.zeros(len(fc_map_coeff_names))
+            vary    = np.ones(len(fc_map_coeff_names), dtype=bool)
+        else:
+            if not is_linear_solvable(coeffs):
+                raise ValueError("Cannot fit incrementally coefficients with bounds or expressions!")
+            coeffs  = {c.name: c for c in _iter_coeffs(coeffs)}
+            values  = np.array([coeffs[name].value for name in fc_map_coeff_names], dtype=float)
+            vary    = np.array([coeffs[name].vary for name in fc_map_coeff_names], dtype=bool)
+
+        gram    = self.gram[np.ix_(vary, vary)]
+        rhs     = self.moment[vary] - self.gram[np.ix_(vary, ~vary)].dot(values[~vary])
+        ## Scale for better conditioning of the normal-equations.
+        scale   = np.sqrt(np.diag(gram))
+        scale[scale == 0] = 1
+        (sol, _, _, _) = np.linalg.lstsq(gram / np.outer(scale, scale), rhs / scale, rcond=None)
+        values[vary] = sol / scale
+
+        return pd.Series(values, index=fc_map_coeff_names)
+
+    def rss(self, coeff_values):
+        """:return: the (weighted) residual sum-of-squares of all points seen for the `coeff_values`"""
+        v = np.asarray([coeff_values[name] for name in fc_map_coeff_names], dtype=float)
+
+        return self.sum_wyy - 2 * v.dot(self.moment) + v.dot(self.gram).dot(v)
+
+
 def reconstruct_eng_points_fitted(engine, fitted_coeffs, eng_points):
     bmep = engine_map_modelfunc(fitted_coeffs, eng_points)
 
@@ -226,12 +990,23 @@ def proc_vehicle(dfin, datamodel):
 
 
 
-def _robust_residualfunc(coeffs, modelfunc, X, YData, is_robust=False, robust_prcntile=None):
-    """
-    A non-linear iteratively-reweighted least-squares (IRLS) residual function (objective-function) 
-    that robustly fits ``YData = modelfunc(X)``.
+def _bisquare_weights(Residual, hat_vector, robust_prcntile):
+    R_abs       = np.abs(Residual)
+    sigma       = 1.4826 * np.median(R_abs)
+    if sigma == 0:
+        return np.ones_like(R_abs)
+    R_deleved   = R_abs / (robust_prcntile * sigma * np.sqrt(1 - hat_vector))
+
+    ## Calc the robust bisquared-residuals excluding outliers.
+    return (R_deleved < 1) * (1 - R_deleved**2)**2
 
-    This method applies weights on each iteration so as to downscale any outliers and high-leverage data-points
+
+def _fit_irls(A, YData, vary, solve_func, robust_prcntile=None, tol=None, max_iter=None, init_values=None):
+    r"""
+    An iteratively-reweighted least-squares (IRLS) loop that robustly fits ``YData = A.dot(coeffs)``.
+
+    On each iteration it solves the weighted least-squares problem with `solve_func`,
+    and then it re-weights each data-point so as to downscale any outliers and high-leverage data-points
     based on the 'bisquare' standardized adjusted residuals:[#]_
     
     .. math::
@@ -255,15 +1030,24 @@ def _robust_residualfunc(coeffs, modelfunc, X, YData, is_robust=False, robust_pr
     :math:`h` : (vector)
         the *hat vector*, the diagonal of the *hat matrix*,[#]_
         which is used to reduce the weight of high-leverage data points
-        that are having a large effect on the least-squares fit.
+        that are having a large effect on the least-squares fit;
+        it is calculated once per iteration from the QR-factorization of the weighted
+        columns of the varying coefficients.
 
+    The loop stops when no coefficient has changed more than `tol` relative to its value.
 
-    :param modelfunc:             The modeling function that accepts the dict of coeffs
-    :param nparray X:             
+    :param nparray A:             the design-matrix, see :func:`engine_map_design_matrix()`
     :param nparray YData:         measured-data points
-    :param boolean is_robust:     Whether to deleverage outlier YData.
+    :param nparray vary:          a boolean mask of the varying columns of `A`
+    :param solve_func:            a function accepting the weights vector (or None)
+                                  and returning the vector of all coefficient-values
     :param float robust_prcntile: The `K` percentile of the MAD, 
-                             [default: 4.68, filters-out approximately 5% of the residuals as outliers]
+                             [default: 4.685, filters-out approximately 5% of the residuals as outliers]
+    :param float tol:             relative convergence tolerance of the coefficients [default: 1e-6]
+    :param int max_iter:          maximum number of re-weighting iterations [default: 50]
+    :param nparray init_values:   if given, the 1st weights are derived from their residuals,
+                                  instead of an un-weighted solution
+    :return: a 3-tuple ``(coeff_values, n_iterations, is_converged)``
 
     .. Seealso::
         curve_fit, leastsq
@@ -273,22 +1057,28 @@ def _robust_residualfunc(coeffs, modelfunc, X, YData, is_robust=False, robust_pr
     .. [#] https://en.wikipedia.org/wiki/Median_absolute_deviation
     .. [#] https://en.wikipedia.org/wiki/Hat_matrix
     """
-    YFitted = engine_map_modelfunc(coeffs.valuesdict(), X)
-    Residual    = YFitted - YData
-
-    ## Robust:
-    ## Deleverage and standardize absolute-residuals based on a robust-MAD.
-    ##
-    if is_robust:
-        R_abs       = Residual.abs()
-        if not robust_prcntile:
-            robust_prcntile = 4.685     ##  Bisquare M-estimator with 95% efficiency under the Gaussian model.
-        R_deleved   = R_abs / (robust_prcntile * 1.4826 * np.median(R_abs))  ## * sqrt(1 - hat_vector))
-        ## Calc the robust bisquared-residuals excluding outliers.
-        R_weights   = (R_deleved < 1) * (1 - R_deleved**2)**2
-
-        Residual = R_weights * Residual
-        
-    return Residual
+    if not robust_prcntile:
+        robust_prcntile = 4.685     ##  Bisquare M-estimator with 95% efficiency under the Gaussian model.
+    if not tol:
+        tol = 1e-6
+    if not max_iter:
+        max_iter = 50
+
+    YData   = np.asarray(YData, dtype=float)
+    A_vary  = A[:, vary]
+    weights = np.ones_like(YData)
+    values  = solve_func(None) if init_values is None else init_values
+    for n_iter in range(1, max_iter + 1):
+        ## Deleverage and standardize absolute-residuals based on a robust-MAD.
+        #
+        (Q, _)      = np.linalg.qr(np.sqrt(weights)[:, np.newaxis] * A_vary)
+        hat_vector  = np.minimum((Q**2).sum(axis=1), 1 - 1e-9)
+        Residual    = A.dot(values) - YData
+        weights     = _bisquare_weights(Residual, hat_vector, robust_prcntile)
 
+        prev_values = values
+        values      = solve_func(weights)
+        if np.all(np.abs(values - prev_values) <= tol * np.maximum(np.abs(values), np.abs(prev_values))):
+            return (values, n_iter, True)
 
+    return (values, max_iter, False)
@@ -9,12 +9,14 @@
 Check pdcalc's function-dependencies exploration, reporting and classes .
 '''
 import logging
+from operator import setitem
 import unittest
 
 import itertools as it
 
 from ..pdcalc import _build_func_dependencies_graph, harvest_func, harvest_funcs_factory, _filter_common_prefixes, \
-    Dependencies, DependenciesError, _validate_func_relations
+    Dependencies, DependenciesError, _validate_func_relations, harvest_func_ast, harvest_funcs_factory_ast, \
+    _Tracer
 
 
 def gen_all_prefix_pairs(path):
@@ -235,10 +237,9 @@ class Test(unittest.TestCase):
         return graph
 
     def testGatherDepsAndBuldGraph_multiFuncsFacts_countNodes(self):
-        import networkx as nx
         web = self.build_web()
         print("RELS:\n", lstr(web))
-        print('ORDERED:\n', lstr(nx.topological_sort(web)))
+        print('ORDERED:\n', lstr(web.topological_order()))
         self.assertEqual(len(web), 25) #29 when adding.segments
 
         return web
@@ -298,6 +299,64 @@ class Test(unittest.TestCase):
             deps.add_func_rel(*rel)
 
 
+    def test_tracer_calls(self):
+        root = _Tracer('R')
+        dfin = root.dfin
+        dfin.hh['tt'] = dfin.a * 2
+        ((path1, args1, _), (path2, (key, value), _)) = root._tracer_calls
+        self.assertEqual((path1, args1), ('R.dfin.a.__mul__', (2, )))
+        self.assertEqual((path2, key), ('R.dfin.hh.__setitem__', 'tt'))
+        self.assertEqual(value._tracer_path, 'R.dfin.a.__mul__()')
+        self.assertTrue(dfin.x)
+        self.assertEqual(len(dfin.x), 0)
+        self.assertEqual(list(dfin.x), [])
+
+    def test_ast_vs_mock(self):
+        for fact in (funcs_fact, funcs_fact2):
+            mock_rels = harvest_funcs_factory(fact)
+            ast_rels = harvest_funcs_factory_ast(fact)
+
+            self.assertEqual([item for (item, _, _) in ast_rels], [item for (item, _, _) in mock_rels])
+            for ((_, mdeps, mfunc), (_, adeps, afunc)) in zip(mock_rels, ast_rels):
+                self.assertTrue(set(adeps) <= set(mdeps), (adeps, mdeps))
+                self.assertEqual(afunc.child_index, mfunc.child_index)
+
+    def test_ast_lambdas(self):
+        func = lambda dfin, params: dfin.hh['tt':'ll', 'i', params.b]['g'] + params.tt
+        items = [item for (item, _, _) in harvest_func_ast(func)]
+        self.assertEqual(items, ['R.dfin.hh.i.g', 'R.dfin.hh.ll.g', 'R.dfin.hh.tt.g', 'R.params.b', 'R.params.tt'])
+
+        def func_fact(dfin, params):
+            return [
+                lambda: setitem(dfin, 'a', params.OO['PP'].aa), lambda: dfin.hh['tt'],
+            ]
+        rels = harvest_funcs_factory_ast(func_fact)
+        self.assertEqual([rel[:2] for rel in rels], [('R.dfin.a', ['R.params.OO.PP.aa']), ('R.dfin.hh.tt', [])])
+
+    def test_ast_all_branches(self):
+        def func_fact(dfin, params):
+            def f1():
+                if params.flag:
+                    dfin['y'] = params[dfin.key].a
+                else:
+                    raise AssertionError('Never run!')
+                    dfin['y'] = params.b
+            return (f1, )
+
+        rels = harvest_funcs_factory_ast(func_fact)
+        self.assertEqual([rel[:2] for rel in rels], [
+                ('R.dfin.y', ['R.params.flag', 'R.params', 'R.dfin.key']), 
+                ('R.dfin.y', ['R.params.flag', 'R.params.b'])])
+
+    def test_Dependencies_harvester(self):
+        deps = Dependencies(harvester='ast')
+        deps.harvest_funcs_factory(funcs_fact)
+        self.assertEqual(len(deps._relation_tuples), 9)
+
+        with self.assertRaisesRegex(ValueError, 'BAD'):
+            Dependencies(harvester='BAD')
+
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
@@ -9,16 +9,20 @@
 Check pdcalc's function-dependencies exploration, reporting and classes .
 '''
 from collections import OrderedDict
+import json
 import logging
+import os
+import tempfile
+import threading
+import time
 import unittest
 
-from networkx.classes.digraph import DiGraph
-
 import pandas as pd
 
+from .. import pdcalc
 from ..pdcalc import (
     DependenciesError, execute_funcs_map, execute_plan,
-    Dependencies, _research_calculation_routes,
+    Dependencies, DepsGraph, _research_calculation_routes,
     tell_paths_from_named_args
 )
 
@@ -44,7 +48,7 @@ def make_test_graph():
                |
               (1)
     '''
-    web = DiGraph()
+    web = DepsGraph()
     web.add_edges_from([(1,2), (2,3), (3,4), (2,5), (3,6), (5,6), (5,4)])
     return web
 
@@ -213,7 +217,7 @@ class Test(unittest.TestCase):
                    |
                   (1)
         '''
-        web = DiGraph()
+        web = DepsGraph()
         web.add_edges_from([(1,2), (2,3), (3,4), (2,5), (3,6), (5,6), (5,4)])
 
         inp = (1, 3, 4)
@@ -225,6 +229,45 @@ class Test(unittest.TestCase):
         self.assertTrue(all_in & cn_nodes == all_in, cn_nodes)
 
 
+    def test_DepsGraph(self):
+        web = make_test_graph()
+        self.assertEqual(len(web), 6)
+        self.assertEqual(web.size(), 7)
+        self.assertEqual(web.reachable([3], blocked=[6]), {3, 4})
+        order = web.topological_order()
+        for (item, dep) in web.edges():
+            self.assertLess(order.index(dep), order.index(item), order)
+        self.assertEqual(web.topological_order([5, 2, 6]), [6, 5, 2])
+
+        web.add_edges_from([(6, 2)])
+        self.assertEqual(sorted(web.find_cyclic_nodes()), [1, 2, 3, 5, 6])
+        self.assertEqual(web.topological_order([3, 4]), [4, 3])
+        with self.assertRaisesRegex(DependenciesError, 'Cyclic'):
+            web.topological_order()
+
+        try:
+            import networkx
+        except ImportError:
+            return
+        nx_web = make_test_graph().to_networkx()
+        self.assertEqual(sorted(nx_web.edges()), sorted(make_test_graph().edges()))
+        self.assertEqual(len(DepsGraph.from_networkx(nx_web)), 6)
+
+    def test_GroupBroadcast(self):
+        groups = DF({'a': [1, 2], 'b': [10, 20]})
+        rows = DF({'key': [1, 0, 1], 'x': [1, 3, 1]})
+        view = pdcalc.GroupBroadcast(groups, rows['key'])
+
+        self.assertEqual(list(view.a), [2, 1, 2])
+        self.assertEqual(sorted(tell_paths_from_named_args({'g': view})), ['g.a', 'g.b'])
+        view['c'] = rows.x * view.b
+        self.assertEqual(list(groups['c']), [30, 20])
+        self.assertEqual(list(view.c), [20, 30, 20])
+        with self.assertRaises(AttributeError):
+            view.BAD
+        with self.assertRaisesRegex(KeyError, 'Unknown group-ids'):
+            pdcalc.GroupBroadcast(groups, rows['x'])
+
     def testSmoke_ExecutionPlan_fail(self):
         deps = build_base_deps()
 
@@ -375,6 +418,249 @@ class Test(unittest.TestCase):
         self.assertFalse(dfout.equals(dfout_c), dfout)
 
 
+    def test_plan_cache(self):
+        def make_args(fc):
+            return (SR(get_params()), SR(get_engine()), 
+                    DF({'fc':fc, 'fc_norm':[22, 44], 'n':[10,20], 'bmep':[100,200]}), DF({}))
+        funcs_map = {funcs_fact1: True, funcs_fact3: True, func11: False}
+        out = ('dfout.n', 'dfout.fc_norm')
+        cache = pdcalc.plan_cache
+        cache.clear()
+        hits = cache.hits
+
+        args1 = make_args([1, 2])
+        execute_funcs_map(funcs_map, out, *args1)
+        args2 = make_args([3, 4])
+        execute_funcs_map(dict(funcs_map), out, *args2)
+
+        self.assertEqual(cache.hits, hits + 1)
+        self.assertEqual(len(cache), 1)
+        ## Cached children must not reuse the args of the 1st run.
+        self.assertFalse(args1[3].equals(args2[3]), args2[3])
+
+        reordered_map = OrderedDict([(funcs_fact1, True), (func11, False), (funcs_fact3, True)])
+        execute_funcs_map(reordered_map, out, *make_args([5, 6]))
+        self.assertEqual(cache.hits, hits + 2)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.make_disk_key(reordered_map), cache.make_disk_key(funcs_map))
+
+        execute_funcs_map(funcs_map, ('dfout.n', ), *make_args([1, 2]))
+        self.assertEqual(len(cache), 2)
+        cache.clear(func11)
+        self.assertEqual(len(cache), 0)
+
+    def test_plan_cache_persisted(self):
+        def make_args():
+            return (SR(get_params()), SR(get_engine()), 
+                    DF({'fc':[1, 2], 'fc_norm':[22, 44], 'n':[10,20], 'bmep':[100,200]}), DF({}))
+        funcs_map = {funcs_fact1: True, funcs_fact3: True, func11: False}
+        out = ('dfout.n', 'dfout.fc_norm')
+        orig_cache = pdcalc.plan_cache
+        with tempfile.TemporaryDirectory() as tmpdir:
+            try:
+                pdcalc.plan_cache = pdcalc.PlanCache(cache_dir=tmpdir)
+                args1 = make_args()
+                execute_funcs_map(funcs_map, out, *args1)
+                self.assertEqual(len(os.listdir(tmpdir)), 2)
+
+                cache = pdcalc.plan_cache = pdcalc.PlanCache(cache_dir=tmpdir)    ## A "new" process.
+                args2 = make_args()
+                execute_funcs_map(funcs_map, out, *args2)
+                self.assertEqual(cache.disk_hits, 1)
+                self.assertTrue(args1[3].equals(args2[3]), args2[3])
+
+                self.assertNotEqual(cache.make_disk_key(funcs_map), cache.make_disk_key({funcs_fact1: True}))
+                self.assertIsNone(cache.make_disk_key([(('a', ['b'], None), None), (object(), False)]))
+
+                cache.clear()
+                with cache.persisting(None):
+                    self.assertIsNone(cache.cache_dir)
+                    execute_funcs_map(funcs_map, out, *make_args())
+                    self.assertEqual(cache.disk_hits, 1)
+                self.assertEqual(cache.cache_dir, tmpdir)
+                self.assertEqual(len(os.listdir(tmpdir)), 2)
+            finally:
+                pdcalc.plan_cache = orig_cache
+
+    def test_plan_cache_lru(self):
+        cache = pdcalc.PlanCache(max_size=2)
+        for key in 'abc':
+            cache.put(key, key)
+        cache.get('b')
+        cache.put('d', 'd')
+
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(cache.get('b'), 'b')
+        self.assertIsNone(pdcalc.PlanCache.make_key([(func11, False), (('a', ['b'], None), None)], [], []))
+
+
+    def test_compile_plan(self):
+        n_calls = []
+        def counting_fact(params, engine, dfin, dfout):
+            n_calls.append(1)
+            return funcs_fact(params, engine, dfin, dfout)
+        deps = Dependencies()
+        deps.harvest_funcs_factory(counting_fact)
+        del n_calls[:]
+
+        args = OrderedDict([
+            ('params', SR(get_params())),
+            ('engine', SR(get_engine())),
+            ('dfin',  DF({'fc':[1, 2], 'fc_norm':[22, 44], 'n':[10,20], 'bmep':[100,200]})),
+            ('dfout', DF({})),
+        ])
+        plan = deps.build_plan(tell_paths_from_named_args(args), ('dfout.n', 'dfout.fc_norm'))
+        compiled = plan.compile(*args.values())
+
+        self.assertIsInstance(compiled, tuple)
+        self.assertEqual(len(compiled), len(plan.funcs))
+        self.assertEqual(len(n_calls), 1)
+        compiled()
+        self.assertIn('fc_norm', args['dfout'])
+
+        args['engine']['capacity'] = 'BAD'
+        with self.assertRaisesRegex(DependenciesError, 'counting_fact'):
+            plan.compile(*args.values())()
+
+
+    def test_compiled_plan_concurrent(self):
+        barrier = threading.Barrier(2, timeout=10)
+        def f1(a, b, c):
+            barrier.wait()
+            a['x'] = c['i'] * 2
+        def f2(a, b, c):
+            barrier.wait()
+            b['y'] = c['j'] + 1
+        def f3(a, b, c):
+            a['z'] = a['x'] + b['y']
+        deps = Dependencies()
+        deps.add_func_rel('a.x', 'c.i', f1)
+        deps.add_func_rel('b.y', 'c.j', f2)
+        deps.add_func_rel('a.z', ['a.x', 'b.y'], f3)
+        plan = deps.build_plan(['c.i', 'c.j'], ['a.z'])
+
+        (a, b, c) = ({}, {}, {'i': 1, 'j': 2})
+        plan.compile(a, b, c)(n_workers=2)   ## Would break the barrier if run sequentially.
+        self.assertEqual(a, {'x': 2, 'z': 5})
+
+        c['j'] = 'BAD'
+        with self.assertRaisesRegex(DependenciesError, 'f2'):
+            plan.compile(a, b, c)(n_workers=2)
+
+    def test_compiled_plan_concurrent_samearg(self):
+        barrier = threading.Barrier(2, timeout=10)
+        def f1(a, c):
+            barrier.wait()
+            a['x'] = c['i'] * 2
+        def f2(a, c):
+            barrier.wait()
+            a['y'] = c['j'] + 1
+        deps = Dependencies()
+        deps.add_func_rel('a.x', 'c.i', f1)
+        deps.add_func_rel('a.y', 'c.j', f2)
+        plan = deps.build_plan(['c.i', 'c.j'], ['a.x', 'a.y'])
+
+        a = {}
+        plan.compile(a, {'i': 1, 'j': 2})(n_workers=2)   ## Independent keys of a dict overlap.
+        self.assertEqual(a, {'x': 2, 'y': 3})
+
+        active = []
+        def g1(a, c):
+            active.append(1)
+            time.sleep(0.05)
+            self.assertEqual(len(active), 1)
+            a['x'] = c['i'] * 2
+            active.pop()
+        def g2(a, c):
+            active.append(2)
+            time.sleep(0.05)
+            self.assertEqual(len(active), 1)
+            a['y'] = c['j'] + 1
+            active.pop()
+        deps = Dependencies()
+        deps.add_func_rel('a.x', 'c.i', g1)
+        deps.add_func_rel('a.y', 'c.j', g2)
+        plan = deps.build_plan(['c.i', 'c.j'], ['a.x', 'a.y'])
+
+        a = DF({'i': [1, 2]})
+        plan.compile(a, {'i': 1, 'j': 2})(n_workers=2)   ## Columns of a DataFrame are written one at a time.
+        self.assertEqual(list(a.columns), ['i', 'x', 'y'])
+
+    def test_compiled_plan_rerun(self):
+        calls = []
+        def f1(a, b, c):
+            calls.append('f1')
+            a['x'] = c['i'] * 2
+        def f2(a, b, c):
+            calls.append('f2')
+            b['y'] = c['j'] + 1
+        def f3(a, b, c):
+            calls.append('f3')
+            a['z'] = a['x'] + b['y']
+        deps = Dependencies()
+        deps.add_func_rel('a.x', 'c.i', f1)
+        deps.add_func_rel('b.y', 'c.j', f2)
+        deps.add_func_rel('a.z', ['a.x', 'b.y'], f3)
+        plan = deps.build_plan(['c.i', 'c.j'], ['a.z'])
+
+        (a, b, c) = ({}, {}, {'i': 1, 'j': 2})
+        compiled = plan.compile(a, b, c)
+        compiled.rerun()
+        self.assertEqual(sorted(calls), ['f1', 'f2', 'f3'])
+
+        del calls[:]
+        compiled.rerun()
+        self.assertEqual(calls, [])
+
+        c['j'] = 5
+        compiled.rerun()
+        self.assertEqual(calls, ['f2', 'f3'])
+        self.assertEqual(a, {'x': 2, 'z': 8})
+
+        del calls[:]
+        compiled.rerun(changed=['c.i'])
+        self.assertEqual(calls, ['f1', 'f3'])
+
+    def test_profiling(self):
+        def f1(a, c):
+            a['x'] = list(range(c['i']))
+        def f2(a, c):
+            a['z'] = len(a['x'])
+        funcs_map = OrderedDict([(f1, False), (f2, False)])
+
+        pdcalc.plan_cache.clear()
+        (a, c) = ({}, {'i': 10000})
+        with pdcalc.profiling() as profile:
+            execute_funcs_map(funcs_map, ['a.z'], a, c)
+            execute_plan(Dependencies.from_funcs_map(funcs_map).build_plan(['c.i'], ['a.z']), a, c)
+        self.assertIsNone(pdcalc._active_profile)
+        self.assertEqual(a['z'], 10000)
+
+        df = profile.to_frame()
+        self.assertEqual(list(df.columns), pdcalc.PlanProfile.columns)
+        execs = df[df.stage == 'execute']
+        self.assertEqual(list(execs.index), ['a.x', 'a.z'])
+        self.assertEqual(list(execs.calls), [2, 2])
+        self.assertTrue(execs.func['a.x'].endswith('f1'), execs)
+        if pdcalc._can_trace_memory:
+            self.assertGreater(execs.mem['a.x'], 10000 * 8)
+        else:
+            self.assertTrue(execs.mem.isnull().all(), execs)
+        self.assertTrue((execs[['wall', 'cpu']] >= 0).all().all(), execs)
+        self.assertEqual(set(df.stage), {'harvest', 'build_plan', 'execute'})
+        self.assertEqual(list(df[df.stage == 'build_plan'].calls), [2])
+
+        jprofile = json.loads(profile.to_json())
+        self.assertEqual(sorted(jprofile), ['build_plan', 'execute', 'harvest'])
+        self.assertEqual(sorted(jprofile['execute']), ['a.x', 'a.z'])
+        self.assertEqual(jprofile['execute']['a.z']['calls'], 2)
+
+        with pdcalc.profiling() as profile:    ## Plan cached, nothing harvested or planned.
+            pass
+        self.assertEqual(list(profile.to_frame().columns), pdcalc.PlanProfile.columns)
+        self.assertEqual(json.loads(profile.to_json()), {})
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
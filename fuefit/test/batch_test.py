@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2014 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+'''
+Check the process-pool batch-runner.
+'''
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .. import batch, processor
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tdir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_model(self, fname, mdl):
+        fpath = os.path.join(self.tdir, fname)
+        with open(fpath, 'w') as fd:
+            json.dump(mdl, fd)
+
+        return fpath
+
+    def test_read_manifest(self):
+        fpath = os.path.join(self.tdir, 'engines.lst')
+        with open(fpath, 'w') as fd:
+            fd.write('# Comment\n\neng1.json\n  sub/eng2.json  \n')
+
+        files = batch.read_manifest(fpath)
+        self.assertEqual(files, [os.path.join(self.tdir, 'eng1.json'), os.path.join(self.tdir, 'sub/eng2.json')])
+
+    def test_load_model_file(self):
+        fpath = self.write_model('eng.json', {'engine': {'fuel': 'petrol'}, 'params': {'fitting': {'is_robust': True}}})
+        mdl = batch.load_model_file(fpath)
+
+        self.assertEqual(mdl['engine']['fuel'], 'petrol')
+        self.assertIn('n_idle', mdl['engine'])
+        self.assertTrue(mdl['params']['fitting']['is_robust'])
+        self.assertIn('coeffs', mdl['params']['fitting'])
+
+    def test_make_out_fpath(self):
+        self.assertEqual(batch.make_out_fpath('a/b/eng.json'), os.path.join('a/b', 'eng.out.json'))
+        self.assertEqual(batch.make_out_fpath('a/b/eng.json', 'out'), os.path.join('out', 'eng.out.json'))
+
+    def test_run_batch_failures(self):
+        fpaths = [self.write_model('bad%i.json' % i, {'engine': {'fuel': 'BAD_FUEL'}}) for i in range(3)]
+        results = list(batch.run_batch(fpaths, n_workers=2))
+
+        self.assertEqual(sorted(fpath for (fpath, _) in results), sorted(fpaths))
+        for (_, res) in results:
+            self.assertIsInstance(res, Exception)
+
+    def test_main_failures(self):
+        fpath = self.write_model('bad.json', {'engine': {'fuel': 'BAD_FUEL'}})
+        exit_status = batch.main([fpath, '-j', '1', '-O', os.path.join(self.tdir, 'out')])
+
+        self.assertEqual(exit_status, 1)
+        self.assertEqual(os.listdir(os.path.join(self.tdir, 'out')), [])
+
+    def make_model(self):
+        rnd = np.random.RandomState(1)
+        return {
+            'engine': {'fuel': 'petrol', 'p_max': 100, 'n_idle': 800, 'n_rated': 6000, 'stroke': 80, 'capacity': 1500},
+            'measured_eng_points': {
+                'n_norm': list(rnd.uniform(0.1, 1, 50)),
+                'p_norm': list(rnd.uniform(0.1, 1, 50)),
+                'fc_norm': list(rnd.uniform(100, 300, 50)),
+            },
+        }
+
+    def test_main_success(self):
+        fpath = self.write_model('eng.json', self.make_model())
+        out_dir = os.path.join(self.tdir, 'out')
+        cache_dir = os.path.join(self.tdir, 'cache')
+        exit_status = batch.main([fpath, '-j', '1', '-O', out_dir, '--cache-dir', cache_dir])
+
+        self.assertEqual(exit_status, 0)
+        self.assertTrue(os.listdir(cache_dir))
+        with open(os.path.join(out_dir, 'eng.out.json')) as fd:
+            out_mdl = json.load(fd)
+        self.assertEqual(sorted(out_mdl['engine']['fc_map_coeffs']), sorted(processor.fc_map_coeff_names))
+        self.assertEqual(len(out_mdl['measured_eng_points']['n_norm']), 50)
+
+    def test_main_strict(self):
+        mdl = self.make_model()
+        mdl['engine']['EXTRA'] = 1
+        fpath = self.write_model('extra.json', mdl)
+        out_dir = os.path.join(self.tdir, 'out')
+
+        self.assertEqual(batch.main([fpath, '-j', '1', '-O', out_dir, '--no-cache', '--strict', 'true']), 1)
+        self.assertEqual(os.listdir(out_dir), [])
+        self.assertEqual(batch.main([fpath, '-j', '1', '-O', out_dir, '--no-cache']), 0)
+        self.assertEqual(os.listdir(out_dir), ['extra.out.json'])
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -8,9 +8,13 @@
 '''
 Check validity of json-schemas themselves.
 '''
+import io
+import json
 import unittest
 
 import jsonschema
+import numpy as np
+import pandas as pd
 
 from .. import datamodel
 
@@ -82,6 +86,165 @@ class Test(unittest.TestCase):
             datamodel.set_jsonpointer(mdl, *args)
             validator.validate(mdl)
 
+    def testValidator_cached(self):
+        self.assertIs(datamodel.model_validator(), datamodel.model_validator())
+        self.assertIsNot(datamodel.model_validator(), datamodel.model_validator(additional_properties=True))
+
+    def testValidateModel_additionalProperties(self):
+        mdl = datamodel.base_model()
+        datamodel.set_jsonpointer(mdl, '/engine/fuel', 'diesel')
+        mdl['params']['fuel']['EXTRA_FUEL'] = {'lhv': 1}
+
+        self.assertRaisesRegex(jsonschema.ValidationError, "Additional properties .*EXTRA_FUEL", datamodel.validate_model, mdl)
+        datamodel.validate_model(mdl, additional_properties=True)
+
+    def testCompiledValidator(self):
+        cases = [
+            ('/engine/fuel', 'diesel', True),
+            ('/engine/fuel', 'BAD_FUEL', False),
+            ('/engine/bore', ' +14 (mm)', True),
+            ('/engine/bore', '-14', False),
+            ('/engine/bore', 0, False),
+            ('/engine/cylinders', True, False),
+            ('/params/fitting/warm_start', 'cache', True),
+            ('/params/fitting/warm_start', 'BAD', False),
+            ('/params/fitting/confidence_intervals', {'confidence': 1}, False),
+            ('/params/fitting/coeffs/a/vary', False, True),
+            ('/params/fitting/coeffs/a/vary', 0, False),
+            ('/params/fuel/petrol', {}, False),
+            ('/params/plot_maps', 1, True),
+        ]
+        validator = datamodel.model_validator(compiled=True)
+        for (path, value, is_valid) in cases:
+            mdl = datamodel.base_model()
+            datamodel.set_jsonpointer(mdl, '/engine/fuel', 'petrol')
+            datamodel.set_jsonpointer(mdl, path, value)
+
+            self.assertEqual(bool(validator._check(mdl)), is_valid, (path, value))
+            self.assertEqual(validator.is_valid(mdl), is_valid, (path, value))
+            if not is_valid:
+                self.assertRaises(jsonschema.ValidationError, validator.validate, mdl)
+                self.assertRaises(jsonschema.ValidationError, datamodel.validate_model, mdl, compiled=True)
+
+    def testColumnViolations(self):
+        df = pd.DataFrame({
+            'N [1/min]':    [1000, np.nan, 2000, np.nan],
+            'P_norm':       [0.1, -0.2, 0.5, 1],
+            'FC (g/h)':     ['1', 'bad', None, -3],
+        }, index=list('abcd'))
+        violations = datamodel.find_column_violations(df, datamodel.eng_points_columns_schema())
+        violations = [(col, problem, list(rows)) for (col, problem, rows) in violations]
+
+        self.assertEqual(violations, [
+            ('N [1/min]', 'NaN values', ['b', 'd']),
+            ('FC (g/h)', 'non-numeric values', ['b']),
+            ('FC (g/h)', 'NaN values', ['c']),
+            ('FC (g/h)', 'values below 0', ['d']),
+        ])
+
+    def testColumnViolations_missingCategories(self):
+        df = pd.DataFrame({'cm': [1.0], 'CM': [2.0], 'x': ['foo']})
+        violations = datamodel.find_column_violations(df, datamodel.eng_points_columns_schema())
+
+        self.assertEqual([(col, len(rows)) for (col, _, rows) in violations],
+                [('load-power', 0), ('fuel-consumption', 0), ('cm', 0)])
+
+    def testValidateModel_engPoints(self):
+        mdl = datamodel.base_model()
+        datamodel.set_jsonpointer(mdl, '/engine/fuel', 'diesel')
+        mdl['measured_eng_points'] = pd.DataFrame({'cm': [1.0, 2.0], 'bmep': [3.0, 4.0], 'pmf': [5.0, 6.0]})
+        datamodel.validate_model(mdl)
+
+        mdl['measured_eng_points'].loc[1, 'pmf'] = np.nan
+        with self.assertRaisesRegex(datamodel.ColumnsValidationError, r'pmf: NaN values at 1 rows: \[1\]') as cm:
+            datamodel.validate_model(mdl)
+        self.assertEqual(len(cm.exception.violations), 1)
+        self.assertIsInstance(cm.exception, jsonschema.ValidationError)
+
+    def testJsonPointer(self):
+        doc = {'a': {'b': [1, {'c': 2}]}, 'e/x~': 3}
+        ptr = datamodel.JsonPointer('/a/b/1/c')
+
+        self.assertEqual(ptr.parts, ('a', 'b', '1', 'c'))
+        self.assertEqual(ptr.resolve(doc), 2)
+        self.assertEqual(datamodel.JsonPointer('/e~1x~0').resolve(doc), 3)
+        self.assertIsNone(datamodel.JsonPointer('/a/b/5').resolve(doc, None))
+        self.assertRaisesRegex(datamodel.JsonPointerException, r"Unresolvable.*'/a/x'", 
+                datamodel.JsonPointer('/a/x').resolve, doc)
+        self.assertRaises(datamodel.JsonPointerException, datamodel.JsonPointer, 'a/b')
+
+        ptr.set(doc, 4)
+        datamodel.JsonPointer('/a/b/-').set(doc, 5)
+        datamodel.JsonPointer('/a/n/m').set(doc, 6)
+        self.assertEqual(doc['a'], {'b': [1, {'c': 4}, 5], 'n': {'m': 6}})
+        self.assertRaisesRegex(datamodel.JsonPointerException, 'Expected numeric index', 
+                datamodel.JsonPointer('/a/b/x').set, doc, 0)
+        self.assertRaises(datamodel.JsonPointerException, datamodel.JsonPointer('').set, doc, 0)
+
+    def testParseJsonPointer_cached(self):
+        ptr = datamodel.parse_jsonpointer('/engine/fuel')
+
+        self.assertIs(datamodel.parse_jsonpointer('/engine/fuel'), ptr)
+        self.assertIs(datamodel.parse_jsonpointer(ptr), ptr)
+        self.assertEqual(ptr, datamodel.JsonPointer('/engine/fuel'))
+
+        mdl = datamodel.base_model()
+        datamodel.set_jsonpointer(mdl, ptr, 'diesel')
+        self.assertEqual(datamodel.resolve_jsonpointer(mdl, '/engine/fuel'), 'diesel')
+
+    def testModelVariant(self):
+        base = datamodel.base_model()
+        base['measured_eng_points'] = pd.DataFrame({'cm': [1.0, 2.0]})
+        variant = datamodel.ModelVariant(base)
+        variant.set('/params/fitting/coeffs/a/value', 1)
+        variant.set('/engine/new/branch', 2)
+
+        self.assertEqual(base['params']['fitting']['coeffs']['a'], {'value': 0.45})
+        self.assertNotIn('new', base['engine'])
+        self.assertEqual(variant.resolve('/params/fitting/coeffs/a/value'), 1)
+        self.assertEqual(variant.resolve('/engine/new/branch'), 2)
+        self.assertIs(variant.model['params']['fuel'], base['params']['fuel'])
+        self.assertIs(variant.model['params']['fitting']['coeffs']['b'], base['params']['fitting']['coeffs']['b'])
+        self.assertIs(variant.model['measured_eng_points'], base['measured_eng_points'])
+
+        df = variant.writable('/measured_eng_points')
+        df['n'] = 0
+        self.assertIs(variant.model['measured_eng_points'], df)
+        self.assertNotIn('n', base['measured_eng_points'])
+        self.assertIsNone(variant.writable('/missing', None))
+
+        variant2 = variant.variant()
+        variant2.set('/params/fitting/coeffs/a/value', 2)
+        self.assertEqual(variant.resolve('/params/fitting/coeffs/a/value'), 1)
+        self.assertIs(variant2.model['measured_eng_points'], df)
+
+        ## Writes of the parent after branching must not leak into the child.
+        variant.set('/params/fitting/coeffs/a/value', 3)
+        variant.set('/params/fitting/solver', 'lmfit')
+        variant.writable('/measured_eng_points')['n'] = 1
+        self.assertEqual(variant2.resolve('/params/fitting/coeffs/a/value'), 2)
+        self.assertNotEqual(variant2.resolve('/params/fitting/solver', None), 'lmfit')
+        self.assertEqual(list(variant2.model['measured_eng_points']['n']), [0, 0])
+        self.assertEqual(variant.resolve('/params/fitting/coeffs/a/value'), 3)
+
+    def testCompileSchema_unsupported(self):
+        self.assertRaisesRegex(ValueError, r'keyword\(not\)', datamodel.compile_schema, {'not': {}}, datamodel.model_validator()._types)
+
+    def testJsonDump_chunked(self):
+        df = pd.DataFrame({'n': np.arange(7) / 3, 's': list('abcdefg')})
+        df.iloc[2, 0] = np.nan
+        mdl = {'a': [1, 2.5, None, True, {'x': [], 'y': {}}], 3: 's', 'df': df, 'sr': df.n, 'empty': pd.DataFrame()}
+
+        exp = json.dumps(mdl, indent=2, default=datamodel.make_json_defaulter(None))
+        fp = io.StringIO()
+        datamodel.json_dump(mdl, fp, chunk_rows=2)
+        self.assertEqual(json.loads(fp.getvalue()), json.loads(exp))
+        self.assertEqual(datamodel.json_dumps(mdl), fp.getvalue())
+
+        plain = {k: v for (k, v) in mdl.items() if not hasattr(v, 'to_json')}
+        self.assertEqual(datamodel.json_dumps(plain), json.dumps(plain, indent=2))
+        self.assertIn('DataFrame:', datamodel.json_dumps(mdl, 'to_string'))
+
 
 
 
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2014 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+'''
+Check the content-addressed cache of fitting results.
+'''
+import argparse
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from .. import datamodel, fitcache
+
+
+def make_model():
+    mdl = datamodel.base_model()
+    mdl['engine']['fuel'] = 'petrol'
+    mdl['measured_eng_points'] = pd.DataFrame({'pmf': [1.0, 2.0], 'cm': [3.0, 4.0], 'bmep': [5.0, 6.0]})
+
+    return mdl
+
+
+class TestFitCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = fitcache.FitCache(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_key_stable(self):
+        self.assertEqual(fitcache.make_fit_key(make_model()), fitcache.make_fit_key(make_model()))
+
+    def test_key_changes(self):
+        key = fitcache.make_fit_key(make_model())
+
+        mdl = make_model()
+        mdl['measured_eng_points'].loc[1, 'cm'] = 4.1
+        self.assertNotEqual(fitcache.make_fit_key(mdl), key)
+
+        mdl = make_model()
+        mdl['engine']['stroke'] = 12
+        self.assertNotEqual(fitcache.make_fit_key(mdl), key)
+
+        mdl = make_model()
+        mdl['params']['fitting']['is_robust'] = True
+        self.assertNotEqual(fitcache.make_fit_key(mdl), key)
+
+        mdl = make_model()
+        mdl['params']['plot_maps'] = True
+        self.assertEqual(fitcache.make_fit_key(mdl), key)
+
+    def test_engine_key(self):
+        key = fitcache.make_engine_key(make_model())
+
+        mdl = make_model()
+        mdl['measured_eng_points'].loc[1, 'cm'] = 4.1
+        mdl['params']['fitting']['warm_start'] = 'cache'
+        self.assertEqual(fitcache.make_engine_key(mdl), key)
+        self.assertNotEqual(fitcache.make_fit_key(mdl), key)
+
+        mdl['engine']['stroke'] = 12
+        self.assertNotEqual(fitcache.make_engine_key(mdl), key)
+
+    def test_put_get(self):
+        mdl = make_model()
+        self.assertIsNone(self.cache.get('abc'))
+
+        self.cache.put('abc', {'measured_eng_points': mdl['measured_eng_points']})
+        entry = self.cache.get('abc')
+        self.assertTrue(entry['measured_eng_points'].equals(mdl['measured_eng_points']))
+
+    def test_lru_eviction(self):
+        self.cache.put('k1', 'a' * 1000)
+        self.cache.put('k2', 'b' * 1000)
+        old = time.time() - 100
+        os.utime(self.cache._entry_fpath('k1'), (old, old))
+        os.utime(self.cache._entry_fpath('k2'), (old + 1, old + 1))
+        self.cache.get('k1')       ## Now `k2` is the least-recently-used.
+
+        self.cache.max_size = 2500
+        self.cache.put('k3', 'c' * 1000)
+        self.assertIsNone(self.cache.get('k2'))
+        self.assertIsNotNone(self.cache.get('k1'))
+        self.assertIsNotNone(self.cache.get('k3'))
+
+    def test_cache_from_opts(self):
+        self.assertIsNone(fitcache.cache_from_opts(None))
+        self.assertIsNone(fitcache.cache_from_opts(argparse.Namespace(no_cache=True)))
+        self.assertIsNone(fitcache.cache_from_opts(argparse.Namespace(no_cache=False, cache_dir=None)))
+        self.assertIsNone(fitcache.cache_from_opts(argparse.Namespace(cache=True, no_cache=True, cache_dir=self.temp_dir.name)))
+        cache = fitcache.cache_from_opts(argparse.Namespace(cache=True))
+        self.assertEqual(cache.cache_dir, fitcache.default_cache_dir)
+
+        cache = fitcache.cache_from_opts(argparse.Namespace(no_cache=False, cache_dir='some_dir'))
+        self.assertEqual(cache.cache_dir, 'some_dir')
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
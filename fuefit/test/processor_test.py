@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#
+# Copyright 2014 European Commission (JRC);
+# Licensed under the EUPL (the 'Licence');
+# You may not use this work except in compliance with the Licence.
+# You may obtain a copy of the Licence at: http://ec.europa.eu/idabc/eupl
+'''
+Check the fitting of engine-maps.
+'''
+import argparse
+import unittest
+
+import lmfit
+
+import numpy as np
+from numpy import testing as npt
+import pandas as pd
+
+from .. import datamodel
+from .. import pdcalc
+from .. import processor
+
+
+_true_coeffs = dict(a=0.40, b=0.012, c=-0.0008, a2=-0.002, b2=0.0001, loss0=-2.0, loss2=-0.004)
+
+def make_eng_points(n=200, noise=0, seed=1):
+    rnd = np.random.RandomState(seed)
+    df = pd.DataFrame({
+        'pmf': rnd.uniform(1, 20, n),
+        'cm': rnd.uniform(2, 18, n),
+    })
+    df['bmep'] = processor.engine_map_modelfunc(_true_coeffs, df) + noise * rnd.standard_normal(n)
+
+    return df
+
+def make_coeffs(**overrides):
+    coeffs = lmfit.Parameters()
+    for name in processor.fc_map_coeff_names:
+        coeffs.add(name, value=0, **overrides.get(name, {}))
+
+    return coeffs
+
+
+class TestFit(unittest.TestCase):
+
+    def test_design_matrix(self):
+        df = make_eng_points(10)
+        A = processor.engine_map_design_matrix(df)
+        values = [_true_coeffs[name] for name in processor.fc_map_coeff_names]
+
+        self.assertEqual(A.shape, (10, 7))
+        npt.assert_allclose(A.dot(values), df['bmep'])
+
+    def test_modelfunc_shapes(self):
+        df = make_eng_points(10)
+        df.index = df.index + 100
+        bmep = processor.engine_map_modelfunc(_true_coeffs, df)
+        self.assertIsInstance(bmep, pd.Series)
+        self.assertTrue(bmep.index.equals(df.index))
+
+        X = {'pmf': df['pmf'].values.reshape(2, 5), 'cm': df['cm'].values.reshape(2, 5)}
+        mesh = processor.engine_map_modelfunc(pd.Series(_true_coeffs), X)
+        self.assertEqual(mesh.shape, (2, 5))
+        npt.assert_allclose(mesh.ravel(), bmep)
+
+    def test_residual_kernel(self):
+        df = make_eng_points(20, noise=0.05)
+        A = processor.engine_map_design_matrix(df)
+        coeffs = make_coeffs()
+        weights = np.linspace(0.5, 1, len(df))
+        expected = np.sqrt(weights) * (processor.engine_map_modelfunc(coeffs.valuesdict(), df) - df['bmep'])
+
+        residualfunc = processor._make_residualfunc(A, df['bmep'], weights)
+        npt.assert_allclose(residualfunc(coeffs), expected)
+
+        out = np.empty(len(df))
+        res = processor.engine_map_residual_kernel(A, processor.coeff_vector(coeffs), df['bmep'].values, 
+                np.sqrt(weights), out=out)
+        self.assertIs(res, out)
+        npt.assert_allclose(out, expected)
+
+    def test_linear_exact(self):
+        df = make_eng_points()
+        res = processor.fit_engine_map(df, False, make_coeffs(), solver='linear')
+
+        npt.assert_allclose(res[list(_true_coeffs)], list(_true_coeffs.values()), atol=1e-8)
+
+    def test_linear_fixedCoeff(self):
+        df = make_eng_points()
+        coeffs = make_coeffs(b2=dict(vary=False))
+        res = processor.fit_engine_map(df, False, coeffs, solver='linear')
+
+        self.assertEqual(res['b2'], 0)
+        self.assertAlmostEqual(res['loss0'], _true_coeffs['loss0'], delta=0.5)
+
+    def test_linear_boundsFail(self):
+        df = make_eng_points()
+        coeffs = make_coeffs(a=dict(min=0))
+        self.assertFalse(processor.is_linear_solvable(coeffs))
+        with self.assertRaisesRegex(ValueError, 'bounds'):
+            processor.fit_engine_map(df, False, coeffs, solver='linear')
+
+    def test_linear_vs_lmfit(self):
+        df = make_eng_points(noise=0.05)
+        res_lin = processor.fit_engine_map(df, False, make_coeffs(), solver='auto')
+        res_lmf = processor.fit_engine_map(df, False, make_coeffs(), solver='lmfit')
+
+        npt.assert_allclose(res_lin[res_lmf.index], res_lmf, rtol=1e-4, atol=1e-6)
+
+    def test_lmfit_jacobian(self):
+        df = make_eng_points(noise=0.05)
+        coeffs = make_coeffs(a=dict(min=-10, max=10), b2=dict(vary=False))
+        A = processor.engine_map_design_matrix(df)
+        (values, minimizer) = processor._fit_engine_map_lmfit(A, df, coeffs)
+        res_lin = processor.fit_engine_map(df, False, make_coeffs(b2=dict(vary=False)))
+
+        npt.assert_allclose(values, res_lin, rtol=1e-4, atol=1e-6)
+
+        ## Compare with finite-differences.
+        #
+        jacfunc = processor._make_jacobianfunc(A, coeffs)
+        numeric = lmfit.minimize(lambda params: A.dot(processor.coeff_vector(params)) - df['bmep'].values, coeffs)
+        npt.assert_allclose(values, [numeric.params[n].value for n in processor.fc_map_coeff_names],
+                rtol=1e-4, atol=1e-6)
+        self.assertLess(minimizer.nfev, numeric.nfev)
+        self.assertEqual(jacfunc(coeffs).shape, (len(df), 6))
+
+    def test_lmfit_jacobian_exprNone(self):
+        coeffs = make_coeffs(b2=dict(expr='b / 10'))
+        A = processor.engine_map_design_matrix(make_eng_points(10))
+        self.assertIsNone(processor._make_jacobianfunc(A, coeffs))
+
+    def test_batch_vs_single(self):
+        dfs = {'eng%i' % i: make_eng_points(n=50 + i * 10, noise=0.05, seed=i) for i in range(4)}
+        coeffs = make_coeffs(b2=dict(vary=False))
+        res = processor.fit_engine_maps(dfs, coeffs)
+
+        self.assertEqual(list(res.index), list(dfs))
+        self.assertEqual(list(res.columns), list(processor.fc_map_coeff_names))
+        for (eng_id, df) in dfs.items():
+            single = processor.fit_engine_map(df, False, coeffs)
+            npt.assert_allclose(res.loc[eng_id], single, rtol=1e-6, atol=1e-9)
+
+    def test_batch_sequence_robust(self):
+        dfs = [make_eng_points(n=40, noise=0.05, seed=i) for i in range(2)]
+        res = processor.fit_engine_maps(dfs, make_coeffs(), is_robust=True)
+
+        self.assertEqual(list(res.index), [0, 1])
+        npt.assert_allclose(res.loc[1], processor.fit_engine_map(dfs[1], True, make_coeffs()))
+
+    def test_batch_tooFewPoints(self):
+        dfs = [make_eng_points(n=40), make_eng_points(n=3)]
+        with self.assertRaisesRegex(ValueError, r'\[1\]'):
+            processor.fit_engine_maps(dfs, make_coeffs())
+
+    def test_fleet_std_map(self):
+        params = {'fuel': {'diesel': {'lhv': 43000}, 'petrol': {'lhv': 42700}}}
+        engines = pd.DataFrame({'fuel': ['diesel', 'petrol'], 'p_max': [90, 75], 'n_idle': [750, 800],
+                'n_rated': [4000, 6000], 'stroke': [90, 80], 'capacity': [1900, 1400]}, index=['e1', 'e2'])
+        rnd = np.random.RandomState(0)
+        fleet_points = pd.DataFrame({'engine_id': ['e2', 'e1', 'e2', 'e1', 'e1'],
+                'n_norm': rnd.uniform(0, 1, 5), 'p_norm': rnd.uniform(0, 1, 5), 'fc_norm': rnd.uniform(0, 1, 5)})
+
+        res = processor.fleet_eng_points_2_std_map(params, engines.copy(), fleet_points.copy())
+
+        for (eng_id, engine) in engines.iterrows():
+            points = fleet_points[fleet_points.engine_id == eng_id].copy()
+            pdcalc.execute_funcs_factory(processor.eng_points_2_std_map,
+                    ('eng_points.cm', 'eng_points.bmep', 'eng_points.pmf', 'engine.fuel_lhv'),
+                    params, engine.copy(), points)
+            for col in ('cm', 'bmep', 'pmf'):
+                npt.assert_allclose(res.loc[points.index, col], points[col])
+
+    def make_run_model(self):
+        mdl = datamodel.base_model()
+        mdl['engine'] = pd.Series(dict(fuel='petrol', p_max=100, n_idle=800, n_rated=6000, stroke=80, capacity=1500))
+        rnd = np.random.RandomState(1)
+        mdl['measured_eng_points'] = pd.DataFrame({
+            'n_norm': rnd.uniform(0.1, 1, 50), 'p_norm': rnd.uniform(0.1, 1, 50), 'fc_norm': rnd.uniform(100, 300, 50)})
+
+        return mdl
+
+    def test_run_variant(self):
+        base = self.make_run_model()
+        base_columns = list(base['measured_eng_points'].columns)
+        opts = argparse.Namespace(no_cache=True)
+
+        models = []
+        for solver in ('linear', 'lmfit'):
+            variant = datamodel.ModelVariant(base)
+            variant.set('/params/fitting/solver', solver)
+            models.append(processor.run_variant(variant, opts))
+
+        self.assertEqual(list(base['measured_eng_points'].columns), base_columns)
+        self.assertNotIn('fc_map_coeffs', base['engine'])
+        self.assertEqual([mdl['fit_info']['solver'] for mdl in models], ['linear', 'lmfit'])
+        npt.assert_allclose(models[0]['engine']['fc_map_coeffs'], models[1]['engine']['fc_map_coeffs'], rtol=1e-4)
+
+    def test_run_ci_params(self):
+        mdl = self.make_run_model()
+        mdl['params']['fitting']['solver'] = 'lmfit'
+        ci_params = dict(n_replicates=8, seed=1, n_workers=2)
+        mdl['params']['fitting']['confidence_intervals'] = ci_params
+        datamodel.validate_model(mdl)
+        ci_params['UNKNOWN'] = 1
+
+        with self.assertLogs(processor.log, 'WARNING'):
+            mdl = processor.run(mdl, argparse.Namespace(no_cache=True))
+        ci = mdl['engine']['fc_map_coeffs_ci']
+        self.assertEqual(list(ci.columns), ['low', 'high', 'std'])
+        self.assertTrue((ci['std'] > 0).all(), ci)
+
+    def test_seed_coeffs(self):
+        coeffs = make_coeffs(b2=dict(expr='b / 10'))
+        seeded = processor.seed_coeffs(coeffs, pd.Series({'a': 1.5, 'b': np.nan, 'b2': 3, 'XX': 1}))
+        seeded = {c.name: c.value for c in seeded}
+
+        self.assertEqual(seeded['a'], 1.5)
+        self.assertEqual(seeded['b'], 0)
+        self.assertNotEqual(seeded['b2'], 3)
+        self.assertEqual(coeffs['a'].value, 0)
+
+    def test_warm_start_fixedCoeff(self):
+        df = make_eng_points(noise=0.05)
+        coeffs = make_coeffs(b2=dict(vary=False))
+        seeded = processor.seed_coeffs(coeffs, pd.Series({'a': 1.5, 'b2': 5}))
+        self.assertEqual([c.value for c in seeded if c.name == 'b2'], [0])
+
+        for solver in ('linear', 'lmfit'):
+            res = processor.fit_engine_map(df, False, coeffs, solver=solver, init_values={'b2': 5})
+            self.assertEqual(res['b2'], 0, solver)
+
+    def test_warm_start_robust(self):
+        df = self.make_outliers(make_eng_points(noise=0.01))
+        cold_info = {}
+        res = processor.fit_engine_map(df, True, make_coeffs(), fit_info=cold_info)
+
+        df.loc[::7, 'bmep'] += 0.001
+        warm_info = {}
+        res_warm = processor.fit_engine_map(df, True, make_coeffs(), fit_info=warm_info, init_values=res)
+
+        self.assertLess(warm_info['robust_iterations'], cold_info['robust_iterations'])
+        npt.assert_allclose(res_warm, res, rtol=1e-2, atol=1e-4)
+
+    def test_warm_start_lmfit(self):
+        df = make_eng_points(noise=0.05)
+        cold_info = {}
+        res = processor.fit_engine_map(df, False, make_coeffs(), solver='lmfit', fit_info=cold_info)
+        warm_info = {}
+        processor.fit_engine_map(df, False, make_coeffs(), solver='lmfit', fit_info=warm_info, init_values=res)
+
+        self.assertLess(warm_info['nfev'], cold_info['nfev'])
+
+    def test_nearest_engine_coeffs(self):
+        fleet = pd.DataFrame({
+                'capacity': [1000, 1600, 2000], 
+                'stroke': [70, 80, 90], 
+                'a': [1, 2, 3], 
+                'b': [4, 5, 6]}, 
+                index=['e1', 'e2', 'e3'])
+        engine = pd.Series({'capacity': 1700, 'stroke': '14 (mm)', 'fuel': 'petrol'})
+        res = processor.nearest_engine_coeffs(engine, fleet)
+
+        self.assertEqual(res.name, 'e2')
+        self.assertEqual(list(res.index), ['a', 'b'])
+
+        with self.assertRaisesRegex(ValueError, 'No common'):
+            processor.nearest_engine_coeffs(pd.Series({'fuel': 'petrol'}), fleet)
+
+    def test_resolve_warm_start(self):
+        self.assertIsNone(processor._resolve_warm_start(None, {}))
+        self.assertIsNone(processor._resolve_warm_start('cache', {}))
+        self.assertEqual(processor._resolve_warm_start({'a': 1}, {})['a'], 1)
+        with self.assertRaises(ValueError):
+            processor._resolve_warm_start('BAD', {})
+
+    def test_accumulator_chunks(self):
+        df = make_eng_points(noise=0.05)
+        coeffs = make_coeffs(b2=dict(vary=False))
+        acc = processor.EngineMapAccumulator()
+        for i in range(0, len(df), 30):
+            acc.update(df.iloc[i:i + 30])
+        res = acc.solve(coeffs)
+
+        self.assertEqual(acc.n_points, len(df))
+        npt.assert_allclose(res, processor.fit_engine_map(df, False, coeffs), rtol=1e-6, atol=1e-9)
+        resid = df['bmep'] - processor.engine_map_modelfunc(res, df)
+        self.assertAlmostEqual(acc.rss(res), (resid ** 2).sum())
+
+    def test_accumulator_decayFail(self):
+        df = make_eng_points(n=30)
+        acc = processor.EngineMapAccumulator().update(df)
+        gram = acc.gram.copy()
+        for decay in (0, -0.5, 1.5, float('nan')):
+            with self.assertRaisesRegex(ValueError, 'Decay'):
+                acc.update(df, decay=decay)
+        npt.assert_array_equal(acc.gram, gram)
+        acc.update(df, decay=1)
+        npt.assert_allclose(acc.gram, 2 * gram)
+
+    def test_accumulator_merge(self):
+        (df1, df2) = (make_eng_points(n=80, noise=0.05, seed=i) for i in (1, 2))
+        acc1 = processor.EngineMapAccumulator().update(df1)
+        acc2 = processor.EngineMapAccumulator().update(df2, weights=np.full(len(df2), 2.0))
+        merged = acc1 + acc2
+
+        self.assertEqual(acc1.n_points, 80)
+        self.assertEqual(merged.n_points, 160)
+        full = processor.EngineMapAccumulator().update(pd.concat([df1, df2, df2]))
+        npt.assert_allclose(merged.solve(), full.solve(), rtol=1e-6, atol=1e-9)
+
+        with self.assertRaisesRegex(ValueError, 'bounds'):
+            merged.solve(make_coeffs(a=dict(min=0)))
+
+    def test_ci_bootstrap(self):
+        df = make_eng_points(noise=0.05)
+        coeffs = make_coeffs(b2=dict(vary=False))
+        ci = processor.fit_engine_map_ci(df, False, coeffs, n_replicates=500, seed=1)
+        ci2 = processor.fit_engine_map_ci(df, False, coeffs, n_replicates=500, seed=1)
+
+        self.assertEqual(list(ci.index), list(processor.fc_map_coeff_names))
+        self.assertEqual(list(ci.columns), ['low', 'high', 'std'])
+        self.assertTrue(ci.equals(ci2))
+        self.assertEqual(ci.loc['b2', 'std'], 0)
+        fitted = processor.fit_engine_map(df, False, coeffs)
+        self.assertTrue(((ci['low'] <= fitted) & (fitted <= ci['high'])).all(), (ci, fitted))
+        self.assertTrue((ci.loc['a':'a2', 'std'] > 0).all())
+
+    def test_ci_linear_vs_replicates(self):
+        df = make_eng_points(n=30, noise=0.05)
+        coeffs = make_coeffs()
+        multiplicities = processor._bootstrap_multiplicities(len(df), 5, seed=2)
+        A = processor.engine_map_design_matrix(df)
+        res_lin = processor._fit_replicates_linear(A, df['bmep'], coeffs, multiplicities, chunk_size=2)
+        res_one = processor._fit_replicates(df, multiplicities, False, coeffs, 'linear', None)
+
+        npt.assert_allclose(res_lin, res_one, rtol=1e-6, atol=1e-9)
+
+    def test_ci_jackknife_linear_vs_replicates(self):
+        df = make_eng_points(n=30, noise=0.05)
+        coeffs = make_coeffs(b2=dict(vary=False))
+        A = processor.engine_map_design_matrix(df)
+        res_lin = processor._fit_jackknife_linear(A, df['bmep'], coeffs, chunk_size=7)
+        res_one = processor._fit_jackknife_replicates(df, range(len(df)), False, coeffs, 'linear', None)
+
+        npt.assert_allclose(res_lin, res_one, rtol=1e-6, atol=1e-9)
+
+    def test_ci_jackknife_robust(self):
+        df = self.make_outliers(make_eng_points(n=40, noise=0.01))
+        ci = processor.fit_engine_map_ci(df, True, make_coeffs(), method='jackknife', n_workers=1)
+        fitted = processor.fit_engine_map(df, True, make_coeffs())
+
+        npt.assert_allclose((ci['low'] + ci['high']) / 2, fitted)
+        self.assertTrue((ci['std'] > 0).all())
+
+        with self.assertRaisesRegex(ValueError, 'BAD'):
+            processor.fit_engine_map_ci(df, False, make_coeffs(), method='BAD')
+
+    def make_outliers(self, df):
+        df = df.copy()
+        df.loc[::20, 'bmep'] += 5
+
+        return df
+
+    def test_robust_linear(self):
+        df = self.make_outliers(make_eng_points(noise=0.01))
+        fit_info = {}
+        res_robust = processor.fit_engine_map(df, True, make_coeffs(), fit_info=fit_info)
+        res_plain = processor.fit_engine_map(df, False, make_coeffs())
+
+        self.assertEqual(fit_info['solver'], 'linear')
+        self.assertTrue(fit_info['robust_converged'], fit_info)
+        self.assertGreater(fit_info['robust_iterations'], 1)
+        err_robust = np.abs(res_robust['loss0'] - _true_coeffs['loss0'])
+        err_plain = np.abs(res_plain['loss0'] - _true_coeffs['loss0'])
+        self.assertLess(err_robust, 0.1)
+        self.assertLess(err_robust, err_plain)
+
+    def test_robust_maxIter(self):
+        df = self.make_outliers(make_eng_points(noise=0.01))
+        fit_info = {}
+        processor.fit_engine_map(df, True, make_coeffs(), robust_tol=1e-300, robust_max_iter=2, fit_info=fit_info)
+
+        self.assertEqual(fit_info['robust_iterations'], 2)
+        self.assertFalse(fit_info['robust_converged'], fit_info)
+
+    def test_robust_lmfit(self):
+        df = self.make_outliers(make_eng_points(noise=0.01))
+        fit_info = {}
+        res_lin = processor.fit_engine_map(df, True, make_coeffs(), solver='linear')
+        res_lmf = processor.fit_engine_map(df, True, make_coeffs(), solver='lmfit', fit_info=fit_info)
+
+        self.assertEqual(fit_info['solver'], 'lmfit')
+        npt.assert_allclose(res_lin, res_lmf, rtol=1e-3, atol=1e-5)
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -162,9 +162,10 @@ setup(
         'fuefit.test': ['*.bat', '*.sh'],
         'fuefit.excel': ['*.xlsm', '*.ico'],
     },
-#    extras_require = {
+    extras_require = {
 #        'docs':  ['sphinx >= 1.2'],
-#    },
+        'networkx':  ['networkx'],  ## For exporting `pdcalc.DepsGraph`.
+    },
     install_requires=[
         'enum34',
         'pandas',
@@ -173,7 +174,6 @@ setup(
         'lmfit',
         'jsonschema',
         'matplotlib',
-        'networkx',
         'pint',
         'xlwings == 0.2.3',
     ],